@@ -1,13 +1,29 @@
 import streamlit as st
-import praw
 import json
 import os
-from datetime import datetime
-from tqdm import tqdm
 import io
+import shutil
+import sqlite3
+import tempfile
 import time
+import uuid
+from contextlib import closing
+from itertools import islice
 from dotenv import load_dotenv
 
+from reddit_scraper.columnar import PARQUET_AVAILABLE, dataset_summary, iter_dataset_posts, zip_dataset
+from reddit_scraper.cleaner_core import iter_posts as iter_file_posts
+from reddit_scraper.analytics import ScrapeFrames
+from reddit_scraper.dedup_store import DEFAULT_STORE_PATH, ScrapeStore, is_store, iter_store_dataset, store_ref
+from reddit_scraper.jobs import CANCELLED, DONE, FAILED, JobManager
+from reddit_scraper.instrumentation import PROFILERS, NETWORK_STAGES, RunStats, format_bytes, stage
+from reddit_scraper.keyword_matcher import MATCH_MODES, KeywordMatcher
+from reddit_scraper.rate_limit import describe_stats
+from reddit_scraper.result_cache import ResultCache, scrape_cache_key
+from reddit_scraper.scraper_core import CommentBudget, ScrapeSession, iter_posts
+from reddit_scraper.search_index import DEFAULT_INDEX_PATH, SearchIndex
+from reddit_scraper.writers import open_writers
+
 # Page config (must be first Streamlit command)
 st.set_page_config(
     page_title="Reddit Scraper & Data Cleaner",
@@ -62,117 +78,315 @@ if not all([CLIENT_ID, CLIENT_SECRET, USER_AGENT]):
     """)
     st.stop()
 
+# Most comment fetches a single scrape may run at once
+MAX_WORKERS = 16
+# Most scrapes the server runs at once; more wait in the job queue
+MAX_JOBS = 2
+# How often the job list refreshes while a job is running
+JOB_POLL_SECONDS = 2
+# Newest posts shown in the live results table of a running scrape
+LIVE_ROWS = 200
+# Loaded scrapes kept for the Analytics page (per process, shared by every session)
+ANALYTICS_CACHE_ENTRIES = 3
+# Scrape downloads written from the cached posts, besides the JSON
+SCRAPE_DOWNLOADS = ["text", "sqlite"] + (["parquet"] if PARQUET_AVAILABLE else [])
+
 # Utility Functions
-def scrape_subreddit(subreddit_name, limit=10, sort="new", time_filter="all", keywords=None, progress_callback=None):
+@st.cache_resource
+def get_scrape_session():
     """
-    Scrape subreddit posts with all available options
+    Process-wide scrape session shared by every rerun and every user, so scrapes reuse
+    authenticated Reddit clients and warm connection pools instead of starting cold
     """
-    try:
-        reddit = praw.Reddit(
-            client_id=CLIENT_ID,
-            client_secret=CLIENT_SECRET,
-            user_agent=USER_AGENT,
-            check_for_async=False
-        )
+    return ScrapeSession(CLIENT_ID, CLIENT_SECRET, USER_AGENT, workers=MAX_WORKERS)
 
-        sub = reddit.subreddit(subreddit_name)
+@st.cache_resource
+def get_result_cache():
+    """
+    Finished scrapes shared by every user, keyed by the normalized request parameters
+    """
+    return ResultCache()
 
-        # Get submissions based on sort method
-        if sort == "new":
-            submissions = sub.new(limit=limit)
-        elif sort == "hot":
-            submissions = sub.hot(limit=limit)
-        elif sort == "top":
-            submissions = sub.top(time_filter=time_filter, limit=limit)
-        elif sort == "controversial":
-            submissions = sub.controversial(time_filter=time_filter, limit=limit)
-        else:
-            submissions = sub.new(limit=limit)
+@st.cache_resource
+def get_job_manager():
+    """
+    Background scrape jobs, run on one worker pool for the whole server process so they
+    keep going across reruns and sessions
+    """
+    return JobManager(max_jobs=MAX_JOBS)
 
-        results = []
-        processed = 0
+@st.cache_resource(max_entries=ANALYTICS_CACHE_ENTRIES, ttl=3600, show_spinner=False)
+def load_scrape_frames(source_key, _load):
+    """
+    Columnar frames of one scrape, built once per source_key; widget changes on the
+    Analytics page only rerun the aggregates. Returns (frames, seconds to load).
+    """
+    start = time.perf_counter()
+    frames = _load()
+    return frames, time.perf_counter() - start
 
-        for submission in submissions:
-            processed += 1
-            if progress_callback:
-                progress_callback(processed, limit)
+def scrape_subreddit(subreddit_name, limit=10, sort="new", time_filter="all", keywords=None, workers=1, comment_keyword_scope="all", keyword_mode="substring", budget=None, session=None):
+    """
+    Scrape subreddit posts with all available options, yielding (scanned, post) as each
+    post finishes, in listing order. scanned counts every post looked at so far; post
+    is None when the keyword filter rejected it.
+    """
+    matcher = KeywordMatcher(keywords, mode=keyword_mode) if keywords else None
+    
+    # Every scrape in the app shares one rate budget; workers limits this scrape's share of the pool
+    session = session or get_scrape_session()
+    posts = iter_posts(session, subreddit_name, limit=limit, sort=sort, time_filter=time_filter,
+                       matcher=matcher, comment_keyword_scope=comment_keyword_scope, workers=workers,
+                       budget=budget)
+    with closing(posts):
+        for scanned, (submission, item) in enumerate(posts, 1):
+            yield scanned, item
 
-            # Get comments
-            submission.comments.replace_more(limit=None)
-            comments = []
-            for comment in submission.comments.list():
-                comments.append({
-                    "id": comment.id,
-                    "parent_id": comment.parent_id,
-                    "body": comment.body,
-                    "author": str(comment.author) if comment.author else None,
-                    "score": comment.score,
-                })
+def run_scrape_job(job, cache, cache_key, profiler="off", session=None, **options):
+    """
+    Background job: run a scrape (options are scrape_subreddit's arguments), streaming
+    the posts into job.items as they finish, and store the result and its run report
+    in the cache. Returns the cache key.
+    """
+    session = session or get_scrape_session()
+    limit = options.get("limit")
+    job.progress(0, limit, "Waiting for the listing...")
+    stats = RunStats(profile=None if profiler == "off" else profiler)
+    try:
+        with stats.bind():
+            start_time = time.time()
+            with closing(scrape_subreddit(session=session, **options)) as posts:
+                for scanned, post in posts:
+                    if post is not None:
+                        job.emit(post)
+                    job.progress(scanned, limit, describe_stats(session.rate_limiter.stats()))
+                    job.check_cancelled()
+            end_time = time.time()
+        with stats.bind(), stage("serialize"):
+            entry = cache.put(cache_key, job.items, end_time - start_time)
+    finally:
+        stats.finish()
+    entry.report = stats.report()
+    return cache_key
 
-            item = {
-                "id": submission.id,
-                "title": submission.title,
-                "author": str(submission.author) if submission.author else None,
-                "score": submission.score,
-                "num_comments": submission.num_comments,
-                "created_utc": int(submission.created_utc),
-                "created_iso": datetime.utcfromtimestamp(submission.created_utc).isoformat() + "Z",
-                "selftext": submission.selftext,
-                "url": submission.url,
-                "comments": comments,
-            }
+def live_results(job):
+    """
+    Running totals and a table of the posts a scrape job has kept so far, newest first
+    """
+    posts = list(job.items)
+    total_comments = sum(len(post.get('comments', [])) for post in posts)
+    avg_score = sum(post.get('score', 0) for post in posts) / len(posts) if posts else 0
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Matches So Far", len(posts))
+    with col2:
+        st.metric("Posts Scanned", f"{job.processed}/{job.total}" if job.total else job.processed)
+    with col3:
+        st.metric("Total Comments", total_comments)
+    with col4:
+        st.metric("Average Score", f"{avg_score:.1f}")
+    
+    if posts:
+        st.dataframe([{
+            "title": post.get('title'),
+            "author": post.get('author'),
+            "score": post.get('score', 0),
+            "comments": len(post.get('comments', [])),
+            "created": post.get('created_iso'),
+        } for post in reversed(posts[-LIVE_ROWS:])], hide_index=True)
 
-            # Filter by keywords if provided
-            if keywords:
-                text_to_search = (submission.title + " " + submission.selftext + " " +
-                                  " ".join([c["body"] for c in comments]))
-                if not any(kw.lower() in text_to_search.lower() for kw in keywords):
-                    continue
+def show_results(cache_key, cache_hit=False):
+    """
+    Render the cached scrape under cache_key below the form on this and later reruns
+    """
+    st.session_state["scrape_key"] = cache_key
+    st.session_state["scrape_cache_hit"] = cache_hit
 
-            results.append(item)
+def auto_refresh(func, seconds):
+    """
+    Rerun func on its own every few seconds, without rerunning the page
+    """
+    if seconds is None:
+        return func
+    return st.fragment(run_every=seconds)(func)
 
-        return results, None
+def scrape_jobs_panel(polling=False):
+    """
+    This session's scrape jobs with their progress, and buttons to cancel them or open
+    their results. The job started last (or picked with Watch) streams its posts into a
+    live table and opens by itself when it finishes.
+    """
+    manager = get_job_manager()
+    owner = st.session_state["session_id"]
+    job_ids = st.session_state.setdefault("job_ids", [])
+    jobs = manager.jobs(job_ids)
+    
+    waiting = manager.get(st.session_state.get("scrape_job"))
+    if waiting is not None and not waiting.active:
+        del st.session_state["scrape_job"]
+        if waiting.state == DONE:
+            show_results(waiting.result)
+            st.rerun()
+    if polling and not any(job.active for job in jobs):
+        # Stop polling and redraw the page with the final states
+        st.rerun()
+    
+    if not jobs:
+        return
+    
+    st.subheader("🗂️ Scrape Jobs")
+    for job in jobs:
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.markdown(f"**{job.name}** · `{job.id}` · {job.state}")
+            if job.active:
+                # Posts rejected by the keyword filter count as scanned, not as results
+                scanned = f"{job.processed}/{job.total}" if job.total else job.processed
+                st.progress(job.fraction, text=f"{scanned} posts scanned · {len(job.items)} matched · "
+                                               f"{job.elapsed:.0f}s · {job.status}")
+            elif job.state == FAILED:
+                st.error(f"Error occurred during scraping: {job.error}")
+            elif job.state == DONE:
+                st.caption(f"Finished in {job.elapsed:.1f}s")
+            elif job.state == CANCELLED:
+                st.caption("Cancelled")
+        with col2:
+            if job.active:
+                if job is not waiting and st.button("👁️ Watch", key=f"watch_{job.id}"):
+                    st.session_state["scrape_job"] = job.id
+                    st.rerun()
+                if st.button("✖️ Cancel", key=f"cancel_{job.id}"):
+                    manager.cancel(job.id, owner)
+                    job_ids.remove(job.id)
+                    st.rerun()
+            else:
+                if job.state == DONE and st.button("📂 Show Results", key=f"show_{job.id}"):
+                    show_results(job.result)
+                    st.rerun()
+                if st.button("🗑️ Dismiss", key=f"dismiss_{job.id}"):
+                    job_ids.remove(job.id)
+                    st.rerun()
+    
+    if waiting is not None and waiting.active:
+        st.subheader(f"📡 Live Results: {waiting.name}")
+        live_results(waiting)
 
-    except Exception as e:
-        return None, str(e)
+def download_files(posts, formats, threaded=False, batch_posts=200):
+    """
+    Write posts to every format in formats in a single pass (see writers.FanOutWriter)
+    and return {format: rewound temporary file}, ready to hand to st.download_button,
+    instead of building each output up as one string. The files are unbuffered (raw)
+    because that is the file type st.download_button accepts. Parquet datasets come
+    back zipped. Streamlit reads a file whole on every run that shows its button, so
+    on pages that rerun often pass the button a callable instead (see entry_download).
+    """
+    workdir = tempfile.mkdtemp()
+    files = {}
+    try:
+        outputs = []
+        for output_format in formats:
+            if output_format in ("json", "jsonl", "text"):
+                files[output_format] = tempfile.TemporaryFile(buffering=0)
+                outputs.append((files[output_format], output_format))
+            else:
+                outputs.append((os.path.join(workdir, output_format), output_format))
+        with open_writers(outputs, batch_size=batch_posts, threaded=threaded) as writer:
+            for post in posts:
+                writer.write(post)
+        for path, output_format in outputs:
+            if output_format == "parquet":
+                files[output_format] = zip_dataset(path)
+            elif output_format == "sqlite":
+                files[output_format] = tempfile.TemporaryFile(buffering=0)
+                with open(path, "rb") as db:
+                    shutil.copyfileobj(db, files[output_format])
+        for out in files.values():
+            out.seek(0)
+        return files
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
 
-def format_reddit_data(data):
+def entry_download(entry, threaded, output_format):
     """
-    Format Reddit JSON data into readable text format
+    st.download_button data for one of a cached scrape's downloads, as a callable
+    Streamlit only runs when the button is clicked. The first click writes every
+    download format in one pass, once per cache entry and threaded setting; other
+    sessions showing the same entry read the same files, so under its lock.
     """
-    output = io.StringIO()
-    
-    for post in data:
-        output.write("=" * 60 + "\n")
-        output.write(f"POST TITLE: {post.get('title', 'No Title')}\n")
-        
-        author = post.get('author', 'N/A')
-        score = post.get('score', 0)
-        num_comments = post.get('num_comments', 0)
-        try:
-            created_date = datetime.fromisoformat(post.get('created_iso', '...Z').replace('Z', '+00:00')).strftime('%Y-%m-%d')
-        except:
-            created_date = 'N/A'
-        
-        output.write(f"Author: {author} | Score: {score} | Comments: {num_comments} | Date: {created_date}\n")
-        output.write("-" * 60 + "\n\n")
+    def read():
+        with entry.lock:
+            files = entry.downloads.get(threaded)
+            if files is None:
+                files = entry.downloads[threaded] = download_files(entry.data, SCRAPE_DOWNLOADS, threaded)
+            files[output_format].seek(0)
+            return files[output_format].read()
+    return read
 
-        if post.get('selftext'):
-            output.write(f"{post['selftext']}\n\n")
+def preview_text(text_file, length=1000):
+    """
+    First characters of a cleaned text file, leaving the file rewound
+    """
+    head = text_file.read(length * 4).decode("utf-8", errors="ignore")
+    text_file.seek(0)
+    return head[:length] + ("..." if len(head) > length else "")
 
-        if 'comments' in post and post['comments']:
-            output.write("--- COMMENTS ---\n\n")
-            for comment in post['comments']:
-                comment_author = comment.get('author', 'N/A')
-                comment_score = comment.get('score', 0)
-                comment_body = comment.get('body', '').replace('\n', '\n  ')
-                
-                output.write(f"Comment by {comment_author} (Score: {comment_score}):\n")
-                output.write(f"  {comment_body}\n\n")
+def iter_uploaded_posts(uploaded_file):
+    """
+    Stream posts from an uploaded JSON array or JSONL file
+    """
+    uploaded_file.seek(0)
+    text = io.TextIOWrapper(uploaded_file, encoding="utf-8")
+    try:
+        yield from iter_file_posts(text)
+    finally:
+        # Keep the upload open for the next pass
+        text.detach()
+
+def run_breakdown(report, file_name):
+    """
+    Where the time of a scrape went: per-stage timings, API usage and, if the run
+    was profiled, the top functions
+    """
+    with st.expander("⏱️ Run Breakdown"):
+        if st.session_state.get("scrape_cache_hit"):
+            st.caption("From the scrape that filled the cache entry.")
         
-        output.write("\n" * 2)
-    
-    return output.getvalue()
+        counters = report["counters"]
+        per_post = report["distributions"].get("comments_per_post", {})
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            endpoints = ", ".join(f"{name}: {n}" for name, n in report["api_calls_by_endpoint"].items())
+            st.metric("API Calls", counters.get("api_calls", 0), help=endpoints or None)
+        with col2:
+            st.metric("Data Received", format_bytes(counters.get("bytes_received", 0)))
+        with col3:
+            st.metric("MoreComments Expansions", counters["more_expansions"])
+        with col4:
+            st.metric("Comments per Post", f"{per_post['mean']:.1f}" if per_post.get("mean") is not None else "-",
+                      help=f"p50 {per_post['p50']} · p95 {per_post['p95']} · max {per_post['max']}"
+                      if per_post.get("count") else None)
+        
+        stages = report["stages"]
+        pipeline = {name: info["seconds"] for name, info in stages.items() if name not in NETWORK_STAGES}
+        if pipeline:
+            st.bar_chart({"seconds": pipeline})
+        st.table([{"stage": name, "seconds": round(info["seconds"], 3), "calls": info["calls"],
+                   "avg ms": round(info["mean_ms"], 1)} for name, info in stages.items()])
+        st.caption(f"Wall time {report['wall_seconds']:.2f}s. Stage times are summed over all workers; "
+                   "http and rate_limit_wait are the network part of the stages above.")
+        
+        if report.get("profile") and report["profile"]["top"]:
+            st.markdown(f"**Top functions** ({report['profile']['mode']})")
+            st.table([{"function": row["function"], "total s": round(row["total_seconds"], 3),
+                       "self s": round(row["self_seconds"], 3)} for row in report["profile"]["top"][:15]])
+        
+        st.download_button(
+            label="📊 Download Run Report",
+            data=json.dumps(report, indent=2),
+            file_name=file_name,
+            mime="application/json"
+        )
 
 # Main App
 def main():
@@ -181,10 +395,14 @@ def main():
     
     # Sidebar for navigation
     st.sidebar.title("Navigation")
-    page = st.sidebar.selectbox("Choose functionality:", ["Reddit Scraper", "Data Cleaner"])
+    page = st.sidebar.selectbox("Choose functionality:", ["Reddit Scraper", "Data Cleaner", "Analytics", "Search"])
     
     if page == "Reddit Scraper":
         reddit_scraper_page()
+    elif page == "Analytics":
+        analytics_page()
+    elif page == "Search":
+        search_page()
     else:
         data_cleaner_page()
 
@@ -248,6 +466,65 @@ def reddit_scraper_page():
             else:
                 keywords = [kw.strip() for kw in keywords_input.split('\n') if kw.strip()]
         
+        # How keywords are matched
+        keyword_mode = st.selectbox(
+            "Keyword Match Mode",
+            options=list(MATCH_MODES),
+            disabled=not keywords,
+            help="substring: anywhere in the text. word: whole words only. phrase: whole words, any whitespace between them. regex: each keyword is a regular expression."
+        )
+        
+        # How far the keyword filter may look into comments
+        comment_keyword_scope = st.selectbox(
+            "Match Keywords in Comments",
+            options=["all", "loaded", "none"],
+            disabled=not keywords,
+            help="all: expand full comment trees when needed. loaded: only check the first page of comments. none: only title and text (skips comment requests for non-matching posts)."
+        )
+        
+        # Concurrent comment expansion
+        workers = st.number_input(
+            "Concurrent Workers",
+            min_value=1,
+            max_value=MAX_WORKERS,
+            value=1,
+            help="Number of posts whose comment trees are fetched at the same time. All workers share one API rate budget."
+        )
+        
+        # Per-post comment limits, so a few megathreads can't dominate the run
+        with st.expander("Comment Limits"):
+            max_more = st.number_input(
+                "Max 'load more' requests per post", min_value=0, value=None, placeholder="No limit",
+                help="Each 'load more comments' link costs one API request. Megathreads can have hundreds."
+            )
+            max_depth = st.number_input(
+                "Max reply depth", min_value=0, value=None, placeholder="No limit",
+                help="0 keeps only top-level comments."
+            )
+            min_score = st.number_input(
+                "Minimum comment score", value=None, placeholder="No limit",
+                help="Lower-scoring comments are dropped after loading, so on its own this doesn't save API requests."
+            )
+            top_n = st.number_input(
+                "Keep only the N best comments", min_value=1, value=None, placeholder="All",
+                help="Comments are requested in Reddit's top order, no more are loaded once N are in, and the highest-scoring N are kept."
+            )
+            deadline = st.number_input(
+                "Seconds per post", min_value=0.0, value=None, placeholder="No limit",
+                help="Stop loading more comments for a post after this long."
+            )
+        budget = CommentBudget(max_more=max_more, max_depth=max_depth, min_score=min_score, top_n=top_n,
+                               deadline=deadline)
+        budget = None if budget.unlimited else budget
+        
+        # Optional profiling, shown in the run breakdown below the results
+        with st.expander("Diagnostics"):
+            profiler = st.selectbox(
+                "Profiler",
+                options=["off", *PROFILERS],
+                help="sample: low-overhead stack sampling of every worker thread. cprofile: exact call counts and times, but slows the scrape down."
+            )
+        
         # Display selected options
         st.subheader("Selected Options")
         st.info(f"""
@@ -261,132 +538,320 @@ def reddit_scraper_page():
     # Scraping section
     st.markdown("---")
     
+    cache = get_result_cache()
+    # Identifies this browser session as the owner of the jobs it starts
+    st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    
     if st.button("🚀 Start Scraping", type="primary", disabled=not subreddit_name):
         if not subreddit_name:
             st.error("Please enter a subreddit name!")
             return
-            
-        # Progress tracking
-        progress_bar = st.progress(0)
-        status_text = st.empty()
         
-        def update_progress(current, total):
-            progress = current / total
-            progress_bar.progress(progress)
-            status_text.text(f"Processed {current}/{total} posts...")
+        cache_key = scrape_cache_key(
+            subreddit_name,
+            sort=sort_method,
+            time_filter=time_filter or "all",
+            limit=limit,
+            keywords=keywords,
+            keyword_mode=keyword_mode,
+            comment_keyword_scope=comment_keyword_scope,
+            budget=budget
+        )
+        entry = cache.get(cache_key)
         
-        with st.spinner("Scraping subreddit data..."):
-            start_time = time.time()
-            data, error = scrape_subreddit(
+        if entry is None:
+            # Scrape in the background; the job list below tracks it and shows the result when done
+            job = get_job_manager().submit(
+                run_scrape_job,
+                cache,
+                cache_key,
+                profiler,
+                name=f"r/{subreddit_name} · {sort_method} · {limit} posts",
+                key=cache_key,
+                owner=st.session_state["session_id"],
                 subreddit_name=subreddit_name,
                 limit=limit,
                 sort=sort_method,
                 time_filter=time_filter or "all",
                 keywords=keywords,
-                progress_callback=update_progress
+                workers=workers,
+                comment_keyword_scope=comment_keyword_scope,
+                keyword_mode=keyword_mode,
+                budget=budget,
+                session=get_scrape_session()
             )
-            end_time = time.time()
-        
-        if error:
-            st.error(f"Error occurred during scraping: {error}")
-            return
-        
-        if not data:
-            st.warning("No posts found matching your criteria!")
-            return
-        
-        # Success message
-        st.success(f"✅ Successfully scraped {len(data)} posts in {end_time - start_time:.2f} seconds!")
-        
-        # Display results
-        st.subheader("📊 Scraping Results")
-        
-        # Results summary
-        total_comments = sum(len(post.get('comments', [])) for post in data)
-        avg_score = sum(post.get('score', 0) for post in data) / len(data) if data else 0
-        
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Posts Scraped", len(data))
-        with col2:
-            st.metric("Total Comments", total_comments)
-        with col3:
-            st.metric("Average Score", f"{avg_score:.1f}")
-        with col4:
-            st.metric("Time Taken", f"{end_time - start_time:.2f}s")
-        
-        # Preview data
-        if st.checkbox("Show preview of scraped data"):
-            st.subheader("Data Preview")
-            for i, post in enumerate(data[:3]):  # Show first 3 posts
-                with st.expander(f"Post {i+1}: {post.get('title', 'No Title')[:50]}..."):
-                    st.write(f"**Author:** {post.get('author', 'N/A')}")
-                    st.write(f"**Score:** {post.get('score', 0)}")
-                    st.write(f"**Comments:** {post.get('num_comments', 0)}")
-                    st.write(f"**Content:** {post.get('selftext', 'No content')[:200]}...")
-        
-        # Download options
-        st.subheader("💾 Download Options")
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            # JSON download
-            json_data = json.dumps(data, ensure_ascii=False, indent=2)
-            st.download_button(
-                label="📄 Download as JSON",
-                data=json_data,
-                file_name=f"{subreddit_name}_{sort_method}_output.json",
-                mime="application/json"
-            )
-        
-        with col2:
-            # Cleaned text download
-            cleaned_text = format_reddit_data(data)
+            job_ids = st.session_state.setdefault("job_ids", [])
+            if job.id not in job_ids:
+                job_ids.insert(0, job.id)
+            st.session_state["scrape_job"] = job.id
+        else:
+            show_results(cache_key, cache_hit=True)
+    
+    jobs = get_job_manager().jobs(st.session_state.get("job_ids", []))
+    polling = any(job.active for job in jobs)
+    auto_refresh(scrape_jobs_panel, JOB_POLL_SECONDS if polling else None)(polling)
+    
+    cache_key = st.session_state.get("scrape_key")
+    if cache_key is None:
+        return
+    
+    entry = cache.peek(cache_key)
+    if entry is None:
+        st.info("The previous results have expired from the cache. Start scraping again to refresh them.")
+        return
+    
+    data = entry.data
+    subreddit_name, sort_method = cache_key[0], cache_key[1]
+    
+    if not data:
+        st.warning("No posts found matching your criteria!")
+        return
+    
+    # Success message
+    if st.session_state.get("scrape_cache_hit"):
+        st.success(f"⚡ Loaded {len(data)} posts from the cache (scraped {entry.age / 60:.0f} min ago)")
+    else:
+        st.success(f"✅ Successfully scraped {len(data)} posts in {entry.elapsed:.2f} seconds!")
+    
+    stats = cache.stats()
+    st.caption(
+        f"Cache: {'HIT' if st.session_state.get('scrape_cache_hit') else 'MISS'} · "
+        f"{stats['entries']} entries, {stats['size_bytes'] / 1024 / 1024:.1f} MB · "
+        f"{stats['hits']} hits / {stats['misses']} misses · expires after {cache.ttl // 60} min"
+    )
+    
+    # Display results
+    st.subheader("📊 Scraping Results")
+    
+    # Results summary
+    total_comments = sum(len(post.get('comments', [])) for post in data)
+    avg_score = sum(post.get('score', 0) for post in data) / len(data) if data else 0
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Posts Scraped", len(data))
+    with col2:
+        truncated = sum(1 for post in data if post.get('comments_truncated'))
+        st.metric("Total Comments", total_comments,
+                  help=f"{truncated} posts hit a comment limit" if truncated else None)
+    with col3:
+        st.metric("Average Score", f"{avg_score:.1f}")
+    with col4:
+        st.metric("Time Taken", f"{entry.elapsed:.2f}s")
+    
+    if entry.report:
+        run_breakdown(entry.report, f"{subreddit_name}_{sort_method}_run_report.json")
+    
+    # Preview data
+    if st.checkbox("Show preview of scraped data"):
+        st.subheader("Data Preview")
+        for i, post in enumerate(data[:3]):  # Show first 3 posts
+            with st.expander(f"Post {i+1}: {post.get('title', 'No Title')[:50]}..."):
+                st.write(f"**Author:** {post.get('author', 'N/A')}")
+                st.write(f"**Score:** {post.get('score', 0)}")
+                st.write(f"**Comments:** {post.get('num_comments', 0)}")
+                st.write(f"**Content:** {post.get('selftext', 'No content')[:200]}...")
+    
+    # Download options
+    st.subheader("💾 Download Options")
+    
+    threaded = st.checkbox(
+        "Threaded cleaned text",
+        help="Indent each reply under the comment it answers, with reply counts, instead of listing comments in scrape order"
+    )
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        # JSON download (serialized once, when the result was cached)
+        st.download_button(
+            label="📄 Download as JSON",
+            data=entry.json_text,
+            file_name=f"{subreddit_name}_{sort_method}_output.json",
+            mime="application/json"
+        )
+    
+    # The other downloads are only written when one is clicked (see entry_download)
+    with col2:
+        # Cleaned text download
+        st.download_button(
+            label="📝 Download as Cleaned Text",
+            data=entry_download(entry, threaded, "text"),
+            file_name=f"{subreddit_name}_{sort_method}_cleaned.txt",
+            mime="text/plain"
+        )
+        # Posts and comments tables to query with SQL
+        st.download_button(
+            label="🗄️ Download as SQLite",
+            data=entry_download(entry, threaded, "sqlite"),
+            file_name=f"{subreddit_name}_{sort_method}_output.db",
+            mime="application/vnd.sqlite3",
+            help="posts and comments tables, joined on comments.post_id"
+        )
+    
+    with col3:
+        # Compressed posts and comments tables, for pandas/DuckDB/Spark or the Data Cleaner
+        if PARQUET_AVAILABLE:
             st.download_button(
-                label="📝 Download as Cleaned Text",
-                data=cleaned_text,
-                file_name=f"{subreddit_name}_{sort_method}_cleaned.txt",
-                mime="text/plain"
+                label="📦 Download as Parquet",
+                data=entry_download(entry, threaded, "parquet"),
+                file_name=f"{subreddit_name}_{sort_method}_parquet.zip",
+                mime="application/zip",
+                help="posts.parquet and comments.parquet, joined on post_id"
             )
+        else:
+            st.caption("Install pyarrow to download as Parquet")
+
+def pick_store_dataset():
+    """
+    Store file and dataset pickers. Returns (store path, dataset row), or None
+    when there is nothing to pick.
+    """
+    store_path = st.text_input(
+        "Store File",
+        value=DEFAULT_STORE_PATH,
+        help="Written by `scraper-main.py --format store` or `python scrape-store.py import <files>`"
+    )
+    if not is_store(store_path):
+        st.info("No scrape store at this path yet. Scrape with `--format store` or import earlier scrape files "
+                "with `python scrape-store.py import <files>`.")
+        return None
+    
+    with ScrapeStore(store_path) as store:
+        datasets = store.datasets()
+        stats = store.stats()
+    if not datasets:
+        st.info("The store has no datasets yet.")
+        return None
+    
+    st.caption(f"{stats['datasets']} datasets referring to {stats['referenced_posts']} posts and "
+               f"{stats['referenced_comments']} comments, stored once as {stats['posts']} posts and "
+               f"{stats['comments']} comments ({stats['size_bytes'] / 1024 / 1024:.1f} MB)")
+    
+    # Newest first
+    by_name = {d["name"]: d for d in datasets}
+    name = st.selectbox("Dataset", options=list(reversed(by_name)), help="One dataset per scrape run")
+    return store_path, by_name[name]
+
+def store_cleaner_section():
+    """
+    Materialize a dataset from the local scrape store, then clean it or download it
+    as an ordinary JSONL scrape file
+    """
+    picked = pick_store_dataset()
+    if picked is None:
+        return
+    store_path, info = picked
+    name = info["name"]
+    ref = store_ref(store_path, name)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Total Posts", info["posts"])
+    with col2:
+        st.metric("Total Comments", info["comments"])
+    with col3:
+        st.metric("New to the Store", f"{info['new_posts']} / {info['new_comments']}",
+                  help="Posts / comments this run added; the rest refer to copies from earlier runs")
+    if not info["finished_at"]:
+        st.warning("This run didn't finish; the dataset holds the posts saved before it stopped.")
+    
+    threaded = st.checkbox(
+        "Threaded comments",
+        help="Indent each reply under the comment it answers, with reply counts, instead of listing comments in scrape order"
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        clean = st.button("🧹 Clean Data", type="primary")
+    with col2:
+        materialize = st.button("📦 Materialize as JSONL")
+    
+    if clean:
+        with st.spinner("Cleaning data..."):
+            cleaned_file = download_files(iter_store_dataset(ref), ["text"], threaded)["text"]
+        st.success("✅ Data cleaned successfully!")
+        st.text_area(
+            "Preview (first 1000 characters)",
+            value=preview_text(cleaned_file),
+            height=300,
+            disabled=True
+        )
+        st.download_button(
+            label="📥 Download Cleaned Text",
+            data=cleaned_file,
+            file_name=f"{name}_cleaned.txt",
+            mime="text/plain"
+        )
+    
+    if materialize:
+        with st.spinner("Reading the dataset from the store..."):
+            data_file = download_files(iter_store_dataset(ref), ["jsonl"])["jsonl"]
+        st.download_button(
+            label="📥 Download JSONL",
+            data=data_file,
+            file_name=f"{name}_output.jsonl",
+            mime="application/x-ndjson"
+        )
 
 def data_cleaner_page():
     st.header("🧹 Data Cleaner")
-    st.markdown("Upload a JSON file from the Reddit scraper and convert it to a clean, readable text format.")
+    st.markdown("Upload a JSON, JSONL or zipped Parquet file from the Reddit scraper, or pick a run from the local scrape store, and convert it to a clean, readable text format.")
+    
+    source = st.radio("Source", options=["Upload a file", "Scrape store"], horizontal=True)
+    if source == "Scrape store":
+        store_cleaner_section()
+        return
     
     # File upload
     uploaded_file = st.file_uploader(
         "Choose a JSON file",
-        type=['json'],
-        help="Upload a JSON file generated by the Reddit scraper"
+        type=['json', 'jsonl', 'zip'],
+        help="Upload a JSON or JSONL file generated by the Reddit scraper, or a Parquet download (.zip) from this app"
     )
     
     if uploaded_file is not None:
         try:
-            # Read and parse JSON
-            json_data = json.load(uploaded_file)
-            
-            # Validate data structure
-            if not isinstance(json_data, list):
-                st.error("Invalid JSON format. Expected a list of posts.")
-                return
+            parquet = uploaded_file.name.endswith(".zip")
+            if parquet:
+                # Counts come from the Parquet footers; only the score column is read
+                summary = dataset_summary(uploaded_file)
+                post_count = summary["posts"]
+                total_comments = summary["comments"]
+                total_score = summary["avg_score"] * post_count
+                preview_posts = list(islice(iter_dataset_posts(uploaded_file), 2))
+            else:
+                # Stream through the posts once for the summary, keeping only a short preview
+                post_count = 0
+                total_comments = 0
+                total_score = 0
+                preview_posts = []
+                for post in iter_uploaded_posts(uploaded_file):
+                    # Validate data structure
+                    if not isinstance(post, dict):
+                        st.error("Invalid JSON format. Expected a list of posts.")
+                        return
+                    post_count += 1
+                    total_comments += len(post.get('comments', []))
+                    total_score += post.get('score', 0)
+                    if len(preview_posts) < 2:
+                        preview_posts.append(post)
             
-            if not json_data:
+            if not post_count:
                 st.warning("The uploaded JSON file is empty.")
                 return
             
             # Display file info
-            st.success(f"✅ Successfully loaded JSON file with {len(json_data)} posts!")
+            st.success(f"✅ Successfully loaded {'Parquet' if parquet else 'JSON'} file with {post_count} posts!")
             
             # Show data summary
             st.subheader("📊 Data Summary")
             
-            total_comments = sum(len(post.get('comments', [])) for post in json_data)
-            avg_score = sum(post.get('score', 0) for post in json_data) / len(json_data) if json_data else 0
+            avg_score = total_score / post_count
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Total Posts", len(json_data))
+                st.metric("Total Posts", post_count)
             with col2:
                 st.metric("Total Comments", total_comments)
             with col3:
@@ -395,14 +860,20 @@ def data_cleaner_page():
             # Preview option
             if st.checkbox("Show data preview"):
                 st.subheader("Data Preview")
-                for i, post in enumerate(json_data[:2]):  # Show first 2 posts
+                for i, post in enumerate(preview_posts):  # Show first 2 posts
                     with st.expander(f"Post {i+1}: {post.get('title', 'No Title')[:50]}..."):
                         st.json(post)
             
+            threaded = st.checkbox(
+                "Threaded comments",
+                help="Indent each reply under the comment it answers, with reply counts, instead of listing comments in scrape order"
+            )
+            
             # Clean data button
             if st.button("🧹 Clean Data", type="primary"):
                 with st.spinner("Cleaning data..."):
-                    cleaned_text = format_reddit_data(json_data)
+                    posts = iter_dataset_posts(uploaded_file) if parquet else iter_uploaded_posts(uploaded_file)
+                    cleaned_file = download_files(posts, ["text"], threaded)["text"]
                 
                 st.success("✅ Data cleaned successfully!")
                 
@@ -410,7 +881,7 @@ def data_cleaner_page():
                 st.subheader("📄 Cleaned Text Preview")
                 st.text_area(
                     "Preview (first 1000 characters)",
-                    value=cleaned_text[:1000] + ("..." if len(cleaned_text) > 1000 else ""),
+                    value=preview_text(cleaned_file),
                     height=300,
                     disabled=True
                 )
@@ -418,8 +889,8 @@ def data_cleaner_page():
                 # Download cleaned text
                 st.download_button(
                     label="📥 Download Cleaned Text",
-                    data=cleaned_text,
-                    file_name=f"{uploaded_file.name.replace('.json', '_cleaned.txt')}",
+                    data=cleaned_file,
+                    file_name=f"{os.path.splitext(uploaded_file.name)[0]}_cleaned.txt",
                     mime="text/plain"
                 )
                 
@@ -428,5 +899,185 @@ def data_cleaner_page():
         except Exception as e:
             st.error(f"An error occurred while processing the file: {str(e)}")
 
+def analytics_frames():
+    """
+    Source pickers for the Analytics page. Returns the loaded frames and load time,
+    or None until a source is picked.
+    """
+    cache = get_result_cache()
+    cache_key = st.session_state.get("scrape_key")
+    entry = cache.peek(cache_key) if cache_key else None
+    sources = (["Latest scrape"] if entry is not None and entry.data else []) + ["Upload a file", "Scrape store"]
+    source = st.radio("Source", options=sources, horizontal=True)
+    
+    if source == "Latest scrape":
+        st.caption(f"r/{cache_key[0]}, {len(entry.data)} posts scraped {entry.age / 60:.0f} min ago")
+        return load_scrape_frames(("scrape", cache_key, entry.created_at), lambda: ScrapeFrames.from_posts(entry.data))
+    
+    if source == "Scrape store":
+        picked = pick_store_dataset()
+        if picked is None:
+            return None
+        store_path, info = picked
+        ref = store_ref(store_path, info["name"])
+        # An unfinished run can still grow, so its key changes with every batch it saves
+        key = ("store", os.path.abspath(store_path), info["name"], info["finished_at"] or info["posts"])
+        return load_scrape_frames(key, lambda: ScrapeFrames.from_posts(iter_store_dataset(ref)))
+    
+    uploaded_file = st.file_uploader(
+        "Choose a scrape file",
+        type=['json', 'jsonl', 'zip'],
+        help="JSON or JSONL from the Reddit scraper, or a Parquet download (.zip) from this app"
+    )
+    if uploaded_file is None:
+        return None
+    parquet = uploaded_file.name.endswith(".zip")
+    return load_scrape_frames(
+        ("upload", uploaded_file.file_id),
+        lambda: ScrapeFrames.from_parquet(uploaded_file) if parquet else ScrapeFrames.from_posts(iter_uploaded_posts(uploaded_file))
+    )
+
+def analytics_page():
+    st.header("📈 Analytics")
+    st.markdown("Score distributions, posting activity, top authors and how comments spread over posts, for a scrape or a saved file.")
+    
+    try:
+        with st.spinner("Loading posts and comments..."):
+            loaded = analytics_frames()
+    except json.JSONDecodeError:
+        st.error("Invalid JSON file. Please check the file format.")
+        return
+    except Exception as e:
+        st.error(f"An error occurred while loading the data: {str(e)}")
+        return
+    if loaded is None:
+        return
+    frames, load_seconds = loaded
+    
+    summary = frames.summary()
+    if not summary["posts"]:
+        st.warning("No posts to analyze.")
+        return
+    st.caption(f"Loaded in {load_seconds:.2f}s · {frames.memory_bytes() / 1024 / 1024:.1f} MB in memory")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Posts", summary["posts"], help=f"Average score {summary['avg_post_score']:.1f}")
+    with col2:
+        st.metric("Comments", summary["comments"], help=f"Average score {summary['avg_comment_score']:.1f}")
+    with col3:
+        st.metric("Authors", summary["authors"], help="Posting or commenting, not counting [deleted] and AutoModerator")
+    with col4:
+        st.metric("Comments per Post", f"{summary['comments_per_post']:.1f}",
+                  help=f"The scrape holds {summary['coverage']:.0%} of the comments Reddit reports"
+                       + (f"; {summary['truncated']} posts hit a comment limit" if summary["truncated"] else ""))
+    
+    # Score distribution
+    st.subheader("📊 Score Distribution")
+    kind = st.radio("Scores of", options=["posts", "comments"], horizontal=True)
+    distribution, percentiles = frames.score_distribution(kind)
+    if percentiles:
+        st.bar_chart(distribution, y="count", x_label="score", y_label=kind, sort=False)
+        st.caption(f"Median {percentiles['p50']:.0f} · 90th percentile {percentiles['p90']:.0f} · "
+                   f"99th percentile {percentiles['p99']:.0f} · highest {percentiles['max']}")
+    else:
+        st.info(f"No {kind} in this scrape.")
+    
+    # Posting activity
+    st.subheader("🕒 Posting Activity")
+    utc_offset = st.number_input("Hours from UTC", min_value=-12.0, max_value=14.0, value=0.0, step=0.5,
+                                 help="Show times in your timezone, e.g. -5 for New York in winter")
+    by_hour, by_weekday = frames.activity(utc_offset)
+    st.bar_chart(by_hour, y="posts", x_label="hour", y_label="posts", sort=False)
+    st.caption("Comments received by the posts made in each hour")
+    st.bar_chart(by_hour, y="comments", x_label="hour", y_label="comments", sort=False)
+    with st.expander("Posts by weekday and hour"):
+        st.dataframe(by_weekday)
+    
+    # Top authors
+    st.subheader("👤 Top Authors")
+    col1, col2 = st.columns(2)
+    with col1:
+        rank_by = st.selectbox(
+            "Rank by",
+            options=["total_score", "posts", "comments", "post_score", "comment_score"],
+            format_func=lambda column: column.replace("_", " ").capitalize()
+        )
+    with col2:
+        top_n = st.slider("Authors", min_value=5, max_value=100, value=20)
+    st.dataframe(frames.top_authors(top_n, rank_by))
+    
+    # Comments per post
+    st.subheader("💬 Comments per Post")
+    per_post, discussed = frames.comment_ratios()
+    st.bar_chart(per_post, y="posts", x_label="comments scraped", y_label="posts", sort=False)
+    st.caption("Most discussed posts: comments scraped per point of score")
+    st.dataframe(discussed, hide_index=True)
+
+def search_page():
+    st.header("🔎 Search Scraped Data")
+    st.markdown("Full-text search over the titles, post text and comments of scrapes you've already downloaded.")
+    
+    index_path = st.text_input(
+        "Index File",
+        value=DEFAULT_INDEX_PATH,
+        help="SQLite index built here or with `python search-index.py add <files>`"
+    )
+    
+    # Indexing new scrape files
+    with st.expander("📚 Add scrape files to the index"):
+        patterns = st.text_area(
+            "Files, folders or glob patterns (one per line)",
+            placeholder="e.g. scrapes/\npython_new_output.jsonl",
+            help="JSON, JSONL or Parquet scraper output. Files already indexed are skipped unless they changed."
+        )
+        if st.button("Index Files", disabled=not patterns.strip()):
+            with st.spinner("Indexing..."):
+                start_time = time.time()
+                with SearchIndex(index_path) as index:
+                    results = list(index.add_files([p.strip() for p in patterns.splitlines() if p.strip()]))
+            if not results:
+                st.warning("No JSON, JSONL or Parquet files matched.")
+            else:
+                indexed = sum(result[1] for _, result in results if result)
+                unchanged = sum(1 for _, result in results if result is None)
+                st.success(f"✅ Indexed {indexed} posts from {len(results) - unchanged} files in "
+                           f"{time.time() - start_time:.1f}s ({unchanged} unchanged files skipped)")
+    
+    if not os.path.exists(index_path):
+        st.info("No index yet. Add some scrape files above to build one.")
+        return
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        query = st.text_input("Search", placeholder="e.g. async python, tokeni*")
+    with col2:
+        limit = st.number_input("Results", min_value=1, max_value=200, value=20)
+    raw = st.checkbox("Advanced query syntax", help='FTS5 syntax: OR, NOT, NEAR(a b), "exact phrases", title:word')
+    
+    if not query:
+        return
+    
+    try:
+        with SearchIndex(index_path) as index:
+            start_time = time.perf_counter()
+            hits = index.search(query, limit=limit, raw=raw)
+            elapsed = time.perf_counter() - start_time
+            stats = index.stats()
+    except sqlite3.OperationalError as e:
+        st.error(f"Invalid search query: {e}")
+        return
+    
+    st.caption(f"{len(hits)} results in {elapsed * 1000:.1f} ms · "
+               f"{stats['posts']} posts and {stats['comments']} comments indexed")
+    
+    for hit in hits:
+        where = "💬 Comment" if hit["kind"] == "comment" else "📝 Post"
+        st.markdown(f"**{hit['title']}**  \n"
+                    f"{where} by {hit['author'] or 'N/A'} · Score: {hit['score']}")
+        st.markdown(f"> {hit['snippet']}")
+        if hit["url"]:
+            st.caption(hit["url"])
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+The Analytics page on a large scrape: loading posts and comments into the
+columnar frames once, then each aggregate the page shows, against the same
+numbers computed with Python loops over the post dicts.
+
+Loading is paid once per file (the app caches the frames); the aggregates run on
+every widget change, so they are what keeps the page interactive:
+
+    python benchmarks/bench_analytics.py --comments 1000000
+"""
+import argparse
+import collections
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reddit_scraper.analytics import ScrapeFrames  # noqa: E402
+from reddit_scraper.cleaner_core import read_input  # noqa: E402
+from reddit_scraper.columnar import PARQUET_AVAILABLE, write_dataset  # noqa: E402
+from synthetic import make_posts  # noqa: E402
+
+
+def python_aggregates(posts):
+    """
+    The page's numbers the plain way, one post and comment at a time
+    """
+    total_comments = sum(len(post["comments"]) for post in posts)
+    avg_score = sum(post["score"] for post in posts) / len(posts)
+    hours = collections.Counter(time.gmtime(post["created_utc"]).tm_hour for post in posts)
+    authors = collections.Counter(post["author"] for post in posts)
+    for post in posts:
+        authors.update(comment["author"] for comment in post["comments"])
+    comment_scores = sorted(comment["score"] for post in posts for comment in post["comments"])
+    return total_comments, avg_score, hours, authors.most_common(20), comment_scores[len(comment_scores) // 2]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Analytics page aggregates.")
+    parser.add_argument("--comments", type=int, default=1_000_000, help="comments in the scrape")
+    parser.add_argument("--comments-per-post", type=int, default=200)
+    args = parser.parse_args()
+    post_count = max(1, args.comments // args.comments_per_post)
+
+    workdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(workdir, "bench_output.jsonl")
+        print(f"Writing {post_count} posts with {args.comments_per_post} comments each...")
+        with open(path, "w", encoding="utf-8") as f:
+            for post in make_posts(random.Random(42), post_count, args.comments_per_post):
+                f.write(json.dumps(post) + "\n")
+
+        def load_jsonl():
+            with read_input(path) as posts:
+                return ScrapeFrames.from_posts(posts)
+
+        frames, seconds = timed(load_jsonl)
+        print(f"\nLoad from JSONL ({os.path.getsize(path) / 1024 / 1024:.0f} MB): {seconds:.2f}s, "
+              f"{frames.memory_bytes() / 1024 / 1024:.1f} MB of frames")
+        if PARQUET_AVAILABLE:
+            dataset = os.path.join(workdir, "bench_output.parquet")
+            with read_input(path) as posts:
+                write_dataset(posts, dataset)
+            _, seconds = timed(ScrapeFrames.from_parquet, dataset)
+            print(f"Load from Parquet: {seconds:.2f}s")
+
+        print("\nAggregates on the loaded frames:")
+        steps = [
+            ("summary", frames.summary),
+            ("post scores", lambda: frames.score_distribution("posts")),
+            ("comment scores", lambda: frames.score_distribution("comments")),
+            ("activity", lambda: frames.activity(-5)),
+            ("top authors", lambda: frames.top_authors(20, "comments")),
+            ("comments per post", frames.comment_ratios),
+        ]
+        total = 0.0
+        for name, step in steps:
+            _, seconds = timed(step)
+            total += seconds
+            print(f"  {name:<18} {seconds * 1000:>8.1f} ms")
+        print(f"  {'all':<18} {total * 1000:>8.1f} ms")
+
+        with read_input(path) as posts:
+            posts = list(posts)
+        _, seconds = timed(python_aggregates, posts)
+        print(f"\nPython loops over the post dicts (counts, hours, authors, median): {seconds * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
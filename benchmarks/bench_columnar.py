@@ -0,0 +1,106 @@
+"""
+Compare the Parquet dataset format with the scraper's JSON outputs: size on disk,
+write time, full load time, and the time to get the app's summary metrics
+(post count, total comments, average score).
+
+    python benchmarks/bench_columnar.py --posts 20000 --comments 50
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reddit_scraper.cleaner_core import input_size, iter_posts  # noqa: E402
+from reddit_scraper.columnar import (dataset_summary, iter_dataset_posts, read_comment_table,  # noqa: E402
+                                     read_post_table)
+from reddit_scraper.writers import open_writer  # noqa: E402
+
+from synthetic import make_posts  # noqa: E402
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def write(path, output_format, posts):
+    with open_writer(path, output_format) as writer:
+        for post in posts:
+            writer.write(post)
+
+
+def load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_jsonl(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return list(iter_posts(f))
+
+
+def metrics_from_posts(posts):
+    posts = list(posts)
+    return (len(posts), sum(len(p["comments"]) for p in posts),
+            sum(p["score"] for p in posts) / len(posts))
+
+
+def metrics_from_parquet(path):
+    summary = dataset_summary(path)
+    return summary["posts"], summary["comments"], summary["avg_score"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--comments", type=int, default=50, help="comments per post")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_columnar_")
+    paths = {fmt: os.path.join(workdir, f"sample.{fmt}") for fmt in ("json", "jsonl", "parquet")}
+    try:
+        print(f"Sample: {args.posts} posts x {args.comments} comments "
+              f"({args.posts * args.comments} comments)\n")
+        print(f"{'format':>8} | {'size':>9} | {'write':>8} | {'full load':>9} | {'metrics':>8}")
+        print("-" * 56)
+
+        results = {}
+        for fmt, path in paths.items():
+            _, t_write = timed(write, path, fmt, make_posts(random.Random(42), args.posts, args.comments))
+            if fmt == "json":
+                metrics, t_metrics = timed(lambda: metrics_from_posts(load_json(path)))
+                _, t_load = timed(load_json, path)
+            elif fmt == "jsonl":
+                metrics, t_metrics = timed(lambda: metrics_from_posts(load_jsonl(path)))
+                _, t_load = timed(load_jsonl, path)
+            else:
+                metrics, t_metrics = timed(metrics_from_parquet, path)
+                _, t_load = timed(lambda: list(iter_dataset_posts(path)))
+            results[fmt] = metrics
+            size = input_size(path)
+            print(f"{fmt:>8} | {size / 1024 / 1024:>7.1f}MB | {t_write:>7.2f}s | {t_load:>8.2f}s | {t_metrics:>7.3f}s")
+
+        assert results["json"][:2] == results["parquet"][:2], results
+        assert abs(results["json"][2] - results["parquet"][2]) < 1e-6, results
+
+        print("\nColumn reads (Parquet only):")
+        for label, func in (("post scores", lambda: read_post_table(paths["parquet"], columns=["score"])),
+                            ("comment id/parent_id", lambda: read_comment_table(paths["parquet"],
+                                                                                columns=["id", "parent_id"])),
+                            ("both tables, all columns", lambda: (read_post_table(paths["parquet"]),
+                                                                  read_comment_table(paths["parquet"])))):
+            _, seconds = timed(func)
+            print(f"  {label:<26} {seconds:.3f}s")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
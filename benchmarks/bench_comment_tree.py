@@ -0,0 +1,127 @@
+"""
+Rebuilding reply threads from the flat comment list: CommentTree against the
+obvious approach of scanning every comment for the children of each one, with
+recursion for the nesting.
+
+Runs on synthetic threads of three shapes:
+
+    deep     one reply chain, every comment answering the previous one
+    wide     every comment answering the first
+    random   each comment answers a random earlier one, or the post
+
+at two sizes, to show the cost per comment stays flat as threads grow, and times
+the threaded cleaned-text output on the larger one. The naive rebuild only runs
+on a small thread, since it is quadratic (and recursion fails on deep chains):
+
+    python benchmarks/bench_comment_tree.py --comments 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reddit_scraper.cleaner_core import format_threaded_comments  # noqa: E402
+from reddit_scraper.comment_tree import CommentTree  # noqa: E402
+from reddit_scraper.records import CommentRecords  # noqa: E402
+
+SHAPES = ("deep", "wide", "random")
+
+
+def make_thread(shape, n, seed=7):
+    rng = random.Random(seed)
+    comments = CommentRecords()
+    for i in range(n):
+        if i == 0:
+            parent_id = "t3_post"
+        elif shape == "deep":
+            parent_id = f"t1_c{i - 1}"
+        elif shape == "wide":
+            parent_id = "t1_c0"
+        else:
+            parent_id = "t3_post" if rng.random() < 0.1 else f"t1_c{rng.randrange(i)}"
+        comments.append({"id": f"c{i}", "parent_id": parent_id, "body": "lorem ipsum dolor sit amet",
+                         "author": f"user_{i % 500}", "score": rng.randint(-5, 500)})
+    return comments
+
+
+def naive_threads(comments):
+    """
+    Depth-first (position, depth) pairs found by scanning all comments for each one's children
+    """
+    comments = comments.to_list()
+    order = []
+
+    def walk(parent_fullname, depth):
+        for i, comment in enumerate(comments):
+            if comment["parent_id"] == parent_fullname:
+                order.append((i, depth))
+                walk("t1_" + comment["id"], depth + 1)
+
+    walk("t3_post", 0)
+    return order
+
+
+def traced_peak(comments):
+    """
+    Peak bytes allocated while building the tree
+    """
+    tracemalloc.start()
+    CommentTree(comments)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark comment tree reconstruction.")
+    parser.add_argument("--comments", type=int, default=100_000, help="comments in the large threads")
+    parser.add_argument("--naive-comments", type=int, default=2000, help="comments in the naive comparison")
+    args = parser.parse_args()
+    small = max(1, args.comments // 10)
+
+    print("CommentTree build (timed without tracing; memory traced in a second run):")
+    print(f"  {'shape':<7} | {'comments':>8} | {'build':>8} | {'us/comment':>10} | {'peak mem':>9} | "
+          f"{'B/comment':>9} | {'levels':>7}")
+    for shape in SHAPES:
+        for n in (small, args.comments):
+            comments = make_thread(shape, n)
+            start = time.perf_counter()
+            tree = CommentTree(comments)
+            elapsed = time.perf_counter() - start
+            peak = traced_peak(comments)
+            print(f"  {shape:<7} | {n:>8} | {elapsed:>7.3f}s | {elapsed / n * 1e6:>10.2f} | "
+                  f"{peak / 1024 / 1024:>6.1f} MB | {peak / n:>9.0f} | {tree.stats()['levels']:>7}")
+
+    print(f"\nThreaded cleaned text, {args.comments} comments:")
+    for shape in SHAPES:
+        comments = make_thread(shape, args.comments)
+        start = time.perf_counter()
+        text = format_threaded_comments(comments)
+        elapsed = time.perf_counter() - start
+        print(f"  {shape:<7} {elapsed:>7.3f}s  {len(text) / 1024 / 1024:>6.1f} MB of text")
+
+    n = args.naive_comments
+    print(f"\nNaive rebuild against CommentTree, {n} comments:")
+    print(f"  {'shape':<7} | {'naive':>10} | {'tree':>8} | {'speedup':>8}")
+    for shape in SHAPES:
+        comments = make_thread(shape, n)
+        start = time.perf_counter()
+        tree = CommentTree(comments)
+        tree_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        try:
+            order = naive_threads(comments)
+        except RecursionError:
+            print(f"  {shape:<7} | {'RecursionError':>10} | {tree_seconds:>7.4f}s |")
+            continue
+        naive_seconds = time.perf_counter() - start
+        assert order == list(tree.threads()), shape
+        print(f"  {shape:<7} | {naive_seconds:>9.3f}s | {tree_seconds:>7.4f}s | {naive_seconds / tree_seconds:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
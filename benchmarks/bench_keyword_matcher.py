@@ -0,0 +1,67 @@
+"""
+Compare the compiled KeywordMatcher with the original per-keyword substring filter.
+
+Runs over a synthetic corpus of 1000 posts (benchmarks/synthetic.py) for 10, 100
+and 1000 keywords:
+
+    python benchmarks/bench_keyword_matcher.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reddit_scraper.keyword_matcher import KeywordMatcher  # noqa: E402
+
+from synthetic import make_posts, random_word  # noqa: E402
+
+POSTS = 1000
+COMMENTS_PER_POST = 20
+
+
+def original_filter(corpus, keywords):
+    kept = 0
+    for post in corpus:
+        text_to_search = (post["title"] + " " + post["selftext"] + " " +
+                          " ".join([c["body"] for c in post["comments"]]))
+        if any(kw.lower() in text_to_search.lower() for kw in keywords):
+            kept += 1
+    return kept
+
+
+def matcher_filter(corpus, keywords):
+    matcher = KeywordMatcher(keywords)
+    kept = 0
+    for post in corpus:
+        if matcher.matches(post["title"], post["selftext"], *(c["body"] for c in post["comments"])):
+            kept += 1
+    return kept
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    rng = random.Random(42)
+    corpus = list(make_posts(rng, POSTS, COMMENTS_PER_POST))
+    vocabulary = sorted({word for post in corpus for comment in post["comments"] for word in comment["body"].split()})
+
+    print(f"Corpus: {POSTS} posts x {COMMENTS_PER_POST} comments\n")
+    print(f"{'keywords':>8} | {'original':>10} | {'matcher':>10} | {'speedup':>7} | kept")
+    print("-" * 56)
+    for count in (10, 100, 1000):
+        # Mostly misses (the expensive case for any()), plus a few real words
+        keywords = [random_word(rng) + "zq" for _ in range(count - 2)] + rng.sample(vocabulary, 2)
+        kept_a, t_a = timed(original_filter, corpus, keywords)
+        kept_b, t_b = timed(matcher_filter, corpus, keywords)
+        assert kept_a == kept_b, (kept_a, kept_b)
+        print(f"{count:>8} | {t_a:>9.3f}s | {t_b:>9.3f}s | {t_a / t_b:>6.1f}x | {kept_a}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Memory used by a post's comments: the old dict-per-comment flattening, which kept
+the praw comment tree alive until the post was done, against CommentRecords with
+the tree released as soon as it is flattened.
+
+Fetches one large thread from the fake Reddit API (benchmarks/fake_reddit_server.py)
+in a fresh process per variant, and reports the traced peak while fetching, the
+memory still held once the fetch returns (what every post in the concurrent
+fetch window costs) and the process peak RSS.
+
+    python benchmarks/bench_records.py --comments 50000
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from praw.models import MoreComments  # noqa: E402
+
+from reddit_scraper.rate_limit import AdaptiveScheduler  # noqa: E402
+from reddit_scraper.records import CommentRecords  # noqa: E402
+from reddit_scraper.scraper_core import create_reddit, fetch_comments  # noqa: E402
+
+from bench_suite import peak_rss_mb, run_isolated  # noqa: E402
+from fake_reddit_server import SHAPES, ServerProcess  # noqa: E402
+from synthetic import random_word  # noqa: E402
+
+
+def legacy_fetch(submission):
+    """
+    The flattening this repo used before CommentRecords: a dict per comment, with the
+    praw tree left attached to the submission
+    """
+    submission.comments.replace_more(limit=None)
+    comments = []
+    for comment in submission.comments.list():
+        if isinstance(comment, MoreComments):
+            continue
+        comments.append({
+            "id": comment.id,
+            "parent_id": comment.parent_id,
+            "body": comment.body,
+            "author": str(comment.author) if comment.author else None,
+            "score": comment.score,
+        })
+    return comments
+
+
+def fetch_scenario(config):
+    reddit = create_reddit("bench", "bench", "bench-records", rate_limiter=AdaptiveScheduler(),
+                           oauth_url=config["url"], reddit_url=config["url"])
+    # Authenticate and warm up praw outside the measurement
+    next(iter(reddit.subreddit("fake").new(limit=1)))
+    submission = reddit.submission(id=config["post_id"])
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    if config["variant"] == "records":
+        comments, _ = fetch_comments(submission)
+    else:
+        comments = legacy_fetch(submission)
+    elapsed = time.perf_counter() - start
+    # submission is still referenced here, as it is while the post waits in the fetch window
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "comments": len(comments),
+        "seconds": elapsed,
+        "peak_mb": peak / 1024 / 1024,
+        "held_mb": held / 1024 / 1024,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def container_scenario(config):
+    """
+    The containers alone, filled from the same strings
+    """
+    rng = random.Random(7)
+    n = config["comments"]
+    source = [(f"c{i:06d}", f"t1_c{i // 3:06d}", " ".join(random_word(rng) for _ in range(12)),
+               f"user_{i % 500}", rng.randint(-5, 5000)) for i in range(n)]
+    gc.collect()
+    tracemalloc.start()
+    if config["variant"] == "records":
+        comments = CommentRecords()
+        for id_, parent_id, body, author, score in source:
+            comments.id.append(id_)
+            comments.parent_id.append(parent_id)
+            comments.body.append(body)
+            comments.author.append(author)
+            comments.score.append(score)
+    else:
+        comments = [{"id": id_, "parent_id": parent_id, "body": body, "author": author, "score": score}
+                    for id_, parent_id, body, author, score in source]
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"comments": len(comments), "bytes_per_comment": held / n}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory of comment dicts and CommentRecords.")
+    parser.add_argument("--comments", type=int, default=50_000, help="comments in the benchmark thread")
+    parser.add_argument("--shape", choices=SHAPES, default="wide",
+                        help="comment tree shape (default: wide; deep and megathread trees take many more requests)")
+    args = parser.parse_args()
+
+    print(f"Container overhead for {args.comments} comments (strings shared, not counted):")
+    for variant in ("dicts", "records"):
+        result = run_isolated(container_scenario, {"name": f"container/{variant}", "variant": variant,
+                                                   "comments": args.comments})
+        print(f"  {variant:<8} {result['bytes_per_comment']:>6.1f} bytes per comment")
+
+    print(f"\nOne {args.shape} thread with {args.comments} comments from the fake API:")
+    print(f"  {'variant':<8} | {'fetch':>7} | {'traced peak':>11} | {'held after':>10} | {'peak RSS':>9}")
+    with ServerProcess(posts=1, comments=args.comments, shape=args.shape, latency=0,
+                       budget=10_000_000, window=600) as server:
+        for variant in ("dicts", "records"):
+            config = {"name": f"fetch/{variant}", "variant": variant, "url": server.url, "post_id": "p00000"}
+            result = run_isolated(fetch_scenario, config)
+            print(f"  {variant:<8} | {result['seconds']:>6.1f}s | {result['peak_mb']:>8.1f} MB | "
+                  f"{result['held_mb']:>7.1f} MB | {result['peak_rss_mb']:>6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Write throughput of each output sink: posts/s, comments/s and MB/s written, with
+the scraper's default batch size, for posts already in memory (so the numbers are
+the sink's cost, not the scrape's). Then every sink at once through a
+FanOutWriter against one run per sink, and the SQLite sink's batched executemany
+against inserting one row at a time.
+
+    python benchmarks/bench_sinks.py --posts 5000 --comments 50
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reddit_scraper.columnar import COMMENT_COLUMNS, PARQUET_AVAILABLE, POST_COLUMNS  # noqa: E402
+from reddit_scraper.dedup_store import split_store_ref, store_ref  # noqa: E402
+from reddit_scraper.writers import SqliteWriter, open_writer, open_writers  # noqa: E402
+
+from synthetic import make_posts  # noqa: E402
+
+
+def size_on_disk(path):
+    path = split_store_ref(path)[0] if "#" in path else path
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    # SQLite files may still have a write-ahead log next to them
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def write(writer, posts):
+    start = time.perf_counter()
+    with writer:
+        for post in posts:
+            writer.write(post)
+    return time.perf_counter() - start
+
+
+class RowSqliteWriter(SqliteWriter):
+    """
+    SqliteWriter inserting each post and comment with its own execute, still one transaction per batch
+    """
+
+    def flush(self):
+        if self._posts:
+            with self._conn:
+                for row in self._posts:
+                    self._conn.execute("DELETE FROM comments WHERE post_id = ?", (row[0],))
+                    self._conn.execute(self._insert_post, row)
+                for row in self._comments:
+                    self._conn.execute(self._insert_comment, row)
+            self._posts = []
+            self._comments = []
+        if self.on_flush:
+            self.on_flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the output sinks.")
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--comments", type=int, default=50, help="comments per post")
+    parser.add_argument("--batch-size", type=int, default=20, help="posts per flush (default: 20, the scraper's)")
+    args = parser.parse_args()
+
+    posts = list(make_posts(random.Random(42), args.posts, args.comments))
+    comments = args.posts * args.comments
+    formats = ["json", "jsonl", "text", "sqlite"] + (["parquet"] if PARQUET_AVAILABLE else []) + ["store"]
+
+    workdir = tempfile.mkdtemp(prefix="bench_sinks_")
+    try:
+        def output(name, output_format):
+            if output_format == "store":
+                return store_ref(os.path.join(workdir, f"{name}_store.db"), name)
+            return os.path.join(workdir, f"{name}.{output_format}")
+
+        print(f"Sample: {args.posts} posts x {args.comments} comments ({comments} comments), "
+              f"batches of {args.batch_size}\n")
+        print(f"{'sink':>8} | {'seconds':>8} | {'posts/s':>9} | {'comments/s':>10} | {'size':>8} | {'MB/s':>6}")
+        print("-" * 65)
+        separate = 0.0
+        for output_format in formats:
+            path = output("single", output_format)
+            seconds = write(open_writer(path, output_format, batch_size=args.batch_size), posts)
+            separate += seconds
+            size = size_on_disk(path) / 1024 / 1024
+            print(f"{output_format:>8} | {seconds:>8.2f} | {args.posts / seconds:>9.0f} | {comments / seconds:>10.0f} | "
+                  f"{size:>6.1f}MB | {size / seconds:>6.1f}")
+
+        outputs = [(output("fanout", output_format), output_format) for output_format in formats]
+        seconds = write(open_writers(outputs, batch_size=args.batch_size), posts)
+        print(f"\nAll {len(formats)} sinks in one pass (FanOutWriter): {seconds:.2f}s, "
+              f"against {separate:.2f}s for one pass per sink")
+
+        path = os.path.join(workdir, "rows.sqlite")
+        rows = write(RowSqliteWriter(path, batch_size=args.batch_size), posts)
+        batched = write(SqliteWriter(os.path.join(workdir, "batched.sqlite"), batch_size=args.batch_size), posts)
+        with sqlite3.connect(path) as conn:
+            stored = conn.execute("SELECT COUNT(*) FROM comments").fetchone()[0]
+        print(f"\nSQLite, {len(POST_COLUMNS)} post and {len(COMMENT_COLUMNS)} comment columns, {stored} comment rows:")
+        print(f"  one execute per row   {rows:>6.2f}s")
+        print(f"  executemany per batch {batched:>6.2f}s ({rows / batched:.1f}x)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
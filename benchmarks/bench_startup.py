@@ -0,0 +1,78 @@
+"""
+Cold-start time of each reddit-scraper subcommand: a fresh interpreter running
+`python -m reddit_scraper <command> --help`, against `python -c pass`, with the
+heavy third-party packages each one ended up importing (from -X importtime).
+
+Subcommands only import praw, tqdm, python-dotenv, requests and pyarrow once
+they need them, so --help, argument errors and the JSON-only tools start
+without paying for them. The last rows show what the scrape subcommand loads
+once a scrape actually starts, and what the old scripts loaded at startup.
+
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from reddit_scraper.cli import COMMANDS  # noqa: E402
+
+HEAVY = ("praw", "prawcore", "requests", "tqdm", "dotenv", "pyarrow", "pandas", "numpy")
+
+
+def command_lines():
+    yield "python -c pass", ["-c", "pass"]
+    yield "reddit-scraper --help", ["-m", "reddit_scraper", "--help"]
+    for name in COMMANDS:
+        yield f"reddit-scraper {name} --help", ["-m", "reddit_scraper", name, "--help"]
+    yield "scrape, once a scrape starts", ["-c", "import reddit_scraper.scrape, reddit_scraper.batch, reddit_scraper.scraper_core, tqdm, dotenv"]
+    yield "every dependency at startup", ["-c", "import praw, tqdm, dotenv, requests, pyarrow.parquet, pyarrow.compute"]
+
+
+def run(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *args], cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def heavy_imports(args):
+    """
+    Top-level heavy packages imported, with their cumulative import time in ms
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, stdout=subprocess.DEVNULL,
+                            stderr=subprocess.PIPE, text=True, check=True)
+    loaded = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[0].startswith("import time:"):
+            continue
+        name = parts[2].strip()
+        if name in HEAVY and name not in loaded:
+            try:
+                loaded[name] = int(parts[1]) / 1000
+            except ValueError:
+                continue
+    return loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark reddit-scraper cold-start time per subcommand.")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per command (the median is shown)")
+    args = parser.parse_args()
+
+    print(f"  {'command':<34} | {'median':>8} | {'min':>8} | heavy imports (ms)")
+    for label, command in command_lines():
+        times = [run(command) for _ in range(args.runs)]
+        loaded = heavy_imports(command)
+        heavy = ", ".join(f"{name} {ms:.0f}" for name, ms in loaded.items()) or "-"
+        print(f"  {label:<34} | {statistics.median(times) * 1000:>6.0f}ms | {min(times) * 1000:>6.0f}ms | {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Benchmark suite for the scraping and cleaning paths, with results saved as JSON so
+runs can be compared.
+
+Scraping runs scraper_core.iter_posts (the engine behind both scrape_subreddit
+functions) against the local fake Reddit API in fake_reddit_server.py, running in
+its own process, over flat, deep, wide and megathread comment trees, serially and
+with concurrent workers.
+Cleaning runs the cleaner's format_reddit_data (reddit-scraper clean) on synthetic corpora of 1K, 100K
+and 1M comments. Every scenario runs in a fresh process so its peak RSS is its own.
+
+    python benchmarks/bench_suite.py                      # everything
+    python benchmarks/bench_suite.py --only scrape --latency 0.05
+    python benchmarks/bench_suite.py --fixture python_new_output.jsonl
+    python benchmarks/bench_suite.py --compare bench_results_20250101-120000.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:
+    # Windows has no resource module; peak RSS is then left out of the results
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from reddit_scraper.rate_limit import AdaptiveScheduler  # noqa: E402
+from reddit_scraper.clean import format_reddit_data  # noqa: E402
+from reddit_scraper.scraper_core import ScrapeSession, expand_comments, fetch_comments, iter_posts  # noqa: E402
+from reddit_scraper.writers import open_writer  # noqa: E402
+
+from fake_reddit_server import SHAPES, ServerProcess  # noqa: E402
+from synthetic import make_comment_corpus  # noqa: E402
+
+CLEAN_SIZES = (1_000, 100_000, 1_000_000)
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+class TimedSession(ScrapeSession):
+    """
+    ScrapeSession that records how long each post's comment fetch took
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latencies = []
+
+    def _timed(self, fetch):
+        def timed_fetch(*args):
+            start = time.perf_counter()
+            try:
+                return fetch(*args)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+        return timed_fetch
+
+    def expand(self, submissions, matcher=None, comment_keyword_scope="all", workers=None, budget=None):
+        if self.pool is None:
+            return expand_comments(submissions, self._timed(fetch_comments), 1, matcher, comment_keyword_scope,
+                                   budget=budget)
+        return expand_comments(submissions, self._timed(self.fetch), workers or self.workers, matcher,
+                               comment_keyword_scope, pool=self.pool, budget=budget)
+
+
+def scrape_scenario(config):
+    server = ServerProcess(fixture=config["fixture"], posts=config["posts"], comments=config["comments"],
+                           shape=config["shape"], latency=config["latency"], budget=config["budget"],
+                           window=config["window"]).start()
+    try:
+        posts = server.stats()["posts"]
+        session = TimedSession("bench", "bench", "bench-suite", workers=config["workers"],
+                               rate_limiter=AdaptiveScheduler(), **server.praw_config())
+        start = time.perf_counter()
+        with session:
+            comments = sum(len(post["comments"]) for _, post in iter_posts(session, "fake", limit=posts,
+                                                                            workers=config["workers"]))
+        elapsed = time.perf_counter() - start
+        calls = server.stats()["total_calls"]
+    finally:
+        server.stop()
+
+    # No latencies when no post was fetched (an empty scenario or listing)
+    p50, p95 = percentile(session.latencies, 50), percentile(session.latencies, 95)
+    return {
+        "posts": posts,
+        "comments": comments,
+        "seconds": elapsed,
+        "posts_per_sec": posts / elapsed,
+        "api_calls": calls,
+        "calls_per_post": calls / posts if posts else None,
+        "p50_post_ms": p50 * 1000 if p50 is not None else None,
+        "p95_post_ms": p95 * 1000 if p95 is not None else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def clean_scenario(config):
+    workdir = tempfile.mkdtemp(prefix="bench_clean_")
+    try:
+        input_file = os.path.join(workdir, "corpus.json")
+        output_file = os.path.join(workdir, "corpus_cleaned.txt")
+        with open_writer(input_file, "json") as writer:
+            for post in make_comment_corpus(config["comments"]):
+                writer.write(post)
+        posts = writer.count
+        size = os.path.getsize(input_file)
+
+        # Generating the corpus costs memory too; only the cleaning is measured from here
+        baseline = peak_rss_mb()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            format_reddit_data(input_file, output_file)
+        elapsed = time.perf_counter() - start
+        output_size = os.path.getsize(output_file)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "posts": posts,
+        "comments": config["comments"],
+        "input_mb": size / 1024 / 1024,
+        "output_mb": output_size / 1024 / 1024,
+        "seconds": elapsed,
+        "posts_per_sec": posts / elapsed,
+        "comments_per_sec": config["comments"] / elapsed,
+        "mb_per_sec": size / 1024 / 1024 / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "peak_rss_before_mb": baseline,
+    }
+
+
+def _run_child(conn, func, config):
+    try:
+        conn.send((True, func(config)))
+    except Exception as e:
+        conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+def run_isolated(func, config):
+    """
+    Run one scenario in a freshly spawned interpreter. Not a Pool: scrape scenarios
+    start the fake server in a process of their own, which pool workers can't do.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    process = ctx.Process(target=_run_child, args=(child, func, config))
+    process.start()
+    ok, result = parent.recv()
+    process.join()
+    if not ok:
+        raise RuntimeError(f"{config['name']} failed: {result}")
+    return result
+
+
+def scrape_scenarios(args):
+    shapes = ["fixture"] if args.fixture else args.shapes
+    for shape in shapes:
+        for workers in args.workers:
+            yield {
+                "name": f"scrape/{shape}/workers={workers}",
+                "shape": "flat" if shape == "fixture" else shape,
+                "fixture": args.fixture,
+                "posts": args.posts,
+                "comments": args.comments,
+                "workers": workers,
+                "latency": args.latency,
+                "budget": args.budget,
+                "window": 600,
+            }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current):
+    """
+    Print how each scenario's main metrics moved since a previous results file
+    """
+    before = {result["name"]: result for result in previous["results"]}
+    print(f"\nCompared with {previous.get('commit') or 'previous run'} ({previous.get('timestamp')}):")
+    for result in current["results"]:
+        old = before.get(result["name"])
+        if not old:
+            continue
+        changes = []
+        for key in ("posts_per_sec", "calls_per_post", "p95_post_ms", "peak_rss_mb"):
+            if result.get(key) is not None and old.get(key):
+                changes.append(f"{key} {(result[key] / old[key] - 1) * 100:+.1f}%")
+        print(f"  {result['name']:<36} {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the scraping and cleaning paths.")
+    parser.add_argument("--only", choices=["scrape", "clean"], help="run only one half of the suite")
+    parser.add_argument("--shapes", nargs="+", choices=SHAPES, default=list(SHAPES))
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 8], help="worker counts to scrape with")
+    parser.add_argument("--posts", type=int, default=20, help="posts per scrape scenario")
+    parser.add_argument("--comments", type=int, default=100, help="comments per post in scrape scenarios")
+    parser.add_argument("--latency", type=float, default=0.005, help="seconds the fake API adds to every call")
+    parser.add_argument("--budget", type=int, default=1_000_000,
+                        help="fake API requests per 10 minutes (Reddit allows about 1000)")
+    parser.add_argument("--fixture", help="replay a recorded scrape file instead of the synthetic shapes")
+    parser.add_argument("--clean-sizes", nargs="+", type=int, default=list(CLEAN_SIZES),
+                        help="comment counts of the cleaner corpora")
+    parser.add_argument("--output", help="results file (default: bench_results_<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+    report = {
+        "timestamp": stamp,
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "args": vars(args),
+        "results": [],
+    }
+
+    scenarios = []
+    if args.only in (None, "scrape"):
+        scenarios += [(scrape_scenario, config) for config in scrape_scenarios(args)]
+    if args.only in (None, "clean"):
+        scenarios += [(clean_scenario, {"name": f"clean/{size}", "comments": size}) for size in args.clean_sizes]
+
+    print(f"{'scenario':<36} | {'posts/s':>9} | {'calls/post':>10} | {'p50 ms':>8} | {'p95 ms':>8} | {'RSS MB':>7}")
+    print("-" * 95)
+    for func, config in scenarios:
+        result = dict(run_isolated(func, config), name=config["name"], config=config)
+        report["results"].append(result)
+        calls = f"{result['calls_per_post']:.1f}" if result.get("calls_per_post") is not None else "-"
+        p50 = f"{result['p50_post_ms']:.1f}" if result.get("p50_post_ms") is not None else "-"
+        p95 = f"{result['p95_post_ms']:.1f}" if result.get("p95_post_ms") is not None else "-"
+        rss = f"{result['peak_rss_mb']:.1f}" if result["peak_rss_mb"] is not None else "-"
+        print(f"{config['name']:<36} | {result['posts_per_sec']:>9.1f} | {calls:>10} | {p50:>8} | {p95:>8} | {rss:>7}")
+
+    output = args.output or f"bench_results_{stamp}.json"
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,464 @@
+"""
+A local stand-in for the Reddit API, good enough for praw to scrape from.
+
+It serves OAuth tokens, subreddit listings, submission comment pages,
+/api/morechildren and /api/info from a synthetic, deterministic corpus or from
+recorded scraper output, plus an archive search endpoint (/api/posts/search)
+for backfills. It also reproduces Reddit's rate-limit headers
+(X-Ratelimit-Used/Remaining/Reset), answers 429 once the window budget is
+spent, and can inject latency and 5xx errors.
+
+Point a client at it with:
+
+    server = FakeRedditServer(posts=50, shape="deep").start()
+    session = ScrapeSession("id", "secret", "bench", **server.praw_config())
+
+or run it on its own, with synthetic posts or replaying a recorded scrape:
+
+    python benchmarks/fake_reddit_server.py --port 8765 --shape megathread
+    python benchmarks/fake_reddit_server.py --fixture python_new_output.jsonl
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import re
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+SHAPES = ("flat", "deep", "wide", "megathread")
+BASE_TIME = 1700000000
+
+
+def build_tree(post_id, shape, comments, rng):
+    """
+    Return {comment_id: (parent_fullname, [child ids])} plus the top-level ids, in order
+    """
+    nodes = {}
+    top = []
+    ids = [f"{post_id}c{i}" for i in range(comments)]
+    link = f"t3_{post_id}"
+
+    for i, cid in enumerate(ids):
+        if shape == "flat" or i == 0:
+            parent = None
+        elif shape == "deep":
+            parent = ids[i - 1]
+        elif shape == "wide":
+            parent = ids[rng.randrange(max(1, i // 10 + 1))] if rng.random() < 0.7 else None
+        else:  # megathread: many roots with bushy, fairly deep replies
+            parent = ids[rng.randrange(i)] if rng.random() < 0.8 else None
+
+        nodes[cid] = (f"t1_{parent}" if parent else link, [])
+        if parent:
+            nodes[parent][1].append(cid)
+        else:
+            top.append(cid)
+    return nodes, top
+
+
+class Corpus:
+    """
+    Posts plus, per post, a comment tree: trees[post_id] = (nodes, top) where nodes maps
+    a comment id to (parent fullname, [child ids]) and top lists the root comments
+    """
+
+    def __init__(self, posts=25, comments=50, shape="flat", seed=1):
+        self.rng = random.Random(seed)
+        self.posts = []
+        self.trees = {}
+        self.depths = {}
+        self.records = {}
+        self.by_id = {}
+        for i in range(posts):
+            post_id = f"p{i:05d}"
+            self._add(self._synthetic_post(i, post_id, comments), build_tree(post_id, shape, comments, self.rng))
+
+    @classmethod
+    def from_posts(cls, posts):
+        """
+        Replay recorded scraper output (the post dicts of a .json/.jsonl/Parquet scrape)
+        """
+        corpus = cls(posts=0)
+        for post in posts:
+            nodes, top = {}, []
+            comments = post.get("comments") or []
+            for comment in comments:
+                nodes[comment["id"]] = (comment.get("parent_id") or f"t3_{post['id']}", [])
+            for comment in comments:
+                parent = nodes[comment["id"]][0]
+                if parent.startswith("t1_") and parent[3:] in nodes:
+                    nodes[parent[3:]][1].append(comment["id"])
+                else:
+                    top.append(comment["id"])
+            record = {key: value for key, value in post.items() if key != "comments"}
+            record.setdefault("name", f"t3_{post['id']}")
+            record.setdefault("permalink", f"/r/fake/comments/{post['id']}/")
+            record.setdefault("subreddit", "fake")
+            record["num_comments"] = len(comments)
+            corpus._add(record, (nodes, top), {c["id"]: c for c in comments})
+        return corpus
+
+    def _synthetic_post(self, i, post_id, comments):
+        return {
+            "id": post_id,
+            "name": f"t3_{post_id}",
+            "title": f"Synthetic post {i} about python and data",
+            "author": f"user{i % 17}",
+            "score": self.rng.randint(0, 5000),
+            "num_comments": comments,
+            "created_utc": BASE_TIME - i * 600,
+            "selftext": f"Body of post {i}. " * self.rng.randint(1, 20),
+            "url": f"https://example.invalid/{post_id}",
+            "permalink": f"/r/fake/comments/{post_id}/",
+            "subreddit": "fake",
+        }
+
+    def _add(self, post, tree, records=None):
+        self.posts.append(post)
+        self.trees[post["id"]] = tree
+        self.depths[post["id"]] = self._depths(tree)
+        self.records[post["id"]] = records or {}
+        self.by_id[post["id"]] = post
+
+    @staticmethod
+    def _depths(tree):
+        nodes, top = tree
+        depths = {}
+        stack = [(cid, 0) for cid in top]
+        while stack:
+            cid, depth = stack.pop()
+            depths[cid] = depth
+            stack.extend((child, depth + 1) for child in nodes[cid][1])
+        return depths
+
+    def comment_data(self, post_id, cid, depth):
+        parent, _ = self.trees[post_id][0][cid]
+        recorded = self.records[post_id].get(cid)
+        if recorded:
+            body, author, score = recorded.get("body", ""), recorded.get("author"), recorded.get("score", 0)
+            created = BASE_TIME
+        else:
+            n = int(cid.split("c")[-1])
+            body, author, score = f"Comment {n} on {post_id}\nwith a second line", f"commenter{n % 31}", (n * 7) % 97 - 10
+            created = BASE_TIME + n
+        return {
+            "id": cid,
+            "name": f"t1_{cid}",
+            "parent_id": parent,
+            "link_id": f"t3_{post_id}",
+            "body": body,
+            "author": author,
+            "score": score,
+            "created_utc": created,
+            "depth": depth,
+            "replies": "",
+        }
+
+
+def _more(parent, children, depth):
+    return {"kind": "more", "data": {
+        "count": len(children), "name": f"t1_{children[0]}", "id": children[0],
+        "parent_id": parent, "depth": depth, "children": children,
+    }}
+
+
+class FakeRedditHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this, delayed ACKs add ~40ms per call
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    # -- rate limit -------------------------------------------------------
+    def _rate_headers(self):
+        server = self.server
+        with server.lock:
+            now = time.monotonic()
+            if now >= server.window_start + server.window:
+                server.window_start = now
+                server.used = 0
+            server.used += 1
+            remaining = server.budget - server.used
+            reset = max(0, int(server.window_start + server.window - now))
+        return remaining, {
+            "X-Ratelimit-Used": str(server.used),
+            "X-Ratelimit-Remaining": f"{max(remaining, 0):.1f}",
+            "X-Ratelimit-Reset": str(reset),
+        }
+
+    def _send(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+        with self.server.lock:
+            self.server.bytes_sent += len(body)
+
+    def _handle(self, method):
+        server = self.server
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if method == "POST":
+            length = int(self.headers.get("Content-Length") or 0)
+            params.update({k: v[-1] for k, v in parse_qs(self.rfile.read(length).decode()).items()})
+
+        path = url.path.rstrip("/")
+        if path == "/_stats":
+            return self._send(200, server.stats())
+        if path == "/api/v1/access_token":
+            return self._send(200, {"access_token": "fake-token", "token_type": "bearer",
+                                    "expires_in": server.token_ttl, "scope": "*"})
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        if path == "/api/posts/search":
+            # An archive search API (see backfill.ArchiveSource); not part of Reddit's rate budget
+            with server.lock:
+                server.calls["archive"] = server.calls.get("archive", 0) + 1
+            return self._send(200, self._archive_search(params))
+
+        remaining, headers = self._rate_headers()
+        endpoint = path.split("/")[1] if path.count("/") else path
+        with server.lock:
+            server.calls[endpoint] = server.calls.get(endpoint, 0) + 1
+
+        if remaining < 0:
+            with server.lock:
+                server.throttled += 1
+            return self._send(429, {"message": "Too Many Requests", "error": 429},
+                              dict(headers, **{"Retry-After": headers["X-Ratelimit-Reset"]}))
+        if server.error_rate and server.rng.random() < server.error_rate:
+            with server.lock:
+                server.errors += 1
+            return self._send(503, {"message": "Service Unavailable", "error": 503}, headers)
+
+        match = re.fullmatch(r"/r/[^/]+/(new|hot|top|controversial)", path)
+        if match:
+            return self._send(200, self._listing(params), headers)
+        match = re.fullmatch(r"/comments/([^/]+)", path)
+        if match and match.group(1) in server.corpus.by_id:
+            return self._send(200, self._comments_page(match.group(1)), headers)
+        if path == "/api/morechildren":
+            return self._send(200, self._more_children(params), headers)
+        if path == "/api/info":
+            return self._send(200, self._info(params), headers)
+        return self._send(404, {"message": "Not Found", "error": 404}, headers)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    # -- endpoints --------------------------------------------------------
+    def _listing(self, params):
+        posts = self.server.corpus.posts
+        start = 0
+        after = params.get("after")
+        if after:
+            ids = [p["name"] for p in posts]
+            start = ids.index(after) + 1 if after in ids else len(posts)
+        page = posts[start:start + min(int(params.get("limit", 25)), 100)]
+        next_after = page[-1]["name"] if page and start + len(page) < len(posts) else None
+        return {"kind": "Listing", "data": {
+            "after": next_after, "before": None,
+            "children": [{"kind": "t3", "data": p} for p in page],
+        }}
+
+    def _info(self, params):
+        by_id = self.server.corpus.by_id
+        ids = [name.removeprefix("t3_") for name in params.get("id", "").split(",")]
+        return {"kind": "Listing", "data": {
+            "after": None, "before": None,
+            "children": [{"kind": "t3", "data": by_id[i]} for i in ids if i in by_id],
+        }}
+
+    def _archive_search(self, params):
+        after = int(params.get("after", 0))
+        before = int(params.get("before", 2 ** 62))
+        posts = [p for p in self.server.corpus.posts if after < p["created_utc"] < before]
+        posts.sort(key=lambda p: p["created_utc"], reverse=params.get("sort") == "desc")
+        return {"data": posts[:min(int(params.get("limit", 25)), 100)]}
+
+    def _render(self, post_id, cid, depth, max_depth):
+        corpus = self.server.corpus
+        data = corpus.comment_data(post_id, cid, depth)
+        children = corpus.trees[post_id][0][cid][1]
+        if children:
+            if depth + 1 >= max_depth:
+                replies = [_more(f"t1_{cid}", children, depth + 1)]
+            else:
+                replies = [self._render(post_id, c, depth + 1, max_depth) for c in children]
+            data["replies"] = {"kind": "Listing", "data": {"children": replies}}
+        return {"kind": "t1", "data": data}
+
+    def _comments_page(self, post_id):
+        server = self.server
+        nodes, top = server.corpus.trees[post_id]
+        shown, rest = top[:server.page_comments], top[server.page_comments:]
+        children = [self._render(post_id, cid, 0, server.page_depth) for cid in shown]
+        for i in range(0, len(rest), 100):
+            children.append(_more(f"t3_{post_id}", rest[i:i + 100], 0))
+        return [
+            {"kind": "Listing", "data": {"children": [{"kind": "t3", "data": server.corpus.by_id[post_id]}]}},
+            {"kind": "Listing", "data": {"children": children}},
+        ]
+
+    def _more_children(self, params):
+        corpus = self.server.corpus
+        post_id = params.get("link_id", "").removeprefix("t3_")
+        ids = [c for c in params.get("children", "").split(",") if c]
+        things = []
+        if post_id in corpus.trees:
+            nodes = corpus.trees[post_id][0]
+            depths = corpus.depths[post_id]
+            for cid in ids[:100]:
+                if cid not in nodes:
+                    continue
+                things.append({"kind": "t1", "data": corpus.comment_data(post_id, cid, depths[cid])})
+                if nodes[cid][1]:
+                    things.append(_more(f"t1_{cid}", nodes[cid][1], depths[cid] + 1))
+        return {"json": {"errors": [], "data": {"things": things}}}
+
+
+class FakeRedditServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port=0, posts=25, comments=50, shape="flat", latency=0.0, budget=1000,
+                 window=600, error_rate=0.0, page_comments=20, page_depth=4, token_ttl=3600, seed=1,
+                 corpus=None):
+        super().__init__(("127.0.0.1", port), FakeRedditHandler)
+        self.corpus = corpus or Corpus(posts=posts, comments=comments, shape=shape, seed=seed)
+        self.latency = latency
+        self.budget = budget
+        self.window = window
+        self.error_rate = error_rate
+        self.page_comments = page_comments
+        self.page_depth = page_depth
+        self.token_ttl = token_ttl
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.window_start = time.monotonic()
+        self.used = 0
+        self.calls = {}
+        self.throttled = 0
+        self.errors = 0
+        self.bytes_sent = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def praw_config(self):
+        """
+        Keyword arguments that point praw (via create_reddit/ScrapeSession) at this server
+        """
+        return {"oauth_url": self.url, "reddit_url": self.url}
+
+    def stats(self):
+        with self.lock:
+            return {"posts": len(self.corpus.posts), "calls": dict(self.calls), "total_calls": sum(self.calls.values()),
+                    "throttled": self.throttled, "errors": self.errors, "bytes_sent": self.bytes_sent}
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def load_fixture(path):
+    """
+    Corpus from a scrape file written by the scraper (JSON, JSONL or Parquet dataset)
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from reddit_scraper.cleaner_core import read_input
+
+    with read_input(path) as posts:
+        return Corpus.from_posts(posts)
+
+
+def _serve(conn, fixture, kwargs):
+    corpus = load_fixture(fixture) if fixture else None
+    server = FakeRedditServer(corpus=corpus, **kwargs)
+    conn.send(server.url)
+    server.serve_forever()
+
+
+class ServerProcess:
+    """
+    A FakeRedditServer running in its own process, so serving requests doesn't compete
+    for the GIL with the client being measured. Takes the same arguments as
+    FakeRedditServer, plus fixture (a recorded scrape file to replay).
+    """
+
+    def __init__(self, fixture=None, **kwargs):
+        self.fixture = fixture
+        self.kwargs = kwargs
+        self.url = None
+        self._process = None
+
+    def start(self):
+        ctx = multiprocessing.get_context("spawn")
+        parent, child = ctx.Pipe()
+        self._process = ctx.Process(target=_serve, args=(child, self.fixture, self.kwargs), daemon=True)
+        self._process.start()
+        self.url = parent.recv()
+        return self
+
+    def praw_config(self):
+        return {"oauth_url": self.url, "reddit_url": self.url}
+
+    def stats(self):
+        with urllib.request.urlopen(self.url + "/_stats") as response:
+            return json.load(response)
+
+    def stop(self):
+        self._process.terminate()
+        self._process.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--posts", type=int, default=25)
+    parser.add_argument("--comments", type=int, default=50, help="comments per post")
+    parser.add_argument("--shape", choices=SHAPES, default="flat")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every API call")
+    parser.add_argument("--budget", type=int, default=1000, help="requests allowed per rate-limit window")
+    parser.add_argument("--window", type=int, default=600, help="rate-limit window in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with 503")
+    parser.add_argument("--fixture", help="replay a recorded scrape (.json, .jsonl or Parquet dataset) instead of synthetic posts")
+    args = parser.parse_args()
+
+    corpus = load_fixture(args.fixture) if args.fixture else None
+    server = FakeRedditServer(port=args.port, posts=args.posts, comments=args.comments, shape=args.shape,
+                              latency=args.latency, budget=args.budget, window=args.window,
+                              error_rate=args.error_rate, corpus=corpus)
+    print(f"Fake Reddit API listening on {server.url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,50 @@
+"""
+Synthetic scraper output for the benchmarks: post dicts shaped like the scraper's,
+with random words for text and a random reply tree for the comments.
+"""
+import random
+import string
+import time
+
+
+def random_word(rng):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10)))
+
+
+def make_posts(rng, posts, comments):
+    vocabulary = [random_word(rng) for _ in range(5000)]
+    authors = [random_word(rng) for _ in range(2000)]
+
+    def sentence(n):
+        return " ".join(rng.choice(vocabulary) for _ in range(n))
+
+    for i in range(posts):
+        post_id = f"p{i:07d}"
+        created = 1700000000 - i * 60
+        yield {
+            "id": post_id,
+            "title": sentence(10).title(),
+            "author": rng.choice(authors),
+            "score": rng.randint(0, 5000),
+            "num_comments": comments,
+            "created_utc": created,
+            "created_iso": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(created)),
+            "selftext": sentence(rng.randint(0, 120)),
+            "url": f"https://www.reddit.com/r/bench/comments/{post_id}/",
+            "comments": [{
+                "id": f"{post_id}c{j}",
+                "parent_id": f"t3_{post_id}" if j == 0 or rng.random() < 0.4 else f"t1_{post_id}c{rng.randrange(j)}",
+                "body": sentence(rng.randint(5, 60)),
+                "author": rng.choice(authors),
+                "score": rng.randint(-20, 800),
+            } for j in range(comments)],
+            "comments_truncated": False,
+        }
+
+
+def make_comment_corpus(total_comments, comments_per_post=50, seed=42):
+    """
+    Posts adding up to total_comments comments
+    """
+    posts = max(1, total_comments // comments_per_post)
+    return make_posts(random.Random(seed), posts, min(comments_per_post, total_comments))
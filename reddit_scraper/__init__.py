@@ -0,0 +1,13 @@
+"""
+Command line tools for scraping subreddits and working with the scraped data.
+
+    reddit-scraper scrape   scrape subreddits (see scraper-readme.md)
+    reddit-scraper clean    turn scrape files into readable text
+    reddit-scraper index    full-text index over scrape files
+    reddit-scraper store    manage the deduplicated scrape store
+
+The scraping, cleaning and storage code the subcommands and the Streamlit app
+share lives in this package too (reddit_scraper.scraper_core, cleaner_core, ...).
+Nothing is imported here, so each subcommand only loads what it uses.
+"""
+__version__ = "1.0.0"
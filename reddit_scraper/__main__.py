@@ -0,0 +1,3 @@
+from reddit_scraper.cli import main
+
+main()
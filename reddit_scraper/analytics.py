@@ -0,0 +1,243 @@
+"""
+Aggregates over scraped posts and comments, for the app's Analytics page.
+
+A scrape is loaded once into two pandas frames:
+
+    posts      one row per post: id, title, author, score, num_comments (as
+               reported by Reddit), comments (as scraped), created_utc and
+               comments_truncated
+    comments   one row per comment: post (the row of its post in posts),
+               author and score
+
+Authors are categoricals and the numbers are fixed-width columns, so a few
+million comments take tens of MB, and every aggregate below is a handful of
+NumPy/pandas passes over whole columns rather than a Python loop over posts.
+Comments are copied column by column from each post's CommentRecords, and
+Parquet datasets are read straight into the frames without building dicts.
+"""
+import numpy as np
+import pandas as pd
+
+from reddit_scraper.columnar import read_comment_table, read_post_table
+from reddit_scraper.records import CommentRecords
+
+# Authors that aren't people, left out of the author rankings
+NON_AUTHORS = ("[deleted]", "AutoModerator")
+
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def score_edges(low, high):
+    """
+    Histogram edges on a 1-2-5 scale, mirrored for negative scores: 0, 1, 2, 5, 10, 20, 50, ...
+    Reddit scores are heavy-tailed, so even buckets would put nearly everything in the first one.
+    """
+    def steps(limit):
+        # 1, 2, 5, 10, ... up to the first step past limit
+        steps = [1]
+        while steps[-1] <= limit:
+            steps.append(steps[-1] * 5 // 2 if str(steps[-1])[0] == "2" else steps[-1] * 2)
+        return steps
+
+    negative = [-step for step in steps(-low - 1)] if low < 0 else []
+    return np.array(negative[::-1] + [0] + steps(high), dtype=np.int64)
+
+
+def edge_labels(edges):
+    labels = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end - start == 1:
+            labels.append(str(start))
+        elif start < 0:
+            labels.append(f"{start} to {end - 1}")
+        else:
+            labels.append(f"{start}–{end - 1}")
+    return labels
+
+
+class ScrapeFrames:
+    """
+    Columnar posts and comments of one scrape, with the aggregates the Analytics page shows
+    """
+
+    def __init__(self, posts, comments):
+        self.posts = posts
+        self.comments = comments
+        self._authors = None
+
+    @classmethod
+    def from_posts(cls, posts):
+        """
+        Build the frames from post dicts (a list, or a stream from a file or the scrape store)
+        """
+        columns = {name: [] for name in ("id", "title", "author", "score", "num_comments", "created_utc",
+                                         "comments_truncated")}
+        counts = []
+        comment_authors = []
+        comment_scores = []
+        for post in posts:
+            for name, column in columns.items():
+                column.append(post.get(name))
+            comments = post.get("comments") or ()
+            counts.append(len(comments))
+            if isinstance(comments, CommentRecords):
+                comment_authors.extend(comments.author)
+                comment_scores.extend(comments.score)
+            else:
+                comment_authors.extend(comment.get("author") for comment in comments)
+                comment_scores.extend(comment.get("score") for comment in comments)
+
+        counts = np.array(counts, dtype=np.int32)
+        posts = cls._post_frame(columns, counts)
+        comments = pd.DataFrame({
+            "post": np.repeat(np.arange(len(counts), dtype=np.int32), counts),
+            "author": pd.Categorical(comment_authors),
+            "score": cls._numbers(comment_scores),
+        })
+        return cls(posts, comments)
+
+    @classmethod
+    def from_parquet(cls, source):
+        """
+        Build the frames from a Parquet dataset (directory or .zip), reading only the needed columns
+        """
+        posts = read_post_table(source, columns=["id", "title", "author", "score", "num_comments", "created_utc",
+                                                 "comments_truncated"]).to_pandas()
+        comments = read_comment_table(source, columns=["post_id", "author", "score"]).to_pandas()
+        rows = pd.Index(posts["id"]).get_indexer(comments["post_id"]).astype(np.int32)
+        counts = np.bincount(rows[rows >= 0], minlength=len(posts)).astype(np.int32)
+        posts = cls._post_frame({name: posts[name] for name in posts.columns}, counts)
+        comments = pd.DataFrame({
+            "post": rows,
+            "author": pd.Categorical(comments["author"]),
+            "score": cls._numbers(comments["score"]),
+        })
+        return cls(posts, comments)
+
+    @staticmethod
+    def _numbers(values):
+        """
+        An int64 array, with missing values as 0
+        """
+        if isinstance(values, pd.Series):
+            return values.fillna(0).to_numpy(np.int64)
+        try:
+            return np.asarray(values, dtype=np.int64)
+        except (TypeError, ValueError):
+            return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").fillna(0).to_numpy(np.int64)
+
+    @classmethod
+    def _post_frame(cls, columns, counts):
+        return pd.DataFrame({
+            "id": columns["id"],
+            "title": columns["title"],
+            "author": pd.Categorical(columns["author"]),
+            "score": cls._numbers(columns["score"]),
+            "num_comments": cls._numbers(columns["num_comments"]),
+            "comments": counts,
+            "created_utc": cls._numbers(columns["created_utc"]),
+            "comments_truncated": pd.Series(columns["comments_truncated"], dtype=object).fillna(False)
+                                    .to_numpy(bool),
+        })
+
+    def memory_bytes(self):
+        return int(self.posts.memory_usage(deep=True).sum() + self.comments.memory_usage(deep=True).sum())
+
+    def summary(self):
+        """
+        Headline numbers: totals, averages and comments per post
+        """
+        post_count = len(self.posts)
+        comment_count = len(self.comments)
+        reported = int(self.posts["num_comments"].sum())
+        return {
+            "posts": post_count,
+            "comments": comment_count,
+            "authors": len(self.authors().index),
+            "avg_post_score": float(self.posts["score"].mean()) if post_count else 0.0,
+            "avg_comment_score": float(self.comments["score"].mean()) if comment_count else 0.0,
+            "comments_per_post": comment_count / post_count if post_count else 0.0,
+            # Share of the comments Reddit reports that the scrape holds
+            "coverage": comment_count / reported if reported else 1.0,
+            "truncated": int(self.posts["comments_truncated"].sum()),
+        }
+
+    def score_distribution(self, kind="posts"):
+        """
+        Count of posts or comments per score bucket, with the percentiles of the scores
+        """
+        scores = (self.posts if kind == "posts" else self.comments)["score"].to_numpy()
+        if not len(scores):
+            return pd.DataFrame({"count": []}), {}
+        edges = score_edges(int(scores.min()), int(scores.max()))
+        buckets = np.searchsorted(edges, scores, side="right") - 1
+        counts = np.bincount(buckets, minlength=len(edges) - 1)[:len(edges) - 1]
+        distribution = pd.DataFrame({"count": counts}, index=pd.Index(edge_labels(edges), name="score"))
+        # Drop the empty buckets at either end
+        nonzero = np.flatnonzero(counts)
+        distribution = distribution.iloc[nonzero[0]:nonzero[-1] + 1]
+        percentiles = dict(zip(("p50", "p90", "p99"), np.percentile(scores, [50, 90, 99]).tolist()))
+        percentiles["max"] = int(scores.max())
+        return distribution, percentiles
+
+    def activity(self, utc_offset=0):
+        """
+        Posts by hour of day and by weekday and hour, with the comments those posts
+        received, in the timezone utc_offset hours from UTC
+        """
+        created = self.posts["created_utc"].to_numpy() + int(utc_offset * 3600)
+        hours = created // 3600 % 24
+        # 1970-01-01 was a Thursday
+        weekdays = (created // 86400 + 3) % 7
+        comments = self.posts["comments"].to_numpy()
+        by_hour = pd.DataFrame({
+            "posts": np.bincount(hours, minlength=24),
+            "comments": np.bincount(hours, weights=comments, minlength=24).astype(np.int64),
+        }, index=pd.Index(range(24), name="hour"))
+        cells = np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
+        by_weekday = pd.DataFrame(cells, index=pd.Index(WEEKDAYS, name="weekday"), columns=range(24))
+        return by_hour, by_weekday
+
+    def authors(self):
+        """
+        Posts, comments and total score of every author. Built on first use and kept,
+        so treat it as read-only.
+        """
+        if self._authors is not None:
+            return self._authors
+        posts = self.posts.groupby("author", observed=True)["score"].agg(["size", "sum"])
+        comments = self.comments.groupby("author", observed=True)["score"].agg(["size", "sum"])
+        table = pd.DataFrame({
+            "posts": posts["size"],
+            "post_score": posts["sum"],
+        }).join(pd.DataFrame({"comments": comments["size"], "comment_score": comments["sum"]}), how="outer")
+        table = table.fillna(0).astype(np.int64)
+        table = table[~table.index.isin(NON_AUTHORS)]
+        table.index = table.index.astype(str)
+        table.index.name = "author"
+        table["total_score"] = table["post_score"] + table["comment_score"]
+        self._authors = table
+        return table
+
+    def top_authors(self, n=20, by="total_score"):
+        return self.authors().nlargest(n, by)
+
+    def comment_ratios(self, n=10):
+        """
+        How comments spread over posts: the distribution of comments per post, and
+        the posts with the most comments per point of score
+        """
+        counts = self.posts["comments"].to_numpy()
+        if not len(counts):
+            return pd.DataFrame({"posts": []}), pd.DataFrame()
+        edges = score_edges(0, int(counts.max()))
+        buckets = np.searchsorted(edges, counts, side="right") - 1
+        per_post = np.bincount(buckets, minlength=len(edges) - 1)[:len(edges) - 1]
+        distribution = pd.DataFrame({"posts": per_post}, index=pd.Index(edge_labels(edges), name="comments"))
+        nonzero = np.flatnonzero(per_post)
+        distribution = distribution.iloc[nonzero[0]:nonzero[-1] + 1]
+
+        posts = self.posts[["title", "author", "score", "num_comments", "comments"]].copy()
+        posts["comments_per_point"] = posts["comments"] / np.maximum(posts["score"], 1)
+        discussed = posts.nlargest(n, "comments_per_point")
+        return distribution, discussed
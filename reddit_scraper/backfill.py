@@ -0,0 +1,326 @@
+"""
+Historical backfill: scrape every post of a subreddit in a date range, past the
+1000-post cap of Reddit's listings.
+
+The range is split into fixed time windows. A BackfillSource lists the post ids
+created in each window (the default, ArchiveSource, asks an archive search API,
+since Reddit itself can't list posts by date). The posts are then loaded from
+Reddit in chunks, by id, and their comments fetched like any other scrape.
+
+Windows are listed in parallel, and every window's posts are cut into chunks of
+chunk_size that all go through one shared queue, so a busy window is spread over
+every worker instead of holding up the rest. Post ids are deduplicated against
+everything the backfill already saved, and a window is recorded as finished once
+all its posts are on disk, so an interrupted backfill resumes where it stopped.
+"""
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from reddit_scraper.instrumentation import propagate, stage
+from reddit_scraper.writers import open_writer
+
+DEFAULT_STATE_PATH = "backfill_state.db"
+DEFAULT_ARCHIVE_URL = "https://arctic-shift.photon-reddit.com"
+DEFAULT_WINDOW_HOURS = 24
+# Posts per chunk of work; also the most ids Reddit's /api/info takes in one request
+DEFAULT_CHUNK_SIZE = 100
+# Windows a capped source fills up are halved, down to this many seconds
+MIN_WINDOW_SECONDS = 60
+
+
+def parse_time(value):
+    """
+    Epoch seconds from a YYYY-MM-DD date, an ISO 8601 time (UTC unless it says
+    otherwise) or a number of epoch seconds
+    """
+    if isinstance(value, (int, float)):
+        return int(value)
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def format_time(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%d %H:%M")
+
+
+def split_windows(start, end, window_seconds):
+    """
+    [(start, end), ...] covering [start, end) in steps of window_seconds, aligned
+    to start so reruns of the same backfill get the same windows
+    """
+    return [(t, min(t + window_seconds, end)) for t in range(start, end, window_seconds)]
+
+
+class BackfillSource(ABC):
+    """
+    Lists the posts of a subreddit created in a time window. Subclasses implement
+    iter_window(); a source that returns at most max_results posts per query has
+    windows that reach the cap split in half until they fit.
+    """
+
+    max_results = None
+
+    @abstractmethod
+    def iter_window(self, subreddit, start, end):
+        """
+        Yield (post id, created_utc) for posts created in [start, end)
+        """
+
+    def list_window(self, subreddit, start, end):
+        posts = list(self.iter_window(subreddit, start, end))
+        if self.max_results and len(posts) >= self.max_results and end - start > MIN_WINDOW_SECONDS:
+            middle = (start + end) // 2
+            return self.list_window(subreddit, start, middle) + self.list_window(subreddit, middle, end)
+        return posts
+
+
+class ArchiveSource(BackfillSource):
+    """
+    Post ids from an archive search API with the Arctic Shift interface:
+
+        GET {base_url}/api/posts/search?subreddit=...&after=...&before=...&limit=100&sort=asc
+
+    returning {"data": [post, ...]}. Point base_url at benchmarks/fake_reddit_server.py
+    to try a backfill locally.
+    """
+
+    def __init__(self, base_url=DEFAULT_ARCHIVE_URL, page_size=100, timeout=30, retries=3):
+        self.base_url = base_url.rstrip("/")
+        self.page_size = page_size
+        self.timeout = timeout
+        self.retries = retries
+        self._local = threading.local()
+
+    def _get(self, params):
+        # requests sessions aren't thread-safe, so each window thread gets its own
+        session = getattr(self._local, "session", None)
+        if session is None:
+            import requests
+            session = self._local.session = requests.Session()
+        for attempt in range(self.retries + 1):
+            response = session.get(f"{self.base_url}/api/posts/search", params=params, timeout=self.timeout)
+            if response.status_code != 429 and response.status_code < 500 or attempt == self.retries:
+                response.raise_for_status()
+                return response.json().get("data") or []
+            time.sleep(2 ** attempt)
+
+    def iter_window(self, subreddit, start, end):
+        # after and before are exclusive
+        after = start - 1
+        seen = set()
+        while True:
+            page = self._get({"subreddit": subreddit, "after": after, "before": end,
+                              "limit": self.page_size, "sort": "asc", "fields": "id,created_utc"})
+            new = [post for post in page if post["id"] not in seen]
+            for post in new:
+                seen.add(post["id"])
+                yield post["id"], int(post["created_utc"])
+            if len(page) < self.page_size:
+                return
+            # Re-read the last second, in case the page ended halfway through it
+            last = max(int(post["created_utc"]) for post in page)
+            after = last - 1 if new else last
+
+
+class BackfillState:
+    """
+    Local SQLite record of a backfill: which windows are finished and which post
+    ids were saved. Like Checkpoint, mark() and finish_window() only stage rows and
+    commit() makes them durable, which callers do once the posts are on disk.
+    Safe to share between threads.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS windows (
+                subreddit TEXT NOT NULL,
+                start INTEGER NOT NULL,
+                end INTEGER NOT NULL,
+                posts INTEGER NOT NULL,
+                finished_at INTEGER NOT NULL,
+                PRIMARY KEY (subreddit, start, end)
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                subreddit TEXT NOT NULL,
+                id TEXT NOT NULL,
+                created_utc INTEGER NOT NULL,
+                scraped_at INTEGER NOT NULL,
+                PRIMARY KEY (subreddit, id)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def finished(self, subreddit, start, end):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM windows WHERE subreddit = ? AND start = ? AND end = ?",
+                (subreddit.lower(), start, end),
+            ).fetchone() is not None
+
+    def unseen(self, subreddit, ids):
+        """
+        The ids not saved by this or an earlier backfill, in order
+        """
+        with self._lock:
+            seen = set()
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                seen.update(row[0] for row in self._conn.execute(
+                    f"SELECT id FROM seen WHERE subreddit = ? AND id IN ({','.join('?' * len(batch))})",
+                    [subreddit.lower(), *batch],
+                ))
+        return [i for i in ids if i not in seen]
+
+    def mark(self, subreddit, submission):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO seen VALUES (?, ?, ?, ?)",
+                (subreddit.lower(), submission.id, int(submission.created_utc), int(time.time())),
+            )
+
+    def finish_window(self, subreddit, start, end, posts):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO windows VALUES (?, ?, ?, ?, ?)",
+                (subreddit.lower(), start, end, posts, int(time.time())),
+            )
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def count(self, subreddit):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM seen WHERE subreddit = ?", (subreddit.lower(),)
+            ).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+def backfill_output_path(subreddit, start, end):
+    return f"{subreddit}_backfill_{format_time(start)[:10]}_{format_time(end)[:10]}_output.jsonl"
+
+
+def run_backfill(session, subreddit, start, end, source=None, out_file=None, state_path=DEFAULT_STATE_PATH,
+                 window_hours=DEFAULT_WINDOW_HOURS, parallel_windows=4, chunk_size=DEFAULT_CHUNK_SIZE,
+                 matcher=None, comment_keyword_scope="all", workers=4, budget=None):
+    """
+    Scrape every post of subreddit created in [start, end) (epoch seconds) into a JSONL
+    file, which is appended to so reruns resume. Up to parallel_windows windows are
+    listed and parallel_windows chunks of posts scraped at once, each chunk with up to
+    workers comment fetches on the session's shared pool and rate budget.
+
+    Returns (out_file, posts saved, failed windows).
+    """
+    # Imported here so the CLI can read this module's defaults without loading praw
+    from tqdm import tqdm
+
+    from reddit_scraper.scraper_core import submission_to_dict
+
+    source = source or ArchiveSource()
+    out_file = out_file or backfill_output_path(subreddit, start, end)
+    state = BackfillState(state_path)
+    windows = [w for w in split_windows(start, end, int(window_hours * 3600))
+               if not state.finished(subreddit, *w)]
+    print(f"Backfilling r/{subreddit} from {format_time(start)} to {format_time(end)} UTC: "
+          f"{len(windows)} windows to go, {state.count(subreddit)} posts saved earlier\n")
+
+    lock = threading.Lock()
+    claimed = set()
+    saved = {}
+    failed = []
+
+    def list_window(window):
+        with stage("listing"):
+            posts = source.list_window(subreddit, *window)
+        # Newest first, like the listings; ids already saved or claimed by a neighbouring window are dropped
+        ids = state.unseen(subreddit, [post_id for post_id, _ in sorted(posts, key=lambda p: -p[1])])
+        with lock:
+            ids = [i for i in ids if i not in claimed]
+            claimed.update(ids)
+        return ids
+
+    def scrape_chunk(window, ids, writer, progress):
+        with session.borrow() as reddit:
+            with stage("listing"):
+                submissions = list(reddit.info(fullnames=[f"t3_{post_id}" for post_id in ids]))
+            for submission, fetched in session.expand(submissions, matcher, comment_keyword_scope, workers, budget):
+                with lock:
+                    if fetched is not None:
+                        comments, truncated = fetched
+                        with stage("serialize"):
+                            writer.write(submission_to_dict(submission, comments, truncated))
+                        saved[window] = saved.get(window, 0) + 1
+                    state.mark(subreddit, submission)
+                    progress.update(1)
+            # Posts deleted since they were archived are missing from /api/info
+            progress.update(len(ids) - len(submissions))
+
+    pool = ThreadPoolExecutor(max_workers=max(1, parallel_windows))
+    with open_writer(out_file, "jsonl", on_flush=state.commit, append=True) as writer, \
+            tqdm(total=0, desc="Posts", unit="post") as progress:
+        list_window, scrape_chunk = propagate(list_window), propagate(scrape_chunk)
+        pending = {pool.submit(list_window, window): (window, None) for window in windows}
+        chunks_left = {}
+
+        def finish(window):
+            if window in failed:
+                return
+            with lock:
+                # The window only counts as done once its posts are on disk
+                writer.flush()
+                state.finish_window(subreddit, *window, saved.get(window, 0))
+                state.commit()
+
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window, ids = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        progress.write(f"❌ Window {format_time(window[0])} - {format_time(window[1])}: {e}")
+                        if window not in failed:
+                            failed.append(window)
+                        result = None
+
+                    if ids is None:
+                        # A window was listed: queue its posts in chunks
+                        if result is None:
+                            continue
+                        progress.total += len(result)
+                        progress.refresh()
+                        chunks = [result[i:i + chunk_size] for i in range(0, len(result), chunk_size)]
+                        chunks_left[window] = len(chunks)
+                        for chunk in chunks:
+                            pending[pool.submit(scrape_chunk, window, chunk, writer, progress)] = (window, chunk)
+                        if not chunks:
+                            finish(window)
+                    else:
+                        chunks_left[window] -= 1
+                        if not chunks_left[window]:
+                            finish(window)
+                    progress.set_postfix(session.rate_limiter.postfix(), refresh=False)
+        finally:
+            # On Ctrl-C, drop the queued chunks instead of working through them
+            pool.shutdown(cancel_futures=True)
+
+    state.close()
+    return out_file, sum(saved.values()), failed
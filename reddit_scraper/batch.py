@@ -0,0 +1,159 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tqdm import tqdm
+
+from reddit_scraper.backfill import backfill_output_path, run_backfill
+from reddit_scraper.checkpoint import Checkpoint
+from reddit_scraper.instrumentation import propagate, stage
+from reddit_scraper.keyword_matcher import KeywordMatcher
+from reddit_scraper.scraper_core import CommentBudget, iter_posts
+from reddit_scraper.writers import APPENDABLE_FORMATS, open_writers, output_path
+
+JOB_DEFAULTS = {
+    "sort": "new",
+    "time_filter": "all",
+    "limit": 100,
+    "keywords": None,
+    "keyword_mode": "substring",
+    "comment_keyword_scope": "all",
+    "workers": 4,
+    # Comment budget per post; None leaves a limit off (see scraper_core.CommentBudget)
+    "max_more": None,
+    "max_depth": None,
+    "min_score": None,
+    "top_comments": None,
+    "post_deadline": None,
+}
+
+
+def make_job(subreddit, **options):
+    job = dict(JOB_DEFAULTS)
+    job.update({k: v for k, v in options.items() if v is not None})
+    job["subreddit"] = subreddit.strip().removeprefix("r/")
+    if isinstance(job["keywords"], str):
+        job["keywords"] = [kw.strip() for kw in job["keywords"].split(",") if kw.strip()] or None
+    job["limit"] = min(int(job["limit"]), 1000)
+    return job
+
+
+def load_jobs(path, **defaults):
+    """
+    Read jobs from a JSON list or a JSONL file. Every job needs a "subreddit"; any other
+    field missing from a job falls back to defaults, then to JOB_DEFAULTS.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+
+    stripped = text.lstrip()
+    if stripped.startswith("["):
+        entries = json.loads(stripped)
+    else:
+        entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    jobs = []
+    for i, entry in enumerate(entries, start=1):
+        if isinstance(entry, str):
+            entry = {"subreddit": entry}
+        if not entry.get("subreddit"):
+            raise ValueError(f"Job {i} in '{path}' has no subreddit")
+        options = dict(defaults)
+        options.update(entry)
+        jobs.append(make_job(options.pop("subreddit"), **options))
+    return jobs
+
+
+def job_budget(job):
+    budget = CommentBudget(max_more=job["max_more"], max_depth=job["max_depth"], min_score=job["min_score"],
+                           top_n=job["top_comments"], deadline=job["post_deadline"])
+    return None if budget.unlimited else budget
+
+
+def job_output_path(job, output_dir, output_format):
+    name = f"{job['subreddit']}_{job['sort']}"
+    if job["sort"] in ("top", "controversial"):
+        name += f"_{job['time_filter']}"
+    return output_path(name, output_format, output_dir)
+
+
+def run_job(session, job, output_dir, output_format, progress=None, checkpoint_path=None):
+    """
+    Scrape one job into every format in output_format (a format or a tuple of them),
+    in a single pass. Returns the output paths, comma separated, and the post count.
+    """
+    formats = (output_format,) if isinstance(output_format, str) else tuple(output_format)
+    matcher = KeywordMatcher(job["keywords"], mode=job["keyword_mode"]) if job["keywords"] else None
+    # sqlite connections can't be shared across threads, so every job opens its own
+    checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+    outputs = [(job_output_path(job, output_dir, fmt), fmt) for fmt in formats]
+
+    try:
+        posts = iter_posts(session, job["subreddit"], limit=job["limit"], sort=job["sort"],
+                           time_filter=job["time_filter"], matcher=matcher,
+                           comment_keyword_scope=job["comment_keyword_scope"],
+                           workers=job["workers"], checkpoint=checkpoint, budget=job_budget(job))
+        on_flush = checkpoint.commit if checkpoint else None
+        append = checkpoint is not None and all(fmt in APPENDABLE_FORMATS for fmt in formats)
+        with open_writers(outputs, on_flush=on_flush, append=append) as writer:
+            for submission, post in posts:
+                if progress is not None:
+                    progress.set_postfix(session.rate_limiter.postfix(), refresh=False)
+                    progress.update(1)
+                if post is not None:
+                    with stage("serialize"):
+                        writer.write(post)
+    finally:
+        if checkpoint:
+            checkpoint.close()
+
+    return ", ".join(path for path, _ in outputs), writer.count
+
+
+def run_backfill_job(session, job, start, end, output_dir=".", **options):
+    """
+    Backfill a job's subreddit over [start, end) with the job's keyword and comment
+    options; sort, time_filter and limit don't apply. options go to backfill.run_backfill.
+    """
+    matcher = KeywordMatcher(job["keywords"], mode=job["keyword_mode"]) if job["keywords"] else None
+    os.makedirs(output_dir, exist_ok=True)
+    out_file = os.path.join(output_dir, backfill_output_path(job["subreddit"], start, end))
+    return run_backfill(session, job["subreddit"], start, end, out_file=out_file, matcher=matcher,
+                        comment_keyword_scope=job["comment_keyword_scope"], workers=job["workers"],
+                        budget=job_budget(job), **options)
+
+
+def run_batch(session, jobs, output_dir=".", output_format="jsonl", parallel_jobs=4, checkpoint_path=None):
+    """
+    Run every job on the session's shared client and comment-fetch pool. Up to
+    parallel_jobs listings are walked at once, each limited to its own "workers"
+    concurrent comment fetches, and all of them draw on the session's single rate budget.
+
+    Returns a list of (job, out_file, post_count, error) in job order.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = [None] * len(jobs)
+    lock = threading.Lock()
+
+    with tqdm(total=sum(job["limit"] for job in jobs), desc="Posts", unit="post") as progress:
+        def run(index, job):
+            try:
+                out_file, count = run_job(session, job, output_dir, output_format, progress, checkpoint_path)
+                result = (job, out_file, count, None)
+                message = f"✅ r/{job['subreddit']} ({job['sort']}): saved {count} posts to {out_file}"
+            except Exception as e:
+                result = (job, None, 0, str(e))
+                message = f"❌ r/{job['subreddit']} ({job['sort']}): {e}"
+            with lock:
+                results[index] = result
+                progress.write(message)
+
+        with ThreadPoolExecutor(max_workers=max(1, parallel_jobs)) as job_pool:
+            # Jobs record into the caller's run stats, if any
+            run = propagate(run)
+            futures = [job_pool.submit(run, i, job) for i, job in enumerate(jobs)]
+            for future in as_completed(futures):
+                future.result()
+
+    return results
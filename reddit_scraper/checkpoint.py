@@ -0,0 +1,80 @@
+import sqlite3
+import time
+
+DEFAULT_CHECKPOINT_PATH = "scrape_checkpoint.db"
+
+
+class Checkpoint:
+    """
+    Local SQLite record of the submissions earlier runs already scraped, keyed by
+    subreddit, sort and (for top and controversial) time filter, so "top of the
+    day" and "top of all time" runs keep separate state. A rerun skips posts
+    whose comment count hasn't changed.
+
+    mark() only stages a row; commit() makes it durable. Callers commit after the
+    matching posts have reached disk, so an interrupted run never records a post
+    it didn't save.
+    """
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(scraped)")]
+        if columns and "time_filter" not in columns:
+            # Checkpoints from before time filters were part of the key; their rows count as "all"
+            self._conn.execute("ALTER TABLE scraped RENAME TO scraped_old")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS scraped (
+                subreddit TEXT NOT NULL,
+                sort TEXT NOT NULL,
+                time_filter TEXT NOT NULL,
+                id TEXT NOT NULL,
+                num_comments INTEGER NOT NULL,
+                created_utc INTEGER NOT NULL,
+                scraped_at INTEGER NOT NULL,
+                PRIMARY KEY (subreddit, sort, time_filter, id)
+            )
+            """
+        )
+        if columns and "time_filter" not in columns:
+            self._conn.execute(
+                "INSERT INTO scraped SELECT subreddit, sort, 'all', id, num_comments, created_utc, scraped_at "
+                "FROM scraped_old"
+            )
+            self._conn.execute("DROP TABLE scraped_old")
+        self._conn.commit()
+
+    @staticmethod
+    def _time_filter(sort, time_filter):
+        # Only top and controversial listings depend on the time filter
+        return time_filter if sort in ("top", "controversial") else "all"
+
+    def needs_fetch(self, subreddit, sort, submission, time_filter="all"):
+        """
+        True for posts never scraped before and for posts with new comments since the last run
+        """
+        row = self._conn.execute(
+            "SELECT num_comments FROM scraped WHERE subreddit = ? AND sort = ? AND time_filter = ? AND id = ?",
+            (subreddit.lower(), sort, self._time_filter(sort, time_filter), submission.id),
+        ).fetchone()
+        return row is None or row[0] != submission.num_comments
+
+    def mark(self, subreddit, sort, submission, time_filter="all"):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO scraped VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (subreddit.lower(), sort, self._time_filter(sort, time_filter), submission.id, submission.num_comments,
+             int(submission.created_utc), int(time.time())),
+        )
+
+    def commit(self):
+        self._conn.commit()
+
+    def count(self, subreddit, sort, time_filter="all"):
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM scraped WHERE subreddit = ? AND sort = ? AND time_filter = ?",
+            (subreddit.lower(), sort, self._time_filter(sort, time_filter)),
+        ).fetchone()[0]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,104 @@
+"""
+reddit-scraper clean: turn scrape files into readable text, one file or many in parallel.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from reddit_scraper.cleaner_core import (clean_file, clean_file_sharded, clean_files, cleaned_path, expand_inputs,
+                                         input_size)
+
+def format_reddit_data(input_file, output_file, threaded=False):
+    # Posts are read and written one at a time, so even multi-gigabyte scrape files
+    # (JSON arrays, JSONL or Parquet datasets) only need memory for the largest single post
+    try:
+        count = clean_file(input_file, output_file, threaded)
+    except FileNotFoundError:
+        print(f"Error: The file '{input_file}' was not found.")
+        return
+    except (json.JSONDecodeError, ValueError):
+        print(f"Error: Could not decode JSON from '{input_file}'. The file might be empty or corrupted.")
+        return
+    except ImportError as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"✅ Data cleaning complete! Formatted {count} posts saved to '{output_file}'")
+
+def report_throughput(posts, input_bytes, seconds):
+    seconds = max(seconds, 1e-9)
+    print(f"   {posts} posts, {input_bytes / 1024 / 1024:.1f} MB in {seconds:.2f}s "
+          f"({posts / seconds:.0f} posts/s, {input_bytes / 1024 / 1024 / seconds:.1f} MB/s)")
+
+def batch_main(argv, prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Clean many scrape files in parallel. Run with no arguments for the interactive mode.",
+    )
+    parser.add_argument("inputs", nargs="+", help="files, Parquet datasets, scrape stores (scrape_store.db, or scrape_store.db#<dataset> for one dataset), directories or glob patterns (quote globs)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes (default: all cores)")
+    parser.add_argument("--output-dir", help="where to write the _cleaned.txt files (default: next to each input)")
+    parser.add_argument("--shard-posts", action="store_true",
+                        help="split each file by post across the workers instead of one file per worker; "
+                             "best for a few very large files")
+    parser.add_argument("--threaded", action="store_true",
+                        help="indent each reply under the comment it answers, with reply counts, "
+                             "instead of listing comments in scrape order")
+    args = parser.parse_args(argv)
+
+    files = expand_inputs(args.inputs)
+    if not files:
+        parser.error("no .json, .jsonl or Parquet inputs matched")
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    total_posts = total_bytes = failed = 0
+    start = time.perf_counter()
+
+    if args.shard_posts:
+        for input_file in files:
+            output_file = cleaned_path(input_file, args.output_dir)
+            file_start = time.perf_counter()
+            try:
+                posts = clean_file_sharded(input_file, output_file, workers=args.workers, threaded=args.threaded)
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"❌ {input_file}: {e}")
+                failed += 1
+                continue
+            size = input_size(input_file)
+            total_posts += posts
+            total_bytes += size
+            print(f"✅ {input_file} -> {output_file}")
+            report_throughput(posts, size, time.perf_counter() - file_start)
+    else:
+        for input_file, output_file, posts, size, seconds, error in clean_files(files, args.output_dir, args.workers, args.threaded):
+            if error:
+                print(f"❌ {input_file}: {error}")
+                failed += 1
+                continue
+            total_posts += posts
+            total_bytes += size
+            print(f"✅ {input_file} -> {output_file}")
+
+    print(f"\n✅ Cleaned {len(files) - failed} of {len(files)} files with {args.workers} workers")
+    report_throughput(total_posts, total_bytes, time.perf_counter() - start)
+    if failed:
+        sys.exit(1)
+
+def interactive_main():
+    input_filename = input("Enter the path to the JSON or JSONL file (or Parquet dataset folder, or scrape_store.db#<dataset>) to clean: ").strip()
+
+    if input_filename:
+        output_filename = cleaned_path(input_filename.rstrip("/\\"))
+        threaded = input("Nest replies under the comments they answer? (y/N): ").strip().lower() == 'y'
+        format_reddit_data(input_filename, output_filename, threaded)
+    else:
+        print("No file location provided. Exiting.")
+
+def main(argv, prog=None):
+    if argv:
+        batch_main(argv, prog)
+    else:
+        interactive_main()
@@ -0,0 +1,321 @@
+import glob
+import io
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+from reddit_scraper.columnar import is_parquet_dataset, iter_dataset_posts
+from reddit_scraper.comment_tree import CommentTree
+from reddit_scraper.dedup_store import dataset_text_bytes, expand_store, is_store, iter_store_dataset, split_store_ref
+
+READ_CHUNK_SIZE = 1 << 16
+WRITE_BUFFER_SIZE = 1 << 20
+THREAD_INDENT = "    "
+# Replies nested deeper than this are indented like this level, with their depth in the header
+MAX_INDENT_DEPTH = 8
+
+
+def format_threaded_comments(comments):
+    """
+    Comments as readable text with each reply indented under the comment it answers,
+    and the number of replies below every comment that has any
+    """
+    tree = CommentTree(comments)
+    stats = tree.stats()
+    parts = [f"--- COMMENTS ({stats['top_level']} threads, up to {stats['levels']} levels deep) ---\n\n"]
+    for i, depth in tree.threads():
+        comment = comments[i]
+        indent = THREAD_INDENT * min(depth, MAX_INDENT_DEPTH)
+        details = [f"Score: {comment.get('score', 0)}"]
+        replies = tree.replies[i]
+        if replies:
+            details.append(f"{replies} {'reply' if replies == 1 else 'replies'}")
+        if depth > MAX_INDENT_DEPTH:
+            details.append(f"depth {depth}")
+        comment_body = (comment.get('body') or '').replace('\n', f'\n{indent}  ')
+
+        parts.append(f"{indent}{'Reply' if depth else 'Comment'} by {comment.get('author', 'N/A')} "
+                     f"({', '.join(details)}):\n")
+        parts.append(f"{indent}  {comment_body}\n\n")
+    return "".join(parts)
+
+
+def format_post(post, threaded=False):
+    """
+    Format a single scraped post and its comments as readable text. threaded nests
+    replies under their parent comments instead of listing comments in scrape order.
+    """
+    parts = ["=" * 60 + "\n", f"POST TITLE: {post.get('title', 'No Title')}\n"]
+
+    author = post.get('author', 'N/A')
+    score = post.get('score', 0)
+    num_comments = post.get('num_comments', 0)
+    try:
+        created_date = datetime.fromisoformat(post.get('created_iso', '...Z').replace('Z', '+00:00')).strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        created_date = 'N/A'
+
+    parts.append(f"Author: {author} | Score: {score} | Comments: {num_comments} | Date: {created_date}\n")
+    parts.append("-" * 60 + "\n\n")
+
+    if post.get('selftext'):
+        parts.append(f"{post['selftext']}\n\n")
+
+    if threaded and post.get('comments'):
+        parts.append(format_threaded_comments(post['comments']))
+    elif 'comments' in post and post['comments']:
+        parts.append("--- COMMENTS ---\n\n")
+        for comment in post['comments']:
+            comment_author = comment.get('author', 'N/A')
+            comment_score = comment.get('score', 0)
+            comment_body = comment.get('body', '').replace('\n', '\n  ')
+
+            parts.append(f"Comment by {comment_author} (Score: {comment_score}):\n")
+            parts.append(f"  {comment_body}\n\n")
+
+    parts.append("\n" * 2)
+    return "".join(parts)
+
+
+def _iter_json_array(f, decoder):
+    """
+    Decode the elements of a JSON array one at a time. The buffer only ever holds
+    the unread tail of the file, so memory is bounded by the largest single post.
+    """
+    buf = f.read(READ_CHUNK_SIZE)
+    pos = 0
+    eof = not buf
+
+    while True:
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buf):
+            if eof:
+                raise ValueError("Unexpected end of file: the JSON array is not closed")
+            buf = f.read(READ_CHUNK_SIZE)
+            pos = 0
+            eof = not buf
+            continue
+
+        if buf[pos] == "]":
+            return
+
+        try:
+            post, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The post continues past the buffer. Grow the read geometrically so a huge
+            # post is re-parsed O(log n) times rather than once per chunk.
+            more = f.read(max(READ_CHUNK_SIZE, len(buf) - pos))
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+
+        yield post
+        pos = end
+        if pos > READ_CHUNK_SIZE:
+            buf = buf[pos:]
+            pos = 0
+
+
+def iter_posts(f, raw_lines=False):
+    """
+    Yield posts one by one from a text file holding either a JSON array (the scraper's
+    .json output) or one JSON object per line (.jsonl output). With raw_lines, JSONL
+    posts are yielded as undecoded strings so decoding can happen elsewhere.
+    """
+    decoder = json.JSONDecoder()
+
+    first = f.read(1)
+    while first and first.isspace():
+        first = f.read(1)
+    if not first:
+        return
+
+    if first == "[":
+        yield from _iter_json_array(f, decoder)
+        return
+
+    line = first + f.readline()
+    while line:
+        if line.strip():
+            yield line if raw_lines else decoder.decode(line)
+        line = f.readline()
+
+
+def open_posts(path):
+    """
+    Open a scrape file for streaming with iter_posts
+    """
+    return open(path, "r", encoding="utf-8")
+
+
+@contextmanager
+def read_input(input_file, raw_lines=False):
+    """
+    Open a JSON, JSONL or Parquet dataset input, or a "<store file>#<dataset>" in a
+    scrape store, and yield an iterator over its posts
+    """
+    if split_store_ref(input_file):
+        yield iter_store_dataset(input_file)
+        return
+    if is_parquet_dataset(input_file):
+        yield iter_dataset_posts(input_file)
+        return
+    with open_posts(input_file) as f:
+        yield iter_posts(f, raw_lines=raw_lines)
+
+
+def write_cleaned(posts, out, threaded=False):
+    """
+    Write the cleaned text for each post to an open text file as the posts arrive.
+    Returns the number of posts written.
+    """
+    count = 0
+    for post in posts:
+        out.write(format_post(post, threaded))
+        count += 1
+    return count
+
+
+def input_size(path):
+    """
+    Size in bytes of a scrape file, or of all the tables in a Parquet dataset, or the
+    text size of a dataset in a scrape store
+    """
+    if split_store_ref(path):
+        return dataset_text_bytes(path)
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def clean_file(input_file, output_file, threaded=False):
+    """
+    Stream a scrape file (JSON, JSONL or a Parquet dataset directory) into a cleaned
+    text file through a buffered writer. Returns the number of posts written.
+    """
+    with read_input(input_file) as posts, \
+            open(output_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as out:
+        return write_cleaned(posts, out, threaded)
+
+
+def iter_cleaned_chunks(posts, chunk_size=WRITE_BUFFER_SIZE, threaded=False):
+    """
+    Yield the cleaned text in chunks of roughly chunk_size characters
+    """
+    buf = io.StringIO()
+    for post in posts:
+        buf.write(format_post(post, threaded))
+        if buf.tell() >= chunk_size:
+            yield buf.getvalue()
+            buf = io.StringIO()
+    if buf.tell():
+        yield buf.getvalue()
+
+
+def format_posts(posts, threaded=False):
+    """
+    Format a shard of posts; undecoded JSONL lines are decoded here, in the worker
+    """
+    return "".join(format_post(json.loads(post) if isinstance(post, str) else post, threaded) for post in posts)
+
+
+def _iter_shards(posts, shard_size):
+    shard = []
+    for post in posts:
+        shard.append(post)
+        if len(shard) >= shard_size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def clean_file_sharded(input_file, output_file, workers=None, shard_size=64, threaded=False):
+    """
+    Clean one large file on several cores. Posts are read in order, formatted in
+    shards on a process pool and written back in the original order, so the output
+    is byte-identical to clean_file. At most 2 * workers shards are in flight.
+    Returns the number of posts written.
+    """
+    # Imported here, since the pool pulls in multiprocessing, which single-file cleaning never needs
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers or os.cpu_count() or 1
+    count = 0
+    with read_input(input_file, raw_lines=True) as posts, \
+            open(output_file, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as out, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for shard in _iter_shards(posts, shard_size):
+            pending.append(pool.submit(format_posts, shard, threaded))
+            count += len(shard)
+            if len(pending) >= workers * 2:
+                out.write(pending.popleft().result())
+        while pending:
+            out.write(pending.popleft().result())
+    return count
+
+
+def _clean_one(job):
+    input_file, output_file, threaded = job
+    start = time.perf_counter()
+    posts = clean_file(input_file, output_file, threaded)
+    return input_file, output_file, posts, input_size(input_file), time.perf_counter() - start
+
+
+def cleaned_path(input_file, output_dir=None):
+    store = split_store_ref(input_file)
+    if store:
+        # Named after the dataset, next to the store
+        input_file = os.path.join(os.path.dirname(store[0]), store[1])
+    name = os.path.splitext(os.path.basename(input_file))[0] + "_cleaned.txt"
+    return os.path.join(output_dir or os.path.dirname(input_file), name)
+
+
+def expand_inputs(patterns):
+    """
+    Resolve directories (every .json/.jsonl file and Parquet dataset inside), scrape
+    stores (every dataset in them) and glob patterns to a sorted list of inputs
+    """
+    paths = set()
+    for pattern in patterns:
+        if split_store_ref(pattern):
+            paths.add(pattern)
+        elif is_store(pattern):
+            paths.update(expand_store(pattern))
+        elif is_parquet_dataset(pattern):
+            paths.add(os.path.normpath(pattern))
+        elif os.path.isdir(pattern):
+            for name in os.listdir(pattern):
+                path = os.path.join(pattern, name)
+                if name.endswith((".json", ".jsonl")) or is_parquet_dataset(path):
+                    paths.add(path)
+        else:
+            paths.update(p for p in glob.glob(pattern) if os.path.isfile(p) or is_parquet_dataset(p))
+    return sorted(paths)
+
+
+def clean_files(input_files, output_dir=None, workers=None, threaded=False):
+    """
+    Clean many files on a process pool, one file per worker. Yields
+    (input_file, output_file, posts, input_bytes, seconds, error) as each file finishes.
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    workers = workers or os.cpu_count() or 1
+    jobs = [(path, cleaned_path(path, output_dir), threaded) for path in input_files]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(_clean_one, job): job for job in jobs}
+        for future in as_completed(futures):
+            input_file, output_file, _ = futures[future]
+            try:
+                yield future.result() + (None,)
+            except Exception as e:
+                yield input_file, output_file, 0, 0, 0.0, str(e)
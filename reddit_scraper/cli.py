@@ -0,0 +1,43 @@
+"""
+The reddit-scraper command. Subcommands live in their own modules and are only
+imported once chosen, so `reddit-scraper clean` never loads praw and
+`reddit-scraper --help` loads nothing but this file.
+"""
+import importlib
+import sys
+
+from reddit_scraper import __version__
+
+# Subcommand -> (module with a main(argv, prog) function, one-line description)
+COMMANDS = {
+    "scrape": ("reddit_scraper.scrape", "scrape subreddits; run without arguments for the interactive mode"),
+    "clean": ("reddit_scraper.clean", "turn scrape files into readable text; run without arguments for the interactive mode"),
+    "index": ("reddit_scraper.index", "build and query a local full-text index over scrape files"),
+    "store": ("reddit_scraper.store", "list, import, export and remove scrape store datasets"),
+}
+
+PROG = "reddit-scraper"
+
+
+def usage():
+    width = max(len(name) for name in COMMANDS)
+    lines = [f"usage: {PROG} <command> [options]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {description}" for name, (_, description) in COMMANDS.items()]
+    lines += ["", f"Run '{PROG} <command> --help' for the options of a command."]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    if argv[0] == "--version":
+        print(f"{PROG} {__version__}")
+        return
+    if argv[0] not in COMMANDS:
+        print(usage(), file=sys.stderr)
+        sys.exit(f"\n{PROG}: unknown command '{argv[0]}'")
+
+    module = importlib.import_module(COMMANDS[argv[0]][0])
+    module.main(argv[1:], prog=f"{PROG} {argv[0]}")
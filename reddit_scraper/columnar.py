@@ -0,0 +1,271 @@
+"""
+Columnar (Parquet) storage for scraped posts.
+
+A dataset is a directory holding two zstd-compressed Parquet tables:
+
+    python_new_output.parquet/
+        posts.parquet      one row per post
+        comments.parquet   one row per comment; post_id joins to posts.id and
+                           parent_id is the parent's fullname (t3_ post or t1_ comment)
+
+Comments are written in post order, so a dataset can be streamed back into the
+nested post dicts the rest of the tools use without holding it all in memory.
+Readers also accept a .zip of the two files, which is what the app downloads.
+
+Needs pyarrow (pip install pyarrow). It is imported on first use, so the JSON
+tools that import this module don't pay for loading it.
+"""
+import importlib.util
+import os
+import shutil
+import tempfile
+import zipfile
+
+from reddit_scraper.records import CommentRecords
+
+pa = pc = pq = None
+
+PARQUET_AVAILABLE = importlib.util.find_spec("pyarrow") is not None
+
+POSTS_FILE = "posts.parquet"
+COMMENTS_FILE = "comments.parquet"
+DEFAULT_COMPRESSION = "zstd"
+
+# Posts per row group. Parquet files are only readable once closed, so unlike the
+# JSON writers there is nothing to gain from small batches.
+ROW_GROUP_POSTS = 1000
+
+POST_COLUMNS = ("id", "title", "author", "score", "num_comments", "created_utc", "created_iso",
+                "selftext", "url", "comments_truncated")
+COMMENT_COLUMNS = ("post_id", "id", "parent_id", "body", "author", "score")
+
+
+def require_pyarrow():
+    global pa, pc, pq
+    if pa is not None:
+        return
+    if not PARQUET_AVAILABLE:
+        raise ImportError("Parquet support needs pyarrow. Install it with: pip install pyarrow")
+    import pyarrow
+    import pyarrow.compute
+    import pyarrow.parquet
+    pa, pc, pq = pyarrow, pyarrow.compute, pyarrow.parquet
+
+
+def post_schema():
+    require_pyarrow()
+    return pa.schema([
+        ("id", pa.string()),
+        ("title", pa.string()),
+        ("author", pa.string()),
+        ("score", pa.int64()),
+        ("num_comments", pa.int64()),
+        ("created_utc", pa.int64()),
+        ("created_iso", pa.string()),
+        ("selftext", pa.string()),
+        ("url", pa.string()),
+        ("comments_truncated", pa.bool_()),
+    ])
+
+
+def comment_schema():
+    require_pyarrow()
+    return pa.schema([
+        ("post_id", pa.string()),
+        ("id", pa.string()),
+        ("parent_id", pa.string()),
+        ("body", pa.string()),
+        ("author", pa.string()),
+        ("score", pa.int64()),
+    ])
+
+
+class ParquetWriter:
+    """
+    Write posts into a Parquet dataset directory, splitting them into the posts and
+    comments tables. Same interface as the writers in writers.py; on_flush is called
+    once the dataset is closed, since a Parquet file is only valid from then on.
+    """
+
+    def __init__(self, path, batch_size=ROW_GROUP_POSTS, on_flush=None, compression=DEFAULT_COMPRESSION):
+        require_pyarrow()
+        self.path = path
+        self.batch_size = max(batch_size, 1)
+        self.on_flush = on_flush
+        self.count = 0
+        os.makedirs(path, exist_ok=True)
+        self._posts = pq.ParquetWriter(os.path.join(path, POSTS_FILE), post_schema(), compression=compression)
+        self._comments = pq.ParquetWriter(os.path.join(path, COMMENTS_FILE), comment_schema(),
+                                          compression=compression)
+        self._post_rows = {name: [] for name in POST_COLUMNS}
+        self._comment_rows = {name: [] for name in COMMENT_COLUMNS}
+        self._pending = 0
+        self._closed = False
+
+    def write(self, post):
+        rows = self._post_rows
+        for name in POST_COLUMNS:
+            rows[name].append(post.get(name))
+        if rows["comments_truncated"][-1] is None:
+            rows["comments_truncated"][-1] = False
+
+        rows = self._comment_rows
+        comments = post.get("comments") or ()
+        if isinstance(comments, CommentRecords):
+            # Already columns; no per-comment dicts needed
+            rows["post_id"].extend([post["id"]] * len(comments))
+            for name in COMMENT_COLUMNS[1:]:
+                rows[name].extend(getattr(comments, name))
+        else:
+            for comment in comments:
+                rows["post_id"].append(post["id"])
+                for name in COMMENT_COLUMNS[1:]:
+                    rows[name].append(comment.get(name))
+
+        self.count += 1
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+        self._posts.write_table(pa.Table.from_pydict(self._post_rows, schema=self._posts.schema))
+        self._comments.write_table(pa.Table.from_pydict(self._comment_rows, schema=self._comments.schema))
+        for rows in (self._post_rows, self._comment_rows):
+            for values in rows.values():
+                values.clear()
+        self._pending = 0
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._posts.close()
+        self._comments.close()
+        if self.on_flush:
+            self.on_flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def is_parquet_dataset(path):
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, POSTS_FILE))
+
+
+def _open_table(source, name):
+    """
+    A Parquet source for one table of a dataset: a dataset directory, or a .zip
+    (path or file object) holding the two tables
+    """
+    if isinstance(source, (str, os.PathLike)) and os.path.isdir(source):
+        return os.path.join(source, name)
+    with zipfile.ZipFile(source) as archive:
+        member = next((n for n in archive.namelist() if os.path.basename(n) == name), None)
+        if member is None:
+            raise ValueError(f"No {name} in the Parquet archive")
+        return pa.BufferReader(archive.read(member))
+
+
+def read_post_table(source, columns=None):
+    """
+    Load the posts table, or only the given columns of it
+    """
+    require_pyarrow()
+    return pq.read_table(_open_table(source, POSTS_FILE), columns=columns)
+
+
+def read_comment_table(source, columns=None):
+    """
+    Load the comments table, or only the given columns of it
+    """
+    require_pyarrow()
+    return pq.read_table(_open_table(source, COMMENTS_FILE), columns=columns)
+
+
+def dataset_summary(source):
+    """
+    Post and comment counts and the average post score. Counts come from the file
+    footers and only the score column is decoded.
+    """
+    require_pyarrow()
+    posts = pq.ParquetFile(_open_table(source, POSTS_FILE))
+    comments = pq.ParquetFile(_open_table(source, COMMENTS_FILE))
+    post_count = posts.metadata.num_rows
+    total_score = 0
+    for batch in posts.iter_batches(columns=["score"]):
+        total_score += pc.sum(batch.column(0)).as_py() or 0
+    return {
+        "posts": post_count,
+        "comments": comments.metadata.num_rows,
+        "avg_score": total_score / post_count if post_count else 0.0,
+    }
+
+
+def iter_dataset_posts(source, batch_size=ROW_GROUP_POSTS):
+    """
+    Yield posts as nested dicts, in the shape the scraper writes to JSON. Both tables
+    are read a batch at a time and merged on post_id, relying on comments having
+    been written in post order.
+    """
+    require_pyarrow()
+    posts = pq.ParquetFile(_open_table(source, POSTS_FILE))
+    comments = pq.ParquetFile(_open_table(source, COMMENTS_FILE))
+
+    def comment_rows():
+        for batch in comments.iter_batches(batch_size=batch_size * 50):
+            yield from batch.to_pylist()
+
+    pending_comments = comment_rows()
+    next_comment = next(pending_comments, None)
+    for batch in posts.iter_batches(batch_size=batch_size):
+        for post in batch.to_pylist():
+            post["comments"] = []
+            while next_comment is not None and next_comment["post_id"] == post["id"]:
+                del next_comment["post_id"]
+                post["comments"].append(next_comment)
+                next_comment = next(pending_comments, None)
+            # Keep the JSON field order, with comments before the truncation flag
+            post["comments_truncated"] = post.pop("comments_truncated")
+            yield post
+
+
+def write_dataset(posts, path, compression=DEFAULT_COMPRESSION):
+    """
+    Write posts to a Parquet dataset directory. Returns the number of posts.
+    """
+    with ParquetWriter(path, compression=compression) as writer:
+        for post in posts:
+            writer.write(post)
+    return writer.count
+
+
+def dataset_zip(posts):
+    """
+    Write posts as a Parquet dataset and return it zipped in a rewound temporary
+    file, ready for st.download_button. The tables are already compressed, so the
+    archive just stores them.
+    """
+    workdir = tempfile.mkdtemp()
+    try:
+        write_dataset(posts, workdir)
+        return zip_dataset(workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def zip_dataset(path):
+    """
+    A Parquet dataset directory zipped into a rewound temporary file
+    """
+    out = tempfile.TemporaryFile(buffering=0)
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as archive:
+        archive.write(os.path.join(path, POSTS_FILE), POSTS_FILE)
+        archive.write(os.path.join(path, COMMENTS_FILE), COMMENTS_FILE)
+    out.seek(0)
+    return out
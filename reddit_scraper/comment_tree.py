@@ -0,0 +1,161 @@
+"""
+Reply structure of a post's comments.
+
+The scraper stores a post's comments flat, each with a parent_id: t1_<comment id>
+for a reply, t3_<post id> for a top-level comment. CommentTree indexes them in a
+few linear passes (an id -> position map, then each comment linked under its
+parent) and walks the result with an explicit stack, so a 100K-comment thread,
+or a reply chain thousands of levels deep, costs linear time and memory and
+never touches the recursion limit.
+
+Comments whose parent isn't in the list (cut by a comment limit, or deleted)
+are treated as top-level, so every comment appears exactly once.
+"""
+from array import array
+
+from reddit_scraper.records import CommentRecords
+
+
+class CommentTree:
+    """
+    Index over a post's comments, given as CommentRecords or a list of comment dicts.
+    Comments are referred to by their position in that list.
+
+        roots        positions of the top-level comments, in input order
+        parent[i]    position of comment i's parent, or -1 for a top-level comment
+        order        every position in reading order (each comment before its replies)
+        depth[i]     0 for a top-level comment, 1 for a reply to one, ...
+        replies[i]   number of comments below comment i, at any depth
+        height[i]    levels of replies below comment i (0 if it has none)
+    """
+
+    __slots__ = ("comments", "roots", "parent", "first_child", "next_sibling", "order", "depth", "replies",
+                 "height")
+
+    def __init__(self, comments):
+        self.comments = comments
+        if isinstance(comments, CommentRecords):
+            ids, parent_ids = comments.id, comments.parent_id
+        else:
+            ids = [comment.get("id") for comment in comments]
+            parent_ids = [comment.get("parent_id") for comment in comments]
+        n = len(ids)
+
+        index = {comment_id: i for i, comment_id in enumerate(ids)}
+        parent = array("i", [-1]) * n
+        for i, parent_id in enumerate(parent_ids):
+            if parent_id and parent_id.startswith("t1_"):
+                parent[i] = index.get(parent_id[3:], -1)
+        del index
+
+        # Children as linked lists, built back to front so siblings keep their input order
+        first_child = array("i", [-1]) * n
+        next_sibling = array("i", [-1]) * n
+        roots = []
+        for i in range(n - 1, -1, -1):
+            p = parent[i]
+            if p < 0:
+                roots.append(i)
+            else:
+                next_sibling[i] = first_child[p]
+                first_child[p] = i
+        roots.reverse()
+
+        self.roots = roots
+        self.parent = parent
+        self.first_child = first_child
+        self.next_sibling = next_sibling
+        self._walk()
+        self._count()
+
+    def _walk(self):
+        n = len(self.parent)
+        first_child, next_sibling = self.first_child, self.next_sibling
+        order = array("i")
+        depth = array("i", [0]) * n
+        visited = bytearray(n)
+
+        def walk(start):
+            visited[start] = 1
+            order.append(start)
+            stack = []
+            child = first_child[start]
+            if child >= 0 and not visited[child]:
+                depth[child] = depth[start] + 1
+                stack.append(child)
+            while stack:
+                i = stack.pop()
+                if visited[i]:
+                    continue
+                visited[i] = 1
+                order.append(i)
+                # The next sibling waits on the stack until this comment's replies are done
+                sibling, child = next_sibling[i], first_child[i]
+                if sibling >= 0 and not visited[sibling]:
+                    depth[sibling] = depth[i]
+                    stack.append(sibling)
+                if child >= 0 and not visited[child]:
+                    depth[child] = depth[i] + 1
+                    stack.append(child)
+
+        for root in self.roots:
+            walk(root)
+        if len(order) < n:
+            # Only corrupt data gets here: comments replying to each other in a loop,
+            # which no top-level comment leads to. Each loop is broken at its first comment.
+            for i in range(n):
+                if not visited[i]:
+                    self.parent[i] = -1
+                    self.roots.append(i)
+                    walk(i)
+
+        self.order = order
+        self.depth = depth
+
+    def _count(self):
+        n = len(self.parent)
+        parent = self.parent
+        replies = array("i", [0]) * n
+        height = array("i", [0]) * n
+        # Replies come after their parent in reading order, so going backwards every
+        # comment is complete before it is added to its parent
+        for i in reversed(self.order):
+            p = parent[i]
+            if p >= 0:
+                replies[p] += replies[i] + 1
+                if height[i] >= height[p]:
+                    height[p] = height[i] + 1
+        self.replies = replies
+        self.height = height
+
+    def __len__(self):
+        return len(self.parent)
+
+    def children(self, i):
+        """
+        Positions of the direct replies to comment i, in input order
+        """
+        child = self.first_child[i]
+        while child >= 0:
+            yield child
+            child = self.next_sibling[child]
+
+    def threads(self):
+        """
+        Yield (position, depth) for every comment in reading order
+        """
+        depth = self.depth
+        for i in self.order:
+            yield i, depth[i]
+
+    def stats(self):
+        """
+        Shape of the whole thread
+        """
+        return {
+            "comments": len(self),
+            "top_level": len(self.roots),
+            # Levels of the deepest reply chain, top-level comments being the first
+            "levels": max(self.depth, default=-1) + 1,
+            "largest_thread": max((self.replies[i] + 1 for i in self.roots), default=0),
+        }
@@ -0,0 +1,398 @@
+"""
+Content-addressed local store for scrape runs.
+
+Overlapping scrapes (hot and top of the same subreddit, or the same listing on
+consecutive days) mostly save posts and comments that earlier runs already saved.
+The store keeps every distinct version of a post or comment once, keyed by a hash
+of its content (id, text, score and the other fields), and records each run as a
+dataset: a manifest listing, in order, which post version and which comment
+versions it held. A new run only adds the records that are new or changed;
+everything else is a 16-byte reference in its manifest.
+
+A dataset materializes back into exactly the posts that were written to it, so
+the cleaner, the search index and the app can read it like any scrape file. It
+is addressed as "<store file>#<dataset name>", e.g. scrape_store.db#python_hot_20250101-120000.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from reddit_scraper.records import CommentRecords, json_default
+
+DEFAULT_STORE_PATH = "scrape_store.db"
+DIGEST_SIZE = 16
+# Manifest rows read per batch when materializing; their comments are fetched together
+READ_BATCH_POSTS = 200
+# Stay under SQLite's limit on query parameters
+MAX_PARAMS = 900
+
+
+def store_ref(path, dataset):
+    return f"{path}#{dataset}"
+
+
+def split_store_ref(ref):
+    """
+    (store path, dataset name) for a "<store file>#<dataset>" reference, or None
+    """
+    path, sep, dataset = str(ref).rpartition("#")
+    if not sep or not dataset or not os.path.isfile(path):
+        return None
+    return path, dataset
+
+
+def is_store(path):
+    """
+    True for an SQLite file holding a scrape store
+    """
+    if not os.path.isfile(path):
+        return False
+    with open(path, "rb") as f:
+        if f.read(16) != b"SQLite format 3\x00":
+            return False
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'manifest'").fetchone() is not None
+    finally:
+        conn.close()
+
+
+def run_dataset_name(name):
+    """
+    A dataset name for one run of a scrape, e.g. python_hot_20250101-120000
+    """
+    return f"{name}_{datetime.now():%Y%m%d-%H%M%S}"
+
+
+def _digest(text):
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=json_default)
+
+
+def comment_rows(comments):
+    """
+    (digest, id, parent_id, body, author, score) for each comment, in order
+    """
+    if isinstance(comments, CommentRecords):
+        rows = zip(comments.id, comments.parent_id, comments.body, comments.author, comments.score)
+    else:
+        rows = ((c.get("id"), c.get("parent_id"), c.get("body"), c.get("author"), c.get("score")) for c in comments)
+    return [(_digest(_dumps(row)), *row) for row in rows]
+
+
+class ScrapeStore:
+    """
+    The store file. Open one per thread; SQLite serializes the writers.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=60)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                digest BLOB PRIMARY KEY,
+                id TEXT,
+                data TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS comments (
+                digest BLOB PRIMARY KEY,
+                id TEXT,
+                parent_id TEXT,
+                body TEXT,
+                author TEXT,
+                score INTEGER
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS datasets (
+                name TEXT PRIMARY KEY,
+                created_at INTEGER NOT NULL,
+                finished_at INTEGER,
+                posts INTEGER NOT NULL DEFAULT 0,
+                comments INTEGER NOT NULL DEFAULT 0,
+                new_posts INTEGER NOT NULL DEFAULT 0,
+                new_comments INTEGER NOT NULL DEFAULT 0,
+                text_bytes INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE TABLE IF NOT EXISTS manifest (
+                dataset TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                post_digest BLOB NOT NULL,
+                comment_digests BLOB NOT NULL,
+                PRIMARY KEY (dataset, position)
+            ) WITHOUT ROWID;
+            """
+        )
+        self._conn.commit()
+
+    # -- writing ----------------------------------------------------------
+    def writer(self, dataset, batch_size=100, on_flush=None, append=False):
+        return StoreWriter(self, dataset, batch_size=batch_size, on_flush=on_flush, append=append)
+
+    # -- reading ----------------------------------------------------------
+    def datasets(self):
+        """
+        Every dataset, oldest first, with its post and comment counts and how many of
+        them were new to the store when it was written
+        """
+        rows = self._conn.execute(
+            "SELECT name, created_at, finished_at, posts, comments, new_posts, new_comments, text_bytes "
+            "FROM datasets ORDER BY created_at, name"
+        ).fetchall()
+        return [dict(zip(("name", "created_at", "finished_at", "posts", "comments", "new_posts", "new_comments",
+                          "text_bytes"), row)) for row in rows]
+
+    def dataset(self, name):
+        return next((d for d in self.datasets() if d["name"] == name), None)
+
+    def iter_posts(self, dataset):
+        """
+        Yield the posts of a dataset in the order they were written, as they were
+        written (comments come back as CommentRecords)
+        """
+        if self.dataset(dataset) is None:
+            raise KeyError(f"No dataset '{dataset}' in {self.path}")
+        manifest = self._conn.execute(
+            "SELECT post_digest, comment_digests FROM manifest WHERE dataset = ? ORDER BY position", (dataset,)
+        )
+        while True:
+            batch = manifest.fetchmany(READ_BATCH_POSTS)
+            if not batch:
+                return
+            posts = self._lookup("SELECT digest, data FROM posts", {digest for digest, _ in batch})
+            comment_digests = [[blob[i:i + DIGEST_SIZE] for i in range(0, len(blob), DIGEST_SIZE)]
+                               for _, blob in batch]
+            comments = self._lookup("SELECT digest, id, parent_id, body, author, score FROM comments",
+                                    {digest for digests in comment_digests for digest in digests})
+            for (post_digest, _), digests in zip(batch, comment_digests):
+                post = json.loads(posts[post_digest][0])
+                if "comments" in post:
+                    # Filling the placeholder keeps the key where the scraper put it
+                    records = CommentRecords()
+                    for digest in digests:
+                        row = comments[digest]
+                        for column, value in zip((records.id, records.parent_id, records.body, records.author,
+                                                  records.score), row):
+                            column.append(value)
+                    post["comments"] = records
+                yield post
+
+    def _lookup(self, query, digests):
+        found = {}
+        digests = list(digests)
+        for i in range(0, len(digests), MAX_PARAMS):
+            batch = digests[i:i + MAX_PARAMS]
+            for row in self._conn.execute(f"{query} WHERE digest IN ({','.join('?' * len(batch))})", batch):
+                found[row[0]] = row[1:]
+        return found
+
+    def stats(self):
+        """
+        Distinct records stored against the records all datasets refer to
+        """
+        posts, comments = (self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                           for table in ("posts", "comments"))
+        datasets, referenced_posts, referenced_comments = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(posts), 0), COALESCE(SUM(comments), 0) FROM datasets"
+        ).fetchone()
+        return {
+            "datasets": datasets,
+            "posts": posts,
+            "comments": comments,
+            "referenced_posts": referenced_posts,
+            "referenced_comments": referenced_comments,
+            "size_bytes": os.path.getsize(self.path),
+        }
+
+    # -- housekeeping -----------------------------------------------------
+    def remove(self, dataset):
+        """
+        Drop a dataset and every record no other dataset refers to. Returns the number
+        of (posts, comments) deleted.
+        """
+        self._conn.execute("DELETE FROM manifest WHERE dataset = ?", (dataset,))
+        self._conn.execute("DELETE FROM datasets WHERE name = ?", (dataset,))
+        removed = self.prune()
+        self._conn.commit()
+        return removed
+
+    def prune(self):
+        """
+        Delete the records no manifest refers to
+        """
+        conn = self._conn
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS live (digest BLOB PRIMARY KEY) WITHOUT ROWID")
+        conn.execute("DELETE FROM live")
+        for post_digest, blob in conn.execute("SELECT post_digest, comment_digests FROM manifest").fetchall():
+            conn.executemany("INSERT OR IGNORE INTO live VALUES (?)",
+                             [(post_digest,)] + [(blob[i:i + DIGEST_SIZE],) for i in range(0, len(blob), DIGEST_SIZE)])
+        removed = []
+        for table in ("posts", "comments"):
+            before = conn.total_changes
+            conn.execute(f"DELETE FROM {table} WHERE digest NOT IN (SELECT digest FROM live)")
+            removed.append(conn.total_changes - before)
+        conn.execute("DELETE FROM live")
+        return tuple(removed)
+
+    def vacuum(self):
+        self._conn.execute("VACUUM")
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class StoreWriter:
+    """
+    Writes posts into a dataset of the store. Same interface as the writers in
+    writers.py: posts are buffered and written every batch_size posts, in one
+    transaction that only inserts the post and comment versions the store doesn't
+    have yet, and on_flush is called once the batch is committed.
+
+    Writing to an existing dataset replaces it, unless append=True. Its counts
+    start again from zero, and on close the records only the old version used
+    are pruned.
+    """
+
+    def __init__(self, store, dataset, batch_size=100, on_flush=None, append=False):
+        self.store = store
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.count = 0
+        self.new_posts = 0
+        self.new_comments = 0
+        self._closed = False
+        self._owns_store = False
+        self._posts = []
+        self._comments = []
+        self._manifest = []
+        self._totals = [0, 0, 0]  # comments, new posts, new comments
+        self._replaced = False
+
+        conn = store._conn
+        if append:
+            row = conn.execute("SELECT posts, comments, new_posts, new_comments FROM datasets WHERE name = ?",
+                               (dataset,)).fetchone()
+            if row:
+                self.count, self._totals[0], self._totals[1], self._totals[2] = row
+        else:
+            before = conn.total_changes
+            conn.execute("DELETE FROM manifest WHERE dataset = ?", (dataset,))
+            self._replaced = conn.total_changes > before
+        conn.execute("INSERT OR IGNORE INTO datasets (name, created_at) VALUES (?, ?)", (dataset, int(time.time())))
+        conn.execute("UPDATE datasets SET finished_at = NULL WHERE name = ?", (dataset,))
+        if not append:
+            # The old version's counts go with its manifest, even if this run writes nothing
+            conn.execute("UPDATE datasets SET posts = 0, comments = 0, new_posts = 0, new_comments = 0, "
+                         "text_bytes = 0 WHERE name = ?", (dataset,))
+        conn.commit()
+        self._text_bytes = conn.execute("SELECT text_bytes FROM datasets WHERE name = ?",
+                                        (dataset,)).fetchone()[0] if append else 0
+
+    @classmethod
+    def open(cls, ref, **options):
+        """
+        Writer for a "<store file>#<dataset>" reference; the store file is created if needed
+        """
+        path, sep, dataset = ref.rpartition("#")
+        if not sep or not path or not dataset:
+            raise ValueError(f"Expected <store file>#<dataset name>, got '{ref}'")
+        writer = cls(ScrapeStore(path), dataset, **options)
+        writer._owns_store = True
+        return writer
+
+    def write(self, post):
+        comments = comment_rows(post.get("comments") or ())
+        # "comments" stays in the post record as a placeholder, so key order survives the round trip
+        data = _dumps({key: None if key == "comments" else value for key, value in post.items()})
+        digest = _digest(data)
+        self._posts.append((digest, post.get("id"), data))
+        self._comments.extend(comments)
+        self._manifest.append((self.dataset, self.count, digest, b"".join(row[0] for row in comments)))
+        self._text_bytes += len(data) + sum(len(row[3] or "") for row in comments)
+        self._totals[0] += len(comments)
+        self.count += 1
+        if len(self._manifest) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        conn = self.store._conn
+        if self._manifest:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO posts VALUES (?, ?, ?)", self._posts)
+            new_posts = conn.total_changes - before
+            conn.executemany("INSERT OR IGNORE INTO comments VALUES (?, ?, ?, ?, ?, ?)", self._comments)
+            new_comments = conn.total_changes - before - new_posts
+            conn.executemany("INSERT OR REPLACE INTO manifest VALUES (?, ?, ?, ?)", self._manifest)
+            self._totals[1] += new_posts
+            self._totals[2] += new_comments
+            conn.execute(
+                "UPDATE datasets SET posts = ?, comments = ?, new_posts = ?, new_comments = ?, text_bytes = ? "
+                "WHERE name = ?",
+                (self.count, *self._totals, self._text_bytes, self.dataset),
+            )
+            conn.commit()
+            self._posts, self._comments, self._manifest = [], [], []
+        self.new_posts, self.new_comments = self._totals[1], self._totals[2]
+        if self.on_flush:
+            self.on_flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self.flush()
+        conn = self.store._conn
+        conn.execute("UPDATE datasets SET finished_at = ? WHERE name = ?", (int(time.time()), self.dataset))
+        if self._replaced:
+            # Records the replaced version used and nothing else (this run included) still does
+            self.store.prune()
+        conn.commit()
+        self._closed = True
+        if self._owns_store:
+            self.store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_store_dataset(ref):
+    """
+    Yield the posts of a "<store file>#<dataset>" reference
+    """
+    path, dataset = split_store_ref(ref)
+    with ScrapeStore(path) as store:
+        yield from store.iter_posts(dataset)
+
+
+def expand_store(path):
+    """
+    "<store file>#<dataset>" references for every dataset in a store
+    """
+    with ScrapeStore(path) as store:
+        return [store_ref(path, d["name"]) for d in store.datasets()]
+
+
+def dataset_text_bytes(ref):
+    """
+    Approximate size of a dataset's text (post records and comment bodies)
+    """
+    path, dataset = split_store_ref(ref)
+    with ScrapeStore(path) as store:
+        info = store.dataset(dataset)
+    return info["text_bytes"] if info else 0
@@ -0,0 +1,71 @@
+"""
+reddit-scraper index: build and query a local full-text index over scrape files.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+from reddit_scraper.search_index import DEFAULT_INDEX_PATH, SearchIndex
+
+def add_main(args):
+    start = time.perf_counter()
+    total_indexed = 0
+    with SearchIndex(args.index) as index:
+        for path, result in index.add_files(args.inputs, force=args.force):
+            if result is None:
+                print(f"⏭️  {path} (unchanged)")
+                continue
+            seen, indexed = result
+            total_indexed += indexed
+            print(f"✅ {path}: {indexed} of {seen} posts indexed")
+        if args.optimize:
+            index.optimize()
+        stats = index.stats()
+    print(f"\n✅ Indexed {total_indexed} posts in {time.perf_counter() - start:.2f}s. "
+          f"'{args.index}' now holds {stats['posts']} posts and {stats['comments']} comments "
+          f"from {stats['sources']} files")
+
+def search_main(args):
+    with SearchIndex(args.index) as index:
+        start = time.perf_counter()
+        try:
+            hits = index.search(args.query, limit=args.limit, raw=args.raw)
+        except sqlite3.OperationalError as e:
+            # FTS5 rejects malformed --raw queries (unbalanced parentheses, a trailing AND, ...)
+            print(f"❌ Invalid search query: {e}")
+            sys.exit(1)
+        elapsed = time.perf_counter() - start
+
+    print(f"{len(hits)} results in {elapsed * 1000:.1f} ms\n")
+    for i, hit in enumerate(hits, start=1):
+        where = f"comment by {hit['author']}" if hit["kind"] == "comment" else f"post by {hit['author']}"
+        print(f"{i}. {hit['title']}  [{where}, score {hit['score']}]")
+        print(f"   {hit['snippet']}")
+        if hit["url"]:
+            print(f"   {hit['url']}")
+        print()
+
+def main(argv, prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Build and query a local full-text index over scraped posts and comments.",
+    )
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH, help=f"index file (default: {DEFAULT_INDEX_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="index scrape files; files already indexed are only re-read if they changed")
+    add.add_argument("inputs", nargs="+", help="JSON/JSONL files, Parquet datasets, directories or glob patterns (quote globs)")
+    add.add_argument("--force", action="store_true", help="re-read files even if they haven't changed")
+    add.add_argument("--optimize", action="store_true", help="merge the index into one segment afterwards (faster queries)")
+
+    search = commands.add_parser("search", help="ranked search over titles, post text and comments")
+    search.add_argument("query", help="words to look for; end a word with * for prefix matches")
+    search.add_argument("--limit", type=int, default=20, help="number of results (default: 20)")
+    search.add_argument("--raw", action="store_true", help="use FTS5 query syntax as-is (OR, NEAR, \"phrases\")")
+
+    args = parser.parse_args(argv)
+    if args.command == "add":
+        add_main(args)
+    else:
+        search_main(args)
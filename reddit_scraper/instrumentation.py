@@ -0,0 +1,436 @@
+"""
+Per-stage timers and counters for a scrape run, with optional profiling.
+
+    stats = RunStats(profile="sample")
+    with stats.bind():
+        for submission, post in iter_posts(session, "python", limit=100):
+            ...
+    stats.finish()
+    print("\\n".join(describe_report(stats.report())))
+    stats.save("run_report.json")
+
+Code anywhere in the pipeline records into whichever RunStats is bound to the
+current context with stage(), count() and observe(), and they cost next to nothing
+when none is bound. Work handed to a thread pool keeps recording into the run that
+submitted it when the task is wrapped with propagate().
+
+Stage times are summed over every thread working for the run, so with concurrent
+workers they can add up to more than the wall time.
+"""
+import contextvars
+import cProfile
+import json
+import os
+import platform
+import pstats
+import statistics
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+PROFILERS = ("cprofile", "sample")
+
+# Pipeline stages, in the order they happen to a post
+STAGES = ("listing", "load_comments", "keyword_filter", "replace_more", "flatten", "serialize")
+# Time spent on HTTP, which the pipeline stages above include
+NETWORK_STAGES = ("http", "rate_limit_wait")
+
+SAMPLE_INTERVAL = 0.005
+TOP_FUNCTIONS = 25
+
+_current = contextvars.ContextVar("run_stats", default=None)
+
+
+def current():
+    """
+    The RunStats bound to the current context, or None
+    """
+    return _current.get()
+
+
+@contextmanager
+def stage(name):
+    """
+    Add the time spent in the block to a stage of the current run
+    """
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.add_time(name, time.perf_counter() - start)
+
+
+def count(name, n=1):
+    stats = _current.get()
+    if stats is not None:
+        stats.count(name, n)
+
+
+def observe(name, value):
+    stats = _current.get()
+    if stats is not None:
+        stats.observe(name, value)
+
+
+_DONE = object()
+
+
+def timed_iter(name, iterable):
+    """
+    Yield from iterable, adding the time taken to produce each item (e.g. a listing
+    page request) to a stage
+    """
+    items = iter(iterable)
+    while True:
+        with stage(name):
+            item = next(items, _DONE)
+        if item is _DONE:
+            return
+        yield item
+
+
+def propagate(func):
+    """
+    Wrap func so it records into the current run when called on another thread
+    """
+    stats = _current.get()
+    if stats is None:
+        return func
+
+    def bound(*args, **kwargs):
+        with stats.bind():
+            return func(*args, **kwargs)
+    return bound
+
+
+def endpoint_name(url):
+    """
+    Group API requests by what they fetch
+    """
+    path = urlparse(url).path
+    if path.endswith("/access_token"):
+        return "auth"
+    if path.startswith("/api/morechildren"):
+        return "morechildren"
+    if "/comments/" in path:
+        # MoreComments "continue this thread" stubs re-request the post at a comment
+        return "continue_thread" if "/_/" in path else "comments"
+    if path.startswith("/r/"):
+        return "listing"
+    return "other"
+
+
+def summarize(values):
+    if not values:
+        return {"count": 0, "mean": None, "p50": None, "p95": None, "max": None}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "p50": ordered[(len(ordered) - 1) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stack of every thread working for a run at a fixed interval,
+    from a background thread. Unlike cProfile it sees pool workers and adds almost
+    no overhead to the code being measured.
+    """
+
+    def __init__(self, threads, interval=SAMPLE_INTERVAL):
+        # threads: callable returning the ids of the threads to sample
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._threads = threads
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident in self._threads():
+                frame = frames.get(ident)
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def top(self, n=TOP_FUNCTIONS):
+        """
+        Functions by inclusive samples, with their self samples
+        """
+        own = Counter()
+        total = Counter()
+        for stack, samples in self.stacks.items():
+            functions = stack.split(";")
+            own[functions[-1]] += samples
+            for function in set(functions):
+                total[function] += samples
+        return [{
+            "function": function,
+            "self_seconds": own[function] * self.interval,
+            "total_seconds": samples * self.interval,
+            "total_pct": 100 * samples / self.samples,
+        } for function, samples in total.most_common(n)]
+
+    def folded(self):
+        """
+        Collapsed stacks ("a;b;c count" per line), the input format of flamegraph.pl
+        and speedscope
+        """
+        return "".join(f"{stack} {samples}\n" for stack, samples in self.stacks.most_common())
+
+
+class RunStats:
+    """
+    Stage timers, counters and value distributions for one run, safe to update
+    from several threads. profile may be "cprofile" or "sample" (see
+    SamplingProfiler).
+
+    cprofile is deterministic and profiles the thread that first binds the run
+    (on Python 3.12+ a profiler sees every thread, before that only its own).
+    Only one cProfile can be active per process on 3.12+, so a run that finds
+    another one running (e.g. a second profiled scrape in the app) samples instead.
+    """
+
+    def __init__(self, profile=None):
+        if profile not in (None,) + PROFILERS:
+            raise ValueError(f"Unknown profiler '{profile}', choose from {', '.join(PROFILERS)}")
+        self.profile = profile
+        self.started = datetime.now(timezone.utc)
+        self.finished = None
+        self._start = time.perf_counter()
+        self._wall = None
+        self._lock = threading.Lock()
+        self._times = defaultdict(float)
+        self._calls = Counter()
+        self._counters = Counter()
+        self._values = defaultdict(list)
+        # Thread id -> bind() depth; only the outermost bind of a thread profiles it
+        self._threads = {}
+        self._profiles = []
+        self._profiled_thread = None
+        self._sampler = SamplingProfiler(self._active_threads) if profile == "sample" else None
+        if self._sampler:
+            self._sampler.start()
+
+    def _active_threads(self):
+        with self._lock:
+            return list(self._threads)
+
+    # -- recording --------------------------------------------------------
+    @contextmanager
+    def bind(self):
+        """
+        Make this the current run for the block
+        """
+        token = _current.set(self)
+        ident = threading.get_ident()
+        with self._lock:
+            outermost = ident not in self._threads
+            self._threads[ident] = self._threads.get(ident, 0) + 1
+            if outermost and self.profile == "cprofile" and self._profiled_thread is None:
+                self._profiled_thread = ident
+        profiler = None
+        if outermost and self.profile == "cprofile" and self.finished is None and ident == self._profiled_thread:
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                # Another profiler is already active (Python 3.12+ allows only one)
+                profiler = None
+                self._sample_instead()
+        try:
+            yield self
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                with self._lock:
+                    self._profiles.append(profiler)
+            with self._lock:
+                self._threads[ident] -= 1
+                if not self._threads[ident]:
+                    del self._threads[ident]
+            _current.reset(token)
+
+    def _sample_instead(self):
+        with self._lock:
+            if self._sampler is not None:
+                return
+            self.profile = "sample"
+            self._sampler = SamplingProfiler(self._active_threads)
+        self._sampler.start()
+
+    def add_time(self, name, seconds):
+        with self._lock:
+            self._times[name] += seconds
+            self._calls[name] += 1
+
+    def count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def observe(self, name, value):
+        with self._lock:
+            self._values[name].append(value)
+
+    def record_request(self, url, seconds, response):
+        """
+        Count one HTTP response: its endpoint, size and time on the wire
+        """
+        size = len(response.content or b"")
+        with self._lock:
+            self._times["http"] += seconds
+            self._calls["http"] += 1
+            self._counters["api_calls"] += 1
+            self._counters[f"api_calls.{endpoint_name(url)}"] += 1
+            self._counters["bytes_received"] += size
+            if response.status_code >= 400:
+                self._counters["api_errors"] += 1
+
+    # -- reporting --------------------------------------------------------
+    def finish(self):
+        """
+        Stop the clock and any profiler. Safe to call more than once.
+        """
+        if self.finished is not None:
+            return
+        self._wall = time.perf_counter() - self._start
+        self.finished = datetime.now(timezone.utc)
+        if self._sampler:
+            self._sampler.stop()
+
+    def _profile_stats(self):
+        with self._lock:
+            profiles = list(self._profiles)
+        return pstats.Stats(*profiles) if profiles else None
+
+    def profile_top(self, n=TOP_FUNCTIONS):
+        if self._sampler:
+            return self._sampler.top(n)
+        stats = self._profile_stats()
+        if stats is None:
+            return []
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:n]
+        return [{
+            "function": f"{os.path.basename(filename)}:{line}:{function}",
+            "calls": calls,
+            "self_seconds": own,
+            "total_seconds": total,
+        } for (filename, line, function), (_, calls, own, total, _) in rows]
+
+    def report(self):
+        """
+        Everything recorded so far as a JSON-serializable dict
+        """
+        wall = self._wall if self._wall is not None else time.perf_counter() - self._start
+        with self._lock:
+            times = dict(self._times)
+            calls = dict(self._calls)
+            counters = dict(self._counters)
+            values = {name: list(v) for name, v in self._values.items()}
+
+        names = [s for s in STAGES + NETWORK_STAGES if s in times] + sorted(set(times) - set(STAGES + NETWORK_STAGES))
+        stages = {name: {
+            "seconds": times[name],
+            "calls": calls[name],
+            "mean_ms": times[name] / calls[name] * 1000,
+        } for name in names}
+
+        endpoints = {k.split(".", 1)[1]: v for k, v in counters.items() if k.startswith("api_calls.")}
+        counters = {k: v for k, v in counters.items() if not k.startswith("api_calls.")}
+        counters["more_expansions"] = endpoints.get("morechildren", 0) + endpoints.get("continue_thread", 0)
+
+        return {
+            "started": self.started.isoformat(),
+            "finished": self.finished.isoformat() if self.finished else None,
+            "wall_seconds": wall,
+            "stages": stages,
+            "counters": counters,
+            "api_calls_by_endpoint": endpoints,
+            "distributions": {name: summarize(v) for name, v in values.items()},
+            "profile": {"mode": self.profile, "top": self.profile_top()} if self.profile else None,
+            "python": platform.python_version(),
+        }
+
+    def save(self, path):
+        """
+        Write the report as JSON. A profile is written next to it: pstats data
+        (<name>.prof, for snakeviz or python -m pstats) or collapsed stacks
+        (<name>.folded, for flamegraph.pl or speedscope).
+        """
+        self.finish()
+        report = self.report()
+        if self.profile:
+            base = os.path.splitext(path)[0]
+            if self._sampler:
+                report["profile"]["file"] = base + ".folded"
+                with open(base + ".folded", "w", encoding="utf-8") as f:
+                    f.write(self._sampler.folded())
+            elif self._profile_stats() is not None:
+                report["profile"]["file"] = base + ".prof"
+                self._profile_stats().dump_stats(base + ".prof")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        return report
+
+
+def format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def describe_report(report):
+    """
+    Human readable lines summarizing a RunStats report
+    """
+    lines = [f"⏱️  Run breakdown ({report['wall_seconds']:.2f}s wall)"]
+    for name, info in report["stages"].items():
+        note = "  (inside the stages above)" if name == NETWORK_STAGES[0] else ""
+        lines.append(f"  {name:<16} {info['seconds']:>8.2f}s  {info['calls']:>7} calls  "
+                     f"{info['mean_ms']:>8.1f} ms avg{note}")
+
+    counters = report["counters"]
+    endpoints = ", ".join(f"{name} {n}" for name, n in sorted(report["api_calls_by_endpoint"].items(),
+                                                                 key=lambda item: -item[1]))
+    lines.append(f"  API calls: {counters.get('api_calls', 0)}" + (f" ({endpoints})" if endpoints else "")
+                 + f" · {format_bytes(counters.get('bytes_received', 0))} received"
+                 + f" · {counters['more_expansions']} MoreComments expansions")
+
+    per_post = report["distributions"].get("comments_per_post")
+    if per_post and per_post["count"]:
+        lines.append(f"  Posts: {counters.get('posts_seen', 0)} seen, {counters.get('posts_kept', 0)} kept, "
+                     f"{counters.get('posts_truncated', 0)} truncated · comments per post: mean {per_post['mean']:.1f}, "
+                     f"p50 {per_post['p50']}, p95 {per_post['p95']}, max {per_post['max']}")
+
+    if report.get("profile") and report["profile"]["top"]:
+        lines.append(f"  Top functions ({report['profile']['mode']}):")
+        for row in report["profile"]["top"][:10]:
+            lines.append(f"    {row['total_seconds']:>8.2f}s  {row['function']}")
+    return lines
@@ -0,0 +1,187 @@
+"""
+Background jobs for the Streamlit app.
+
+A Streamlit script reruns from the top on every widget change, so work done
+inline (under st.spinner) blocks the session and is thrown away by the next
+interaction. JobManager runs that work on a thread pool owned by the server
+process instead: submit() returns a Job at once, the script polls its progress
+on each rerun, and the result is picked up whenever the user comes back to it.
+
+Jobs are shared by every session. Submitting work with the same key as a job
+that is still queued or running attaches to that job instead of starting a
+duplicate, and a job is only cancelled once every session that submitted it has
+cancelled it.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+DEFAULT_MAX_JOBS = 2
+# Finished jobs are forgotten after this long
+DEFAULT_KEEP_SECONDS = 60 * 60
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job by Job.check_cancelled() once it has been cancelled
+    """
+
+
+class Job:
+    """
+    One unit of background work. The job function reports through progress() and
+    emit() and calls check_cancelled() between steps; the UI reads the attributes.
+    """
+
+    def __init__(self, name, key=None):
+        self.id = uuid.uuid4().hex[:8]
+        self.name = name
+        self.key = key
+        self.state = QUEUED
+        self.processed = 0
+        self.total = None
+        self.status = ""
+        self.result = None
+        # Partial results streamed by emit(), readable while the job runs
+        self.items = []
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.owners = set()
+        self._cancel = threading.Event()
+        self._future = None
+
+    def progress(self, processed, total=None, status=None):
+        self.processed = processed
+        if total is not None:
+            self.total = total
+        if status is not None:
+            self.status = status
+
+    def emit(self, item):
+        self.items.append(item)
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    @property
+    def active(self):
+        return self.state in ACTIVE_STATES
+
+    @property
+    def fraction(self):
+        if not self.total:
+            return 0.0
+        return min(1.0, self.processed / self.total)
+
+    @property
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def __repr__(self):
+        return f"Job({self.id}, {self.name!r}, {self.state})"
+
+
+class JobManager:
+    """
+    Runs jobs on a pool of max_jobs threads shared by the whole server process.
+    Jobs beyond that wait in the queue. Thread-safe.
+    """
+
+    def __init__(self, max_jobs=DEFAULT_MAX_JOBS, keep_seconds=DEFAULT_KEEP_SECONDS):
+        self.keep_seconds = keep_seconds
+        self._pool = ThreadPoolExecutor(max_workers=max_jobs, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, name="", key=None, owner=None, **kwargs):
+        """
+        Queue func(job, *args, **kwargs) and return its Job. Its return value becomes
+        job.result. With a key, an active job with the same key is returned instead.
+        """
+        with self._lock:
+            self._prune()
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and job.active:
+                        if owner is not None:
+                            job.owners.add(owner)
+                        return job
+            job = Job(name, key)
+            if owner is not None:
+                job.owners.add(owner)
+            self._jobs[job.id] = job
+        job._future = self._pool.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job, func, args, kwargs):
+        if job._cancel.is_set():
+            job.state = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.state = RUNNING
+        job.started_at = time.time()
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.state = DONE
+        except JobCancelled:
+            job.state = CANCELLED
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.state = FAILED
+        finally:
+            # The result carries whatever it needs from the streamed items
+            job.items = []
+            job.finished_at = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self, ids=None):
+        """
+        Known jobs, newest first; only those in ids if given
+        """
+        with self._lock:
+            self._prune()
+            jobs = [job for job in self._jobs.values() if ids is None or job.id in ids]
+        return sorted(jobs, key=lambda job: job.submitted_at, reverse=True)
+
+    def cancel(self, job_id, owner=None):
+        """
+        Withdraw owner from a job, cancelling it if nobody else is waiting on it.
+        A queued job is dropped at once; a running one stops at its next
+        check_cancelled(). Returns True if the job was cancelled.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or not job.active:
+                return False
+            job.owners.discard(owner)
+            if job.owners:
+                return False
+            job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            job.state = CANCELLED
+            job.finished_at = time.time()
+        return True
+
+    def _prune(self):
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.keep_seconds:
+                del self._jobs[job_id]
+
+    def shutdown(self):
+        with self._lock:
+            for job in self._jobs.values():
+                job._cancel.set()
+        self._pool.shutdown(cancel_futures=True)
@@ -0,0 +1,130 @@
+import re
+
+MATCH_MODES = ("substring", "word", "phrase", "regex")
+
+# How far into the comments the keyword filter may look:
+#   "all"    - expand the whole tree when the title and loaded comments don't match
+#   "loaded" - only check the comments returned with the first page, never expand to decide
+#   "none"   - only title and selftext
+COMMENT_KEYWORD_SCOPES = ("all", "loaded", "none")
+
+# Below this many keywords, substring mode uses plain `in` checks instead of the regex
+SMALL_KEYWORD_SET = 16
+
+
+def _trie_pattern(words, space=" "):
+    """
+    Build one regex from a list of literal words by merging common prefixes, so the
+    engine walks a trie instead of trying every alternative at every position.
+    Longer words are preferred where one word is a prefix of another.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def emit(node):
+        terminal = "" in node
+        branches = []
+        for char in sorted(k for k in node if k):
+            atom = space if char == " " else re.escape(char)
+            branches.append(atom + emit(node[char]))
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """
+    Match many keywords against text in a single regex pass.
+
+    Modes:
+      substring - case-insensitive substring match (the scraper's original behaviour)
+      word      - keywords must start and end on word boundaries
+      phrase    - like word, but any run of whitespace matches the spaces in a keyword
+      regex     - every keyword is a case-insensitive regular expression
+
+    Compile once per scrape and reuse it for every post and comment.
+    """
+
+    def __init__(self, keywords, mode="substring"):
+        if mode not in MATCH_MODES:
+            raise ValueError(f"Unknown keyword match mode '{mode}'. Expected one of {', '.join(MATCH_MODES)}")
+
+        self.mode = mode
+        self.keywords = [kw for kw in keywords if kw and kw.strip()]
+        self._lower = mode != "regex"
+        self._literals = None
+
+        if mode == "regex":
+            self._singles = {kw: re.compile(kw, re.IGNORECASE) for kw in self.keywords}
+            combined = "|".join(f"(?:{kw})" for kw in self.keywords)
+            self._pattern = re.compile(combined, re.IGNORECASE) if self.keywords else None
+            return
+
+        if mode == "phrase":
+            normalized = {kw: " ".join(kw.lower().split()) for kw in self.keywords}
+        else:
+            normalized = {kw: kw.lower() for kw in self.keywords}
+
+        space = r"\s+" if mode == "phrase" else " "
+        # Lookarounds rather than \b so keywords like "c++" still work in word mode
+        start, end = (r"(?<!\w)", r"(?!\w)") if mode in ("word", "phrase") else ("", "")
+
+        self._singles = {
+            kw: re.compile(start + _trie_pattern([norm], space) + end)
+            for kw, norm in normalized.items()
+        }
+        # For a handful of plain substrings, str's C search beats any regex
+        if mode == "substring" and len(normalized) <= SMALL_KEYWORD_SET:
+            self._literals = sorted(set(normalized.values()))
+
+        body = _trie_pattern(sorted(set(normalized.values())), space)
+        self._pattern = re.compile(start + "(?:" + body + ")" + end) if body else None
+        # A lookahead reports a match at every position, which hits() needs to find overlapping keywords
+        self._scan = re.compile("(?=(" + start + "(?:" + body + ")" + end + "))") if body else None
+
+    def __bool__(self):
+        return bool(self.keywords)
+
+    def _prepare(self, texts):
+        text = "\n".join(t for t in texts if t)
+        return text.lower() if self._lower else text
+
+    def matches(self, *texts):
+        """
+        Return True if any keyword occurs in any of the given texts
+        """
+        if self._pattern is None:
+            return False
+        text = self._prepare(texts)
+        if self._literals is not None:
+            return any(kw in text for kw in self._literals)
+        return self._pattern.search(text) is not None
+
+    def hits(self, *texts):
+        """
+        Return the set of keywords (as given) that occur in the texts
+        """
+        if self._pattern is None:
+            return set()
+        text = self._prepare(texts)
+
+        if self.mode == "regex":
+            if not self._pattern.search(text):
+                return set()
+            return {kw for kw, pattern in self._singles.items() if pattern.search(text)}
+
+        # Every occurrence of a keyword is contained in the longest match starting at the
+        # same position, so only the distinct matched strings need to be checked per keyword
+        found = {m.group(1) for m in self._scan.finditer(text)}
+        if not found:
+            return set()
+        return {kw for kw, pattern in self._singles.items() if any(pattern.search(s) for s in found)}
@@ -0,0 +1,260 @@
+import random
+import threading
+import time
+from collections import deque
+
+import prawcore
+from prawcore.rate_limit import RateLimiter as PrawcoreRateLimiter
+
+from reddit_scraper.instrumentation import count, current as current_stats, stage
+
+# Reddit allows roughly 100 OAuth requests per minute per client id
+DEFAULT_REQUESTS_PER_MINUTE = 100
+
+# Requests per second are reported over this many trailing seconds
+RPS_WINDOW_SECONDS = 10
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket shared by every Reddit client taking part in a scrape
+    """
+
+    max_retries = 0
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=10):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, now):
+        """
+        Take a token if one is available. Returns 0 on success, otherwise the seconds
+        to wait before trying again. Called with the lock held.
+        """
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """
+        Block until one request may be sent
+        """
+        while True:
+            with self._lock:
+                wait = self._reserve(time.monotonic())
+                if wait <= 0:
+                    return
+            time.sleep(wait)
+
+    def update(self, headers):
+        """
+        Feed back the headers of a finished request
+        """
+
+    def release(self):
+        """
+        A request that was acquired failed before any response arrived
+        """
+
+    def backoff(self, attempt, retry_after=None):
+        return 0
+
+
+class AdaptiveScheduler(RateLimiter):
+    """
+    Paces requests from every client in a scrape using Reddit's X-Ratelimit-Remaining
+    and X-Ratelimit-Reset headers, spreading whatever budget is left evenly over the
+    time left in the window. Until the first headers arrive (and after a window
+    resets) it falls back to the token bucket.
+
+    429 responses pause every client for an exponentially growing, jittered delay
+    (or the server's Retry-After) before the request is retried.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE, burst=10,
+                 max_retries=5, backoff_base=1.0, backoff_cap=60.0):
+        super().__init__(requests_per_minute, burst)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.remaining = None
+        self.reset_at = None
+        self.throttled = 0
+        self._budget = 0.0
+        self._in_flight = 0
+        self._next_slot = 0.0
+        self._paused_until = 0.0
+        self._waiting = 0
+        self._sent = deque()
+
+    def _reserve(self, now):
+        if now < self._paused_until:
+            return self._paused_until - now
+
+        if self.reset_at is None or now >= self.reset_at:
+            wait = super()._reserve(now)
+        elif self._budget < 1:
+            # Budget spent: nothing may go out until the window resets
+            return self.reset_at - now
+        else:
+            slot = max(now, self._next_slot)
+            if slot > now:
+                return slot - now
+            self._next_slot = now + (self.reset_at - now) / self._budget
+            self._budget -= 1
+            wait = 0
+
+        if wait <= 0:
+            self._in_flight += 1
+            self._sent.append(now)
+        return wait
+
+    def acquire(self):
+        with self._lock:
+            self._waiting += 1
+        try:
+            super().acquire()
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def update(self, headers):
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+            if remaining is None or reset is None:
+                return
+            now = time.monotonic()
+            self.remaining = float(remaining)
+            self.reset_at = now + float(reset)
+            # Requests already sent but not yet answered will still draw on the budget
+            self._budget = self.remaining - self._in_flight
+
+    def release(self):
+        with self._lock:
+            self._in_flight = max(0, self._in_flight - 1)
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Pause every client after a 429 response. Returns the pause in seconds.
+        """
+        if retry_after is not None:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                delay = self.backoff_base
+        else:
+            delay = min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+        delay *= random.uniform(0.5, 1.5)
+        with self._lock:
+            self.throttled += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def stats(self):
+        """
+        Current budget, queue depth and recent request rate
+        """
+        with self._lock:
+            now = time.monotonic()
+            while self._sent and self._sent[0] < now - RPS_WINDOW_SECONDS:
+                self._sent.popleft()
+            window_known = self.reset_at is not None and now < self.reset_at
+            return {
+                "remaining": int(self.remaining) if window_known else None,
+                "reset_in": round(self.reset_at - now) if window_known else None,
+                "queue": self._waiting,
+                "rps": len(self._sent) / RPS_WINDOW_SECONDS,
+                "throttled": self.throttled,
+            }
+
+    def postfix(self):
+        """
+        Compact stats for a tqdm postfix
+        """
+        stats = self.stats()
+        return {
+            "budget": "?" if stats["remaining"] is None else str(stats["remaining"]),
+            "reset": "?" if stats["reset_in"] is None else f"{stats['reset_in']}s",
+            "queue": stats["queue"],
+            "req/s": f"{stats['rps']:.1f}",
+        }
+
+
+def describe_stats(stats):
+    """
+    One-line, human readable version of AdaptiveScheduler.stats()
+    """
+    budget = "unknown" if stats["remaining"] is None else f"{stats['remaining']} left, resets in {stats['reset_in']}s"
+    text = f"API budget: {budget} · queue {stats['queue']} · {stats['rps']:.1f} req/s"
+    if stats["throttled"]:
+        text += f" · backed off {stats['throttled']}x"
+    return text
+
+
+class RateLimitedRequestor(prawcore.Requestor):
+    """
+    prawcore requestor that takes a slot from a shared rate limiter before every HTTP
+    call, reports the response headers back to it, and retries 429 responses after
+    the limiter's backoff. 5xx responses are left to prawcore, which already retries
+    them; retrying them here as well would multiply the attempts.
+    """
+
+    def __init__(self, *args, rate_limiter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rate_limiter = rate_limiter
+
+    def _send(self, *args, **kwargs):
+        # Time on the wire, recorded in the current run's stats (see instrumentation.py)
+        stats = current_stats()
+        start = time.perf_counter()
+        response = super().request(*args, **kwargs)
+        if stats is not None:
+            url = args[1] if len(args) > 1 else kwargs.get("url", "")
+            stats.record_request(url, time.perf_counter() - start, response)
+        return response
+
+    def request(self, *args, **kwargs):
+        limiter = self.rate_limiter
+        if limiter is None:
+            return self._send(*args, **kwargs)
+
+        attempt = 0
+        while True:
+            with stage("rate_limit_wait"):
+                limiter.acquire()
+            try:
+                response = self._send(*args, **kwargs)
+            except Exception:
+                limiter.release()
+                raise
+            limiter.update(response.headers)
+
+            if response.status_code != 429 or attempt >= limiter.max_retries:
+                return response
+            delay = limiter.backoff(attempt, response.headers.get("retry-after"))
+            count("retries")
+            with stage("rate_limit_wait"):
+                time.sleep(delay)
+            attempt += 1
+
+
+class SharedBudgetRateLimiter(PrawcoreRateLimiter):
+    """
+    Stand-in for prawcore's per-client rate limiter. Pacing is left to the shared
+    limiter in RateLimitedRequestor, so clients don't also sleep on their own view
+    of the headers.
+    """
+
+    def __init__(self):
+        super().__init__(window_size=600)
+
+    def delay(self):
+        return
@@ -0,0 +1,101 @@
+"""
+Compact in-memory form of a post's comments.
+
+A scraped post keeps its comments as CommentRecords: one list per field (parallel
+arrays) instead of one dict per comment. That is five list slots per comment
+rather than a dict of about 200 bytes, and only the fields the output needs are
+copied out of the PRAW objects, so the comment tree can be released as soon as
+it is flattened.
+
+CommentRecords behaves like the list of comment dicts it replaces (len, iteration
+and indexing give dicts), so code reading post["comments"] keeps working. The
+writers serialize it directly: JSON through json_default, Parquet by extending
+its columns with whole lists.
+"""
+
+COMMENT_FIELDS = ("id", "parent_id", "body", "author", "score")
+
+
+class CommentRecords:
+    """
+    A post's comments as parallel lists, one per field in COMMENT_FIELDS
+    """
+
+    __slots__ = COMMENT_FIELDS
+
+    def __init__(self, comments=()):
+        for name in COMMENT_FIELDS:
+            setattr(self, name, [])
+        for comment in comments:
+            self.append(comment)
+
+    def append(self, comment):
+        """
+        Add a comment given as a dict
+        """
+        self.id.append(comment.get("id"))
+        self.parent_id.append(comment.get("parent_id"))
+        self.body.append(comment.get("body"))
+        self.author.append(comment.get("author"))
+        self.score.append(comment.get("score"))
+
+    def append_comment(self, comment):
+        """
+        Copy the needed fields out of a praw Comment
+        """
+        self.id.append(comment.id)
+        self.parent_id.append(comment.parent_id)
+        self.body.append(comment.body)
+        self.author.append(str(comment.author) if comment.author else None)
+        self.score.append(comment.score)
+
+    def select(self, indexes):
+        """
+        A new CommentRecords with the comments at indexes, in that order
+        """
+        selected = CommentRecords()
+        for name in COMMENT_FIELDS:
+            column = getattr(self, name)
+            setattr(selected, name, [column[i] for i in indexes])
+        return selected
+
+    def columns(self):
+        return {name: getattr(self, name) for name in COMMENT_FIELDS}
+
+    def to_list(self):
+        return [dict(zip(COMMENT_FIELDS, values)) for values in zip(self.id, self.parent_id, self.body,
+                                                                     self.author, self.score)]
+
+    def __len__(self):
+        return len(self.id)
+
+    def __iter__(self):
+        for values in zip(self.id, self.parent_id, self.body, self.author, self.score):
+            yield dict(zip(COMMENT_FIELDS, values))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.select(range(len(self))[index]).to_list()
+        return {name: getattr(self, name)[index] for name in COMMENT_FIELDS}
+
+    def __eq__(self, other):
+        if isinstance(other, CommentRecords):
+            return self.columns() == other.columns()
+        if isinstance(other, list):
+            return self.to_list() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"CommentRecords({len(self)} comments)"
+
+
+def json_default(obj):
+    """
+    default= hook for json.dump(s), serializing CommentRecords as the list of
+    comment dicts the JSON formats have always held
+    """
+    if isinstance(obj, CommentRecords):
+        return obj.to_list()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,114 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from reddit_scraper.records import json_default
+
+DEFAULT_TTL_SECONDS = 15 * 60
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def scrape_cache_key(subreddit_name, sort="new", time_filter="all", limit=10, keywords=None,
+                     keyword_mode="substring", comment_keyword_scope="all", budget=None):
+    """
+    Normalize scrape parameters so equivalent requests share one cache entry
+    """
+    if sort not in ("top", "controversial"):
+        time_filter = None
+    if keywords:
+        # Regex keywords are case-sensitive patterns, everything else matches case-insensitively
+        normalized = keywords if keyword_mode == "regex" else [kw.strip().lower() for kw in keywords]
+        keywords = tuple(sorted(set(normalized)))
+    else:
+        keywords, keyword_mode, comment_keyword_scope = (), None, None
+    budget = None if budget is None or budget.unlimited else budget.key()
+    return (subreddit_name.strip().lower().removeprefix("r/"), sort, time_filter, int(limit),
+            keywords, keyword_mode, comment_keyword_scope, budget)
+
+
+class CacheEntry:
+    def __init__(self, data, elapsed, json_text):
+        self.data = data
+        self.elapsed = elapsed
+        self.json_text = json_text
+        # Run report of the scrape that produced the entry (instrumentation.RunStats.report())
+        self.report = None
+        # Download files written from data on the first download, by threaded setting;
+        # temporary files on disk, so they don't count towards the cache size. Read
+        # them holding lock.
+        self.downloads = {}
+        self.lock = threading.Lock()
+        self.size = len(json_text.encode("utf-8"))
+        self.created_at = time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.created_at
+
+
+class ResultCache:
+    """
+    Thread-safe in-memory cache of finished scrapes with a TTL and a total size cap.
+    When the cap is exceeded the least recently used entries are evicted first.
+    """
+
+    def __init__(self, ttl=DEFAULT_TTL_SECONDS, max_bytes=DEFAULT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry.age > self.ttl:
+            self._size -= entry.size
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, key):
+        """
+        Look up a scrape and count it as a hit or miss
+        """
+        with self._lock:
+            entry = self._expire(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def peek(self, key):
+        """
+        Look up a scrape without touching the hit/miss counters or the LRU order
+        """
+        with self._lock:
+            return self._expire(key)
+
+    def put(self, key, data, elapsed=0.0):
+        entry = CacheEntry(data, elapsed, json.dumps(data, ensure_ascii=False, indent=2, default=json_default))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= old.size
+            self._entries[key] = entry
+            self._size += entry.size
+            # Always keep the newest entry, even if it alone is over the cap
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= evicted.size
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,294 @@
+"""
+reddit-scraper scrape: scrape subreddits, interactively or from arguments.
+
+praw, tqdm and python-dotenv are only imported once a scrape starts, so the
+module (and `--help`) loads without them, and importing it never checks the
+credentials or exits.
+"""
+import argparse
+import os
+import sys
+from datetime import datetime
+
+from reddit_scraper.backfill import DEFAULT_ARCHIVE_URL, DEFAULT_STATE_PATH, DEFAULT_WINDOW_HOURS, parse_time
+from reddit_scraper.checkpoint import DEFAULT_CHECKPOINT_PATH, Checkpoint
+from reddit_scraper.instrumentation import PROFILERS, RunStats, describe_report, stage
+from reddit_scraper.keyword_matcher import COMMENT_KEYWORD_SCOPES, MATCH_MODES, KeywordMatcher
+from reddit_scraper.writers import (APPENDABLE_FORMATS, OUTPUT_FORMATS, open_writers, output_path, parse_formats,
+                                    store_writer)
+
+
+def reddit_credentials():
+    """
+    (client id, client secret, user agent) from the environment or a .env file.
+    Exits with a message if any is missing.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    credentials = (os.getenv("CLIENT_ID"), os.getenv("CLIENT_SECRET"), os.getenv("USER_AGENT"))
+    if not all(credentials):
+        print("Error: Missing Reddit API credentials in .env file")
+        print("Please create a .env file with CLIENT_ID, CLIENT_SECRET, and USER_AGENT")
+        sys.exit(1)
+    return credentials
+
+def iter_subreddit(subreddit_name, limit=10, sort="new", time_filter="all", keywords=None, workers=1, comment_keyword_scope="all", keyword_mode="substring", checkpoint=None, budget=None, credentials=None):
+    """
+    Yield post dicts one at a time, in listing order, as soon as their comments are fetched.
+    With a checkpoint, posts an earlier run already saved are skipped unless their comment
+    count changed.
+    """
+    from tqdm import tqdm
+
+    from reddit_scraper.scraper_core import ScrapeSession, iter_posts
+
+    matcher = KeywordMatcher(keywords, mode=keyword_mode) if keywords else None
+
+    # Every worker client shares the session's rate budget, so extra workers never exceed the API limit
+    with ScrapeSession(*(credentials or reddit_credentials()), workers=workers) as session:
+        if checkpoint is not None:
+            print(f"Checkpoint has {checkpoint.count(subreddit_name, sort, time_filter)} posts from earlier runs of r/{subreddit_name} ({sort})")
+
+        print(f"\nScraping {limit} posts from r/{subreddit_name} sorted by {sort}...\n")
+        posts = iter_posts(session, subreddit_name, limit=limit, sort=sort, time_filter=time_filter, matcher=matcher,
+                           comment_keyword_scope=comment_keyword_scope, checkpoint=checkpoint, budget=budget)
+        with tqdm(posts, desc="Posts", unit="post") as progress:
+            for submission, post in progress:
+                progress.set_postfix(session.rate_limiter.postfix(), refresh=False)
+                if post is not None:
+                    yield post
+
+
+def scrape_subreddit(subreddit_name, limit=10, sort="new", time_filter="all", keywords=None, workers=1, comment_keyword_scope="all", keyword_mode="substring", checkpoint=None, budget=None, credentials=None):
+    results = list(iter_subreddit(subreddit_name, limit=limit, sort=sort, time_filter=time_filter, keywords=keywords,
+                                  workers=workers, comment_keyword_scope=comment_keyword_scope, keyword_mode=keyword_mode,
+                                  checkpoint=checkpoint, budget=budget, credentials=credentials))
+    if checkpoint is not None:
+        checkpoint.commit()
+    return results
+
+def ask_limit(prompt, cast=int):
+    value = input(prompt).strip()
+    try:
+        return cast(value) if value else None
+    except ValueError:
+        return None
+
+def ask_comment_budget():
+    """
+    Optional per-post limits, so a handful of megathreads can't dominate the run
+    """
+    if input("Limit how many comments are fetched per post? (y/N): ").strip().lower() != "y":
+        return None
+    from reddit_scraper.scraper_core import CommentBudget
+
+    budget = CommentBudget(
+        max_more=ask_limit("  Max 'load more comments' requests per post (Enter for no limit): "),
+        max_depth=ask_limit("  Max reply depth, 0 = top-level only (Enter for no limit): "),
+        min_score=ask_limit("  Minimum comment score (Enter for no limit): "),
+        top_n=ask_limit("  Keep only the N best comments (Enter for all): "),
+        deadline=ask_limit("  Seconds to spend per post (Enter for no limit): ", cast=float),
+    )
+    return None if budget.unlimited else budget
+
+def interactive_main():
+    # Checked before the prompts, so a missing .env doesn't waste the answers
+    credentials = reddit_credentials()
+
+    subreddit_name = input("Enter the subreddit name (without r/): ").strip()
+
+    sort_choice = input("Choose sorting method (hot/new/top): ").strip().lower()
+    if sort_choice not in ["hot", "new", "top"]:
+        sort_choice = "new"
+
+    limit_input = input("How many posts do you want to fetch? (press Enter for max 1000): ").strip()
+    if limit_input == "":
+        limit = 1000
+    elif limit_input.isdigit():
+        limit = min(int(limit_input), 1000)
+    else:
+        limit = 10
+
+    keywords_input = input("Enter keywords to filter (comma separated, leave empty for none): ").strip()
+    if keywords_input:
+        keywords = [kw.strip() for kw in keywords_input.split(",") if kw.strip()]
+    else:
+        keywords = None
+
+    comment_keyword_scope = "all"
+    if keywords:
+        scope_input = input("Search keywords in comments? (all/loaded/none, press Enter for all): ").strip().lower()
+        if scope_input in COMMENT_KEYWORD_SCOPES:
+            comment_keyword_scope = scope_input
+
+    workers_input = input("How many posts should fetch comments concurrently? (press Enter for 1): ").strip()
+    workers = max(1, min(int(workers_input), 16)) if workers_input.isdigit() else 1
+
+    budget = ask_comment_budget()
+
+    format_input = input(f"Output format? ({'/'.join(OUTPUT_FORMATS)}, comma separated to write several at once, "
+                         "press Enter for json): ").strip()
+    try:
+        formats = parse_formats(format_input)
+    except ValueError:
+        formats = ("json",)
+
+    incremental = input("Skip posts already saved by earlier runs? (y/N): ").strip().lower() == "y"
+    checkpoint = Checkpoint() if incremental else None
+
+    # Store runs are each a new dataset in the local store, holding only posts and comments it hasn't seen
+    append = incremental and all(fmt in APPENDABLE_FORMATS for fmt in formats)
+    name = f"{subreddit_name}_{sort_choice}"
+    if incremental and not append:
+        # JSON arrays and Parquet files can't be appended to, so each incremental run gets its own output
+        name = f"{subreddit_name}_{sort_choice}_{datetime.now():%Y%m%d-%H%M%S}"
+    outputs = [(output_path(name, fmt), fmt) for fmt in formats]
+
+    posts = iter_subreddit(subreddit_name, limit=limit, sort=sort_choice, keywords=keywords, workers=workers,
+                           comment_keyword_scope=comment_keyword_scope, checkpoint=checkpoint, budget=budget,
+                           credentials=credentials)
+
+    # Posts are written as they arrive, to every output in the same pass, so memory stays flat
+    # however large the scrape is. The checkpoint only commits once a batch is in every output,
+    # so an interrupted run resumes cleanly.
+    on_flush = checkpoint.commit if checkpoint else None
+    stats = RunStats()
+    with stats.bind(), open_writers(outputs, on_flush=on_flush, append=append) as writer:
+        for post in posts:
+            with stage("serialize"):
+                writer.write(post)
+    stats.finish()
+
+    if checkpoint:
+        checkpoint.close()
+
+    print(f"\n✅ Scraping complete! Saved {writer.count} posts to {', '.join(path for path, _ in outputs)}\n")
+    store = store_writer(writer)
+    if store:
+        print(f"   {store.new_posts} posts and {store.new_comments} comments were new to the store; "
+              "the rest refer to copies it already had\n")
+    print("\n".join(describe_report(stats.report())))
+
+
+def backfill_main(session, jobs, args):
+    """
+    Backfill each job in turn; the windows of one job run in parallel
+    """
+    from reddit_scraper.backfill import ArchiveSource
+    from reddit_scraper.batch import run_backfill_job
+
+    start = parse_time(args.since)
+    end = parse_time(args.until) if args.until else int(datetime.now().timestamp())
+    source = ArchiveSource(args.archive_url)
+    results = []
+    for job in jobs:
+        try:
+            out_file, count, failed = run_backfill_job(session, job, start, end, output_dir=args.output_dir,
+                                                       source=source, state_path=args.backfill_state,
+                                                       window_hours=args.window_hours,
+                                                       parallel_windows=args.parallel_windows)
+            error = f"{len(failed)} windows failed, run again to retry them" if failed else None
+            print(f"{'❌' if failed else '✅'} r/{job['subreddit']}: saved {count} posts to {out_file}"
+                  + (f" ({error})" if error else ""))
+            results.append((job, out_file, count, error))
+        except Exception as e:
+            print(f"❌ r/{job['subreddit']}: {e}")
+            results.append((job, None, 0, str(e)))
+    return results
+
+
+def format_list(value):
+    try:
+        return parse_formats(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def batch_main(argv, prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Scrape one or more subreddits without prompts. Run with no arguments for the interactive mode.",
+    )
+    parser.add_argument("subreddits", nargs="*", help="subreddits to scrape (without r/)")
+    parser.add_argument("--jobs", help="JSON list or JSONL file of jobs; each job needs a 'subreddit' and may override any option below")
+    parser.add_argument("--sort", choices=["new", "hot", "top", "controversial"], help="sort method (default: new)")
+    parser.add_argument("--time-filter", choices=["all", "day", "week", "month", "year"], help="time filter for top/controversial (default: all)")
+    parser.add_argument("--limit", type=int, help="posts per subreddit, max 1000 (default: 100)")
+    parser.add_argument("--keywords", help="comma separated keywords to filter on")
+    parser.add_argument("--keyword-mode", choices=list(MATCH_MODES), help="how keywords are matched (default: substring)")
+    parser.add_argument("--comment-keyword-scope", choices=list(COMMENT_KEYWORD_SCOPES), help="how far keyword matching looks into comments (default: all)")
+    parser.add_argument("--workers", type=int, default=8, help="comment fetches running at once across all jobs (default: 8)")
+    parser.add_argument("--per-job-workers", type=int, help="comment fetches running at once per job (default: 4)")
+    parser.add_argument("--parallel-jobs", type=int, default=4, help="subreddit listings walked at once (default: 4)")
+    parser.add_argument("--max-more", type=int, help="max 'load more comments' requests per post (default: no limit)")
+    parser.add_argument("--max-depth", type=int, help="deepest reply level kept, 0 = top-level only (default: no limit)")
+    parser.add_argument("--min-score", type=int, help="drop comments scoring below this (only trims the output; every comment is still fetched)")
+    parser.add_argument("--top-comments", type=int, help="keep only the N highest-scoring comments per post, and stop loading more once N are in")
+    parser.add_argument("--post-deadline", type=float, help="seconds to spend expanding comments per post")
+    parser.add_argument("--format", type=format_list, default=("jsonl",), help=f"output format, or several comma separated (e.g. jsonl,sqlite) to write them all in one pass: {', '.join(OUTPUT_FORMATS)} (default: jsonl); store adds each run as a dataset to <output-dir>/scrape_store.db, keeping only posts and comments it doesn't have yet")
+    parser.add_argument("--output-dir", default=".", help="directory for the per-job output files")
+    parser.add_argument("--incremental", action="store_true", help="skip posts saved by earlier runs (uses scrape_checkpoint.db)")
+    parser.add_argument("--since", help="backfill every post created since this date (YYYY-MM-DD or epoch seconds), past the 1000-post listing cap")
+    parser.add_argument("--until", help="end of the backfill range (default: now)")
+    parser.add_argument("--window-hours", type=float, default=DEFAULT_WINDOW_HOURS, help=f"backfill time window size in hours (default: {DEFAULT_WINDOW_HOURS})")
+    parser.add_argument("--parallel-windows", type=int, default=4, help="backfill windows listed and scraped at once (default: 4)")
+    parser.add_argument("--archive-url", default=DEFAULT_ARCHIVE_URL, help=f"archive search API that lists posts by date (default: {DEFAULT_ARCHIVE_URL})")
+    parser.add_argument("--backfill-state", default=DEFAULT_STATE_PATH, help=f"file recording finished windows and saved posts, so backfills resume (default: {DEFAULT_STATE_PATH})")
+    parser.add_argument("--report", help="save a JSON run report (per-stage timings, API calls, bytes, comment counts) to this file")
+    parser.add_argument("--profile", choices=list(PROFILERS), help="profile the run; the top functions are printed and, with --report, the full profile is saved next to it")
+    args = parser.parse_args(argv)
+
+    from reddit_scraper.batch import load_jobs, make_job, run_batch
+    from reddit_scraper.scraper_core import ScrapeSession
+
+    options = {
+        "sort": args.sort,
+        "time_filter": args.time_filter,
+        "limit": args.limit,
+        "keywords": args.keywords,
+        "keyword_mode": args.keyword_mode,
+        "comment_keyword_scope": args.comment_keyword_scope,
+        "workers": args.per_job_workers,
+        "max_more": args.max_more,
+        "max_depth": args.max_depth,
+        "min_score": args.min_score,
+        "top_comments": args.top_comments,
+        "post_deadline": args.post_deadline,
+    }
+    jobs = load_jobs(args.jobs, **options) if args.jobs else []
+    jobs += [make_job(name, **options) for name in args.subreddits]
+    if not jobs:
+        parser.error("give at least one subreddit or a --jobs file")
+
+    if args.incremental and not all(fmt in APPENDABLE_FORMATS for fmt in args.format):
+        parser.error(f"--incremental needs formats that can be appended to ({', '.join(APPENDABLE_FORMATS)})")
+    if args.since and args.format != ("jsonl",):
+        parser.error("--since needs --format jsonl, since backfills append to their output as they resume")
+
+    credentials = reddit_credentials()
+    stats = RunStats(profile=args.profile)
+    with stats.bind(), ScrapeSession(*credentials, workers=args.workers) as session:
+        if args.since:
+            results = backfill_main(session, jobs, args)
+        else:
+            print(f"Running {len(jobs)} jobs with {args.workers} workers...\n")
+            results = run_batch(session, jobs, output_dir=args.output_dir, output_format=args.format,
+                                parallel_jobs=args.parallel_jobs,
+                                checkpoint_path=DEFAULT_CHECKPOINT_PATH if args.incremental else None)
+    stats.finish()
+
+    failed = [r for r in results if r[3]]
+    print(f"\n✅ Batch complete! {len(results) - len(failed)} of {len(results)} jobs succeeded\n")
+    print("\n".join(describe_report(stats.save(args.report) if args.report else stats.report())))
+    if args.report:
+        print(f"\nRun report saved to {args.report}")
+    if failed:
+        sys.exit(1)
+
+
+def main(argv, prog=None):
+    if argv:
+        batch_main(argv, prog)
+    else:
+        interactive_main()
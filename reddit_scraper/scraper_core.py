@@ -0,0 +1,431 @@
+import heapq
+import queue
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+import praw
+from praw.models import MoreComments
+
+from reddit_scraper.instrumentation import count, observe, propagate, stage, timed_iter
+from reddit_scraper.rate_limit import (AdaptiveScheduler, PrawcoreRateLimiter, RateLimitedRequestor,
+                                       SharedBudgetRateLimiter)
+from reddit_scraper.records import CommentRecords
+
+
+def create_reddit(client_id, client_secret, user_agent, rate_limiter=None, **config):
+    """
+    Build an authenticated Reddit client. Extra config (e.g. oauth_url, reddit_url)
+    is passed straight to praw, which lets the scraper run against a local stub server.
+    """
+    reddit = praw.Reddit(
+        client_id=client_id,
+        client_secret=client_secret,
+        user_agent=user_agent,
+        check_for_async=False,
+        requestor_class=RateLimitedRequestor,
+        requestor_kwargs={"rate_limiter": rate_limiter},
+        **config
+    )
+    if rate_limiter is not None:
+        # prawcore paces each client on its own; the shared limiter already paces all of them.
+        # The per-client limiter is private to prawcore, so it is only swapped where it is the
+        # RateLimiter this was written against; otherwise the client keeps its own pacing too.
+        for name in ("_core", "_authorized_core", "_read_only_core"):
+            core = getattr(reddit, name, None)
+            if isinstance(getattr(core, "_rate_limiter", None), PrawcoreRateLimiter):
+                core._rate_limiter = SharedBudgetRateLimiter()
+    return reddit
+
+
+def get_submissions(reddit, subreddit_name, sort="new", time_filter="all", limit=10):
+    sub = reddit.subreddit(subreddit_name)
+
+    if sort == "new":
+        return sub.new(limit=limit)
+    elif sort == "hot":
+        return sub.hot(limit=limit)
+    elif sort == "top":
+        return sub.top(time_filter=time_filter, limit=limit)
+    elif sort == "controversial":
+        return sub.controversial(time_filter=time_filter, limit=limit)
+    return sub.new(limit=limit)
+
+
+def listing_matches(submission, matcher):
+    """
+    Stage 1 of the keyword filter: uses only fields already present in the listing payload
+    """
+    with stage("keyword_filter"):
+        return matcher.matches(submission.title, submission.selftext)
+
+
+class CommentBudget:
+    """
+    Limits on how much of a post's comment tree is fetched and kept, so one megathread
+    can't take over a run. None leaves a limit off.
+
+      max_more   - MoreComments stubs expanded per post; each one is an API request
+      max_depth  - deepest reply level kept (0 keeps only top-level comments); stubs
+                   below it are never expanded
+      min_score  - comments scoring below this are dropped once loaded; on its own
+                   it trims the output but doesn't save any requests
+      top_n      - keep only the N highest-scoring comments, requested in Reddit's
+                   "top" order so most of them arrive with the first page; no
+                   further stubs are expanded once N comments worth keeping are in
+      deadline   - seconds per post after which no further stubs are expanded
+    """
+
+    def __init__(self, max_more=None, max_depth=None, min_score=None, top_n=None, deadline=None):
+        self.max_more = max_more
+        self.max_depth = max_depth
+        self.min_score = min_score
+        self.top_n = top_n
+        self.deadline = deadline
+
+    def key(self):
+        return (self.max_more, self.max_depth, self.min_score, self.top_n, self.deadline)
+
+    @property
+    def unlimited(self):
+        return not any(limit is not None for limit in self.key())
+
+    def __repr__(self):
+        return "CommentBudget(max_more={}, max_depth={}, min_score={}, top_n={}, deadline={})".format(*self.key())
+
+
+def flatten_comments(submission):
+    comments = CommentRecords()
+    for comment in submission.comments.list():
+        if isinstance(comment, MoreComments):
+            continue
+        comments.append_comment(comment)
+    return comments
+
+
+def release_comments(submission):
+    """
+    Drop the submission's loaded comment tree once its fields have been copied out.
+    The tree references the submission back, so without this the praw objects (each
+    carrying the whole API payload, body_html included) would wait for the cyclic
+    garbage collector instead of being freed right away.
+    """
+    # Read through __dict__: the comments attribute would fetch them if they never loaded
+    forest = submission.__dict__.get("_comments")
+    if forest is not None:
+        forest._comments = []
+    submission._comments_by_id = {}
+
+
+def collect_comments(submission, budget=None):
+    """
+    Flatten the loaded forest within the budget's depth, score and top-N limits.
+    Returns (comments, cut), where cut is True if any loaded comment was left out.
+    """
+    with stage("flatten"):
+        return _collect_comments(submission, budget)
+
+
+def _collect_comments(submission, budget):
+    if budget is None or budget.unlimited:
+        return flatten_comments(submission), False
+
+    # Breadth-first, the same order as CommentForest.list(), but tracking depth
+    comments = CommentRecords()
+    cut = False
+    pending = deque((comment, 0) for comment in submission.comments)
+    while pending:
+        comment, depth = pending.popleft()
+        if isinstance(comment, MoreComments):
+            continue
+        if budget.max_depth is not None and depth > budget.max_depth:
+            cut = True
+            continue
+        if budget.min_score is None or comment.score >= budget.min_score:
+            comments.append_comment(comment)
+        else:
+            cut = True
+        pending.extend((reply, depth + 1) for reply in comment.replies)
+
+    if budget.top_n is not None and len(comments) > budget.top_n:
+        # Keep the best comments but leave them in thread order
+        best = heapq.nlargest(budget.top_n, range(len(comments)), key=comments.score.__getitem__)
+        comments = comments.select(sorted(best))
+        cut = True
+    return comments, cut
+
+
+def expand_more(submission, budget=None, started=None):
+    """
+    Replace MoreComments stubs with the comments they stand for, within the budget.
+    Returns True if any stub was left unexpanded.
+    """
+    with stage("replace_more"):
+        return _expand_more(submission, budget, started)
+
+
+def _expand_more(submission, budget, started):
+    forest = submission.comments
+    if budget is None or (budget.max_more is None and budget.max_depth is None and budget.deadline is None
+                          and budget.top_n is None):
+        forest.replace_more(limit=None)
+        return False
+
+    # The same largest-stub-first walk as CommentForest.replace_more, which can only
+    # stop after a number of expansions and drops every stub it skips. Here skipped
+    # stubs stay in the tree and the walk also stops at the depth limit and deadline,
+    # and once top_n comments worth keeping are loaded: in "top" order the stubs left
+    # mostly stand for lower-scoring comments.
+    started = started or time.monotonic()
+    stubs = forest._gather_more_comments(forest._comments)
+    kept = _count_kept(forest.list(), budget) if budget.top_n is not None else 0
+    skipped = False
+    expanded = 0
+    while stubs:
+        if budget.max_more is not None and expanded >= budget.max_more:
+            return True
+        if budget.top_n is not None and kept >= budget.top_n:
+            return True
+        if budget.deadline is not None and time.monotonic() - started >= budget.deadline:
+            return True
+
+        stub = heapq.heappop(stubs)
+        depth = getattr(stub, "depth", None)
+        if budget.max_depth is not None and depth is not None and depth > budget.max_depth:
+            skipped = True
+            continue
+
+        new_comments = stub.comments(update=False)
+        expanded += 1
+        for more in forest._gather_more_comments(new_comments, parent_tree=forest._comments):
+            more.submission = submission
+            heapq.heappush(stubs, more)
+        for comment in new_comments:
+            forest._insert_comment(comment)
+        stub._remove_from.remove(stub)
+        if budget.top_n is not None:
+            kept += _count_kept(new_comments, budget)
+    return skipped
+
+
+def _count_kept(comments, budget):
+    """
+    How many of comments pass the budget's depth and score limits
+    """
+    return sum(1 for comment in comments
+               if not isinstance(comment, MoreComments)
+               and (budget.max_depth is None or getattr(comment, "depth", 0) <= budget.max_depth)
+               and (budget.min_score is None or comment.score >= budget.min_score))
+
+
+def comments_match(comments, matcher):
+    with stage("keyword_filter"):
+        return any(matcher.matches(body) for body in comments.body)
+
+
+def fetch_comments(submission, matcher=None, comment_keyword_scope="all", budget=None):
+    """
+    Expand MoreComments stubs (all of them, or as many as the budget allows) and
+    flatten the forest into CommentRecords. Returns (comments, truncated), where
+    truncated says the comments are not the post's whole tree. The praw comment
+    tree is released before returning.
+
+    When a keyword matcher is given the post has already failed the listing check, so its
+    comments decide: the loaded page is checked before anything is expanded, and
+    None is returned if no comment in scope matches.
+    """
+    try:
+        return _fetch_comments(submission, matcher, comment_keyword_scope, budget)
+    finally:
+        release_comments(submission)
+
+
+def _fetch_comments(submission, matcher, comment_keyword_scope, budget):
+    started = time.monotonic()
+    if budget is not None and budget.top_n is not None:
+        submission.comment_sort = "top"
+    with stage("load_comments"):
+        # The first page of comments is requested on first access
+        submission.comments
+
+    if matcher:
+        loaded, _ = collect_comments(submission, budget)
+        if not comments_match(loaded, matcher):
+            if comment_keyword_scope != "all":
+                return None
+            truncated = expand_more(submission, budget, started)
+            comments, cut = collect_comments(submission, budget)
+            if not comments_match(comments, matcher):
+                return None
+            return comments, truncated or cut
+
+    truncated = expand_more(submission, budget, started)
+    comments, cut = collect_comments(submission, budget)
+    return comments, truncated or cut
+
+
+def submission_to_dict(submission, comments, truncated=False):
+    return {
+        "id": submission.id,
+        "title": submission.title,
+        "author": str(submission.author) if submission.author else None,
+        "score": submission.score,
+        "num_comments": submission.num_comments,
+        "created_utc": int(submission.created_utc),
+        "created_iso": datetime.utcfromtimestamp(submission.created_utc).isoformat() + "Z",
+        "selftext": submission.selftext,
+        "url": submission.url,
+        "comments": comments,
+        "comments_truncated": truncated,
+    }
+
+
+def expand_comments(submissions, fetch=fetch_comments, workers=1, matcher=None, comment_keyword_scope="all", pool=None,
+                    budget=None):
+    """
+    Yield (submission, (comments, truncated)) pairs in listing order. With more than one worker
+    the comment trees of several submissions are fetched concurrently, either on a
+    private pool or on a shared one passed in as pool.
+
+    Posts rejected by the keyword filter are still yielded, with comments set to None,
+    so callers can count progress. Posts whose title or selftext match never need
+    their comments checked, and with scope "none" the rest are rejected before any
+    comment request is made.
+    """
+    def fetch_args(submission):
+        # None means the listing check alone already rejected the post
+        if not matcher or listing_matches(submission, matcher):
+            return (submission, None, comment_keyword_scope, budget)
+        if comment_keyword_scope == "none":
+            return None
+        return (submission, matcher, comment_keyword_scope, budget)
+
+    if pool is None and workers <= 1:
+        for submission in submissions:
+            args = fetch_args(submission)
+            yield submission, fetch(*args) if args else None
+        return
+
+    # A private pool is sized to workers, so queue ahead to keep it busy. On a shared
+    # pool the window itself is the per-scrape concurrency limit.
+    own_pool = pool is None
+    window = workers * 2 if own_pool else max(1, workers)
+    if own_pool:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    # Pool threads record into the same run stats as the caller
+    fetch = propagate(fetch)
+
+    pending = deque()
+    try:
+        for submission in submissions:
+            args = fetch_args(submission)
+            pending.append((submission, pool.submit(fetch, *args) if args else None))
+            if len(pending) >= window:
+                done, future = pending.popleft()
+                yield done, future.result() if future else None
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result() if future else None
+    finally:
+        # A caller that stops early leaves fetches queued on the pool; drop the ones not started
+        for _, future in pending:
+            if future:
+                future.cancel()
+        if own_pool:
+            pool.shutdown()
+
+
+class ScrapeSession:
+    """
+    One rate budget, a pool of authenticated Reddit clients and an optional
+    comment-fetch pool, shared by every scrape that runs through the session.
+
+    praw clients are not thread-safe, so each one is lent to a single caller at a time
+    and handed back afterwards. Returned clients keep their OAuth token (prawcore renews
+    it when it expires) and their keep-alive connections, so a long-lived session only
+    pays for authentication once per client. Pool workers re-open submissions by id on
+    the client they borrowed; the listing object never loads comments itself, so this
+    costs no extra requests.
+    """
+
+    def __init__(self, client_id, client_secret, user_agent, workers=1, rate_limiter=None, **config):
+        self._credentials = (client_id, client_secret, user_agent)
+        self._config = config
+        self._idle = queue.LifoQueue()
+        self.workers = workers
+        self.rate_limiter = rate_limiter or AdaptiveScheduler()
+        self.pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    @contextmanager
+    def borrow(self):
+        """
+        Lend an idle Reddit client to the caller, creating one if none is free
+        """
+        try:
+            reddit = self._idle.get_nowait()
+        except queue.Empty:
+            reddit = create_reddit(*self._credentials, rate_limiter=self.rate_limiter, **self._config)
+        try:
+            yield reddit
+        finally:
+            self._idle.put(reddit)
+
+    def fetch(self, submission, matcher=None, comment_keyword_scope="all", budget=None):
+        with self.borrow() as reddit:
+            return fetch_comments(reddit.submission(id=submission.id), matcher, comment_keyword_scope, budget)
+
+    def expand(self, submissions, matcher=None, comment_keyword_scope="all", workers=None, budget=None):
+        if self.pool is None:
+            return expand_comments(submissions, fetch_comments, 1, matcher, comment_keyword_scope, budget=budget)
+        return expand_comments(submissions, self.fetch, workers or self.workers, matcher, comment_keyword_scope,
+                               pool=self.pool, budget=budget)
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def iter_posts(session, subreddit_name, limit=10, sort="new", time_filter="all", matcher=None,
+               comment_keyword_scope="all", workers=None, checkpoint=None, budget=None):
+    """
+    Yield (submission, post) for every listing entry, in order. post is None when the
+    keyword filter rejected the submission. A CommentBudget caps how much of each
+    comment tree is fetched; posts cut short carry comments_truncated=True.
+
+    With a checkpoint, posts an earlier run already saved are skipped unless their comment
+    count changed, and every processed post is staged in the checkpoint.
+    """
+    # The listing client stays borrowed until the walk is finished, since the
+    # listing generator (and, without a pool, comment loading) keeps using it
+    with session.borrow() as reddit:
+        submissions = get_submissions(reddit, subreddit_name, sort=sort, time_filter=time_filter, limit=limit)
+        submissions = timed_iter("listing", submissions)
+        if checkpoint is not None:
+            submissions = (s for s in submissions if checkpoint.needs_fetch(subreddit_name, sort, s, time_filter))
+
+        for submission, fetched in session.expand(submissions, matcher, comment_keyword_scope, workers, budget):
+            if checkpoint is not None:
+                checkpoint.mark(subreddit_name, sort, submission, time_filter)
+
+            count("posts_seen")
+            # Rejected by the keyword filter
+            if fetched is None:
+                count("posts_filtered")
+                yield submission, None
+                continue
+
+            comments, truncated = fetched
+            count("posts_kept")
+            count("comments", len(comments))
+            observe("comments_per_post", len(comments))
+            if truncated:
+                count("posts_truncated")
+            yield submission, submission_to_dict(submission, comments, truncated)
@@ -0,0 +1,223 @@
+import os
+import re
+import sqlite3
+import time
+
+from reddit_scraper.cleaner_core import expand_inputs, input_size, read_input
+from reddit_scraper.dedup_store import split_store_ref
+
+DEFAULT_INDEX_PATH = "search_index.db"
+
+# bm25 column weights for (title, body): a hit in a title counts for more
+TITLE_WEIGHT = 5.0
+BODY_WEIGHT = 1.0
+
+
+def to_match_query(text):
+    """
+    Turn free text into an FTS5 query that matches every word, so input like
+    "c++ vs rust" can't trip FTS5's query syntax. A trailing * keeps prefix matching.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if re.search(r"\w", word):
+            terms.append('"' + word.replace('"', '""') + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+class SearchIndex:
+    """
+    Local SQLite FTS5 index over post titles, selftext and comment bodies from scraper
+    output (JSON, JSONL or Parquet datasets).
+
+    Every post and every comment is one row of the docs table. Files are only read
+    again when their size or modification time changed, and a post is only re-indexed
+    when its comments changed, so re-running add_files() over a growing scrape folder
+    only costs the new data. The same post seen in several files is indexed once.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sources (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                posts INTEGER NOT NULL,
+                indexed_at INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS posts (
+                id TEXT PRIMARY KEY,
+                title TEXT,
+                author TEXT,
+                score INTEGER,
+                num_comments INTEGER,
+                created_utc INTEGER,
+                url TEXT,
+                source TEXT,
+                indexed_comments INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS doc_meta (
+                rowid INTEGER PRIMARY KEY,
+                post_id TEXT NOT NULL,
+                comment_id TEXT,
+                author TEXT,
+                score INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS doc_meta_post ON doc_meta (post_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(title, body, tokenize='porter unicode61');
+            """
+        )
+        # Stored with the table, so ORDER BY rank uses the weighted bm25
+        self._conn.execute(f"INSERT INTO docs (docs, rank) VALUES ('rank', 'bm25({TITLE_WEIGHT}, {BODY_WEIGHT})')")
+        self._conn.commit()
+        self._next_rowid = None
+
+    # -- indexing ---------------------------------------------------------
+    def _needs_index(self, post):
+        row = self._conn.execute(
+            "SELECT num_comments, indexed_comments FROM posts WHERE id = ?", (post["id"],)
+        ).fetchone()
+        return row is None or row != (post.get("num_comments"), len(post.get("comments") or ()))
+
+    def _remove_post(self, post_id):
+        rowids = [(r,) for (r,) in self._conn.execute("SELECT rowid FROM doc_meta WHERE post_id = ?", (post_id,))]
+        self._conn.executemany("DELETE FROM docs WHERE rowid = ?", rowids)
+        self._conn.execute("DELETE FROM doc_meta WHERE post_id = ?", (post_id,))
+
+    def add_post(self, post, source=None):
+        """
+        Index one post and its comments, replacing an older copy. Returns False if the
+        index already has this version of the post. Call commit() afterwards.
+        """
+        if not self._needs_index(post):
+            return False
+        if not self._conn.in_transaction:
+            # Another connection (the app, a second CLI run) may have added rows since our
+            # last commit, so row ids are counted again in every write transaction
+            self._next_rowid = None
+        self._remove_post(post["id"])
+
+        comments = post.get("comments") or ()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO posts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (post["id"], post.get("title"), post.get("author"), post.get("score"), post.get("num_comments"),
+             post.get("created_utc"), post.get("url"), source, len(comments)),
+        )
+
+        # Row ids are handed out here so both tables can be filled with executemany. The
+        # transaction already holds the write lock, so MAX(rowid) can't go stale before commit.
+        if self._next_rowid is None:
+            self._next_rowid = self._conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM doc_meta").fetchone()[0]
+        rowid = self._next_rowid
+        meta = [(rowid, post["id"], None, post.get("author"), post.get("score"))]
+        docs = [(rowid, post.get("title") or "", post.get("selftext") or "")]
+        for rowid, comment in enumerate(comments, start=rowid + 1):
+            meta.append((rowid, post["id"], comment.get("id"), comment.get("author"), comment.get("score")))
+            docs.append((rowid, "", comment.get("body") or ""))
+        self._next_rowid = rowid + 1
+        self._conn.executemany("INSERT INTO doc_meta VALUES (?, ?, ?, ?, ?)", meta)
+        self._conn.executemany("INSERT INTO docs (rowid, title, body) VALUES (?, ?, ?)", docs)
+        return True
+
+    def add_file(self, path, force=False):
+        """
+        Index every post in a scrape file. Returns (posts read, posts indexed), or None
+        if the file hasn't changed since it was last indexed.
+        """
+        path = os.path.abspath(path)
+        size = input_size(path)
+        store = split_store_ref(path)
+        mtime = os.path.getmtime(store[0] if store else path)
+        if not force:
+            row = self._conn.execute("SELECT size, mtime FROM sources WHERE path = ?", (path,)).fetchone()
+            if row == (size, mtime):
+                return None
+
+        seen = indexed = 0
+        with read_input(path) as posts:
+            for post in posts:
+                seen += 1
+                if self.add_post(post, source=path):
+                    indexed += 1
+        self._conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?)",
+                           (path, size, mtime, seen, int(time.time())))
+        self._conn.commit()
+        return seen, indexed
+
+    def add_files(self, patterns, force=False):
+        """
+        Index every scrape file matched by patterns (files, folders, Parquet datasets or
+        globs). Yields (path, result) per file, with result as returned by add_file.
+        """
+        for path in expand_inputs(patterns):
+            yield path, self.add_file(path, force=force)
+
+    def commit(self):
+        self._conn.commit()
+
+    def optimize(self):
+        """
+        Merge the FTS5 segments written by many small updates into one
+        """
+        self._conn.execute("INSERT INTO docs (docs) VALUES ('optimize')")
+        self._conn.commit()
+
+    # -- querying ---------------------------------------------------------
+    def search(self, query, limit=20, raw=False):
+        """
+        Ranked hits for query, best first. Each hit is a dict with the post's id, title
+        and url, whether the match is in the post itself or a comment, and a snippet
+        with the matched words in **bold**. raw=True passes FTS5 query syntax through
+        (OR, NEAR, "phrases", column filters).
+        """
+        match = query if raw else to_match_query(query)
+        if not match:
+            return []
+        rows = self._conn.execute(
+            """
+            SELECT m.post_id, m.comment_id, m.author, m.score, p.title, p.url, p.created_utc,
+                   snippet(docs, -1, '**', '**', '…', 16), rank
+            FROM docs
+            JOIN doc_meta m ON m.rowid = docs.rowid
+            JOIN posts p ON p.id = m.post_id
+            WHERE docs MATCH ?
+            ORDER BY rank
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+        return [{
+            "post_id": post_id,
+            "comment_id": comment_id,
+            "kind": "comment" if comment_id else "post",
+            "author": author,
+            "score": score,
+            "title": title,
+            "url": url,
+            "created_utc": created_utc,
+            "snippet": snippet,
+            "rank": rank,
+        } for post_id, comment_id, author, score, title, url, created_utc, snippet, rank in rows]
+
+    def stats(self):
+        posts, comments = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(indexed_comments), 0) FROM posts"
+        ).fetchone()
+        sources = self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+        return {"posts": posts, "comments": comments, "sources": sources}
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,111 @@
+"""
+reddit-scraper store: list, import, export and remove datasets in the scrape store.
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+from reddit_scraper.cleaner_core import expand_inputs, read_input
+from reddit_scraper.dedup_store import DEFAULT_STORE_PATH, ScrapeStore
+from reddit_scraper.writers import OUTPUT_FORMATS, open_writer, output_path
+
+def format_size(size):
+    return f"{size / 1024 / 1024:.1f} MB"
+
+def list_main(store, args):
+    datasets = store.datasets()
+    if not datasets:
+        print(f"'{args.store}' has no datasets yet")
+        return
+    for d in datasets:
+        created = datetime.fromtimestamp(d["created_at"]).strftime("%Y-%m-%d %H:%M")
+        state = "" if d["finished_at"] else "  (unfinished)"
+        print(f"{d['name']}  {created}  {d['posts']} posts, {d['comments']} comments "
+              f"({d['new_posts']} and {d['new_comments']} new){state}")
+
+def stats_main(store, args):
+    stats = store.stats()
+    refs = stats["referenced_posts"] + stats["referenced_comments"]
+    stored = stats["posts"] + stats["comments"]
+    print(f"{stats['datasets']} datasets referring to {stats['referenced_posts']} posts and "
+          f"{stats['referenced_comments']} comments")
+    print(f"Stored once: {stats['posts']} posts and {stats['comments']} comments "
+          f"in {format_size(stats['size_bytes'])}"
+          + (f" ({refs / stored:.1f}x deduplication)" if stored else ""))
+
+def import_main(store, args):
+    """
+    Load existing scrape files into the store, one dataset per file
+    """
+    files = expand_inputs(args.inputs)
+    if not files:
+        print("No JSON, JSONL or Parquet inputs matched")
+        return
+    for path in files:
+        name = os.path.splitext(os.path.basename(path.rstrip("/\\")))[0]
+        start = time.perf_counter()
+        with read_input(path) as posts, store.writer(name) as writer:
+            for post in posts:
+                writer.write(post)
+        print(f"✅ {path} -> {name}: {writer.count} posts, {writer.new_posts} posts and "
+              f"{writer.new_comments} comments new ({time.perf_counter() - start:.2f}s)")
+
+def export_main(store, args):
+    """
+    Materialize a dataset as an ordinary scrape file
+    """
+    # Before the writer is opened, which would empty an existing output file
+    if store.dataset(args.dataset) is None:
+        print(f"❌ No dataset '{args.dataset}'")
+        sys.exit(1)
+    output_format = args.format
+    out_file = args.output or output_path(args.dataset, output_format)
+    start = time.perf_counter()
+    with open_writer(out_file, output_format) as writer:
+        for post in store.iter_posts(args.dataset):
+            writer.write(post)
+    print(f"✅ Wrote {writer.count} posts from '{args.dataset}' to {out_file} in {time.perf_counter() - start:.2f}s")
+
+def remove_main(store, args):
+    for name in args.datasets:
+        if store.dataset(name) is None:
+            print(f"❌ No dataset '{name}'")
+            continue
+        posts, comments = store.remove(name)
+        print(f"✅ Removed '{name}' ({posts} posts and {comments} comments no other dataset used were deleted)")
+    if args.vacuum:
+        store.vacuum()
+
+def main(argv, prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Manage the local scrape store, which keeps every post and comment version once across runs.",
+    )
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help=f"store file (default: {DEFAULT_STORE_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="list the datasets (one per scrape run) and how much each added")
+    commands.add_parser("stats", help="records stored against records referenced")
+
+    add = commands.add_parser("import", help="add existing scrape files to the store, one dataset per file")
+    add.add_argument("inputs", nargs="+", help="JSON/JSONL files, Parquet datasets, directories or glob patterns (quote globs)")
+
+    export = commands.add_parser("export", help="write a dataset out as a normal scrape file")
+    export.add_argument("dataset", help="dataset name, as shown by list")
+    export.add_argument("--format", choices=[f for f in OUTPUT_FORMATS if f != "store"], default="jsonl",
+                        help="output format (default: jsonl)")
+    export.add_argument("-o", "--output", help="output file (default: <dataset>_output.<format>, <dataset>_output.db for sqlite, "
+                             "<dataset>_cleaned.txt for text)")
+
+    remove = commands.add_parser("remove", help="drop datasets and the records only they used")
+    remove.add_argument("datasets", nargs="+", help="dataset names")
+    remove.add_argument("--vacuum", action="store_true", help="shrink the store file afterwards")
+
+    args = parser.parse_args(argv)
+    if args.command != "import" and not os.path.exists(args.store):
+        parser.error(f"'{args.store}' doesn't exist; scrape with --format store or use import first")
+    with ScrapeStore(args.store) as store:
+        {"list": list_main, "stats": stats_main, "import": import_main, "export": export_main,
+         "remove": remove_main}[args.command](store, args)
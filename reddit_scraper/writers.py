@@ -0,0 +1,362 @@
+"""
+Output sinks for scraped posts.
+
+Every sink has the same small interface: write(post) as each post is scraped,
+flush(), close() (also as a context manager) and count, the number of posts
+written. Sinks buffer posts and write them in batches; on_flush is called once
+a batch has reached the destination, which is when a checkpoint may commit.
+
+    json     pretty-printed JSON array          JsonArrayWriter
+    jsonl    one post per line                  JsonlWriter
+    text     the data cleaner's readable text   CleanedTextWriter
+    sqlite   posts and comments tables          SqliteWriter
+    parquet  compressed posts/comments tables   columnar.ParquetWriter
+    store    deduplicated scrape store dataset  dedup_store.StoreWriter
+
+FanOutWriter writes one pass of posts to several sinks, so a scrape can be
+saved in several formats without keeping the posts around or scraping twice.
+"""
+import io
+import json
+import os
+import sqlite3
+
+from reddit_scraper.cleaner_core import format_post
+from reddit_scraper.columnar import COMMENT_COLUMNS, POST_COLUMNS, ParquetWriter
+from reddit_scraper.dedup_store import DEFAULT_STORE_PATH, StoreWriter, run_dataset_name, store_ref
+from reddit_scraper.records import CommentRecords, json_default
+
+OUTPUT_FORMATS = ("json", "jsonl", "parquet", "store", "sqlite", "text")
+
+# Formats a later run can add posts to; JSON arrays and Parquet files are only complete once closed
+APPENDABLE_FORMATS = ("jsonl", "sqlite", "text")
+
+# "<subreddit>_<sort>" + suffix names the output of each format (the store holds datasets instead)
+OUTPUT_SUFFIXES = {
+    "json": "_output.json",
+    "jsonl": "_output.jsonl",
+    "parquet": "_output.parquet",
+    "sqlite": "_output.db",
+    "text": "_cleaned.txt",
+}
+
+
+def parse_formats(value):
+    """
+    Output formats from a comma separated list like "jsonl,sqlite", in order, without duplicates
+    """
+    formats = []
+    for name in value.split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in OUTPUT_FORMATS:
+            raise ValueError(f"unknown output format '{name}' (choose from {', '.join(OUTPUT_FORMATS)})")
+        if name not in formats:
+            formats.append(name)
+    if not formats:
+        raise ValueError("no output format given")
+    return tuple(formats)
+
+
+def output_path(name, output_format, output_dir="."):
+    """
+    Where a run called name (e.g. "python_new") writes output_format. Every store run
+    is its own dataset in the shared store file.
+    """
+    if output_format == "store":
+        return store_ref(os.path.join(output_dir, DEFAULT_STORE_PATH), run_dataset_name(name))
+    return os.path.join(output_dir, name + OUTPUT_SUFFIXES[output_format])
+
+
+class JsonlWriter:
+    """
+    Write one post per line as soon as it is scraped. Lines are buffered and flushed
+    to disk every batch_size posts, so memory stays flat and a crash loses at most
+    one batch.
+
+    on_flush is called after every flush, once the batch has reached the file.
+    With append=True new posts are added to an existing file (JSONL only).
+    path may also be an open binary file (e.g. a temporary file for a download),
+    which is left open on close.
+    """
+
+    def __init__(self, path, batch_size=20, on_flush=None, append=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.count = 0
+        self._buffer = []
+        self._closed = False
+        self._owns_file = not hasattr(path, "write")
+        if self._owns_file:
+            self._file = open(path, "a" if append else "w", encoding="utf-8")
+        else:
+            # Unbuffered files (the kind st.download_button takes) get a buffer of their own
+            buffer = io.BufferedWriter(path) if isinstance(path, io.RawIOBase) else path
+            self._file = io.TextIOWrapper(buffer, encoding="utf-8", write_through=True)
+
+    def write(self, post):
+        self._buffer.append(json.dumps(post, ensure_ascii=False, default=json_default) + "\n")
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer = []
+        self._file.flush()
+        if self.on_flush:
+            self.on_flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        if self._owns_file:
+            self._file.close()
+        else:
+            # Hand the caller's file back open
+            buffer = self._file.detach()
+            if buffer is not self.path:
+                buffer.detach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class JsonArrayWriter(JsonlWriter):
+    """
+    Stream posts into the original pretty-printed JSON array format. The file is
+    byte-identical to json.dump(posts, f, ensure_ascii=False, indent=2), but is only
+    valid JSON once the writer is closed.
+    """
+
+    def write(self, post):
+        text = json.dumps(post, ensure_ascii=False, indent=2, default=json_default).replace("\n", "\n  ")
+        self._buffer.append(("[\n  " if self.count == 0 else ",\n  ") + text)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._buffer.append("[]" if self.count == 0 else "\n]")
+        super().close()
+
+
+class CleanedTextWriter(JsonlWriter):
+    """
+    Write the data cleaner's readable text as posts are scraped. The file is
+    byte-identical to cleaning a JSON copy of the same posts with data-cleaner.py.
+    """
+
+    def __init__(self, path, batch_size=20, on_flush=None, append=False, threaded=False):
+        super().__init__(path, batch_size=batch_size, on_flush=on_flush, append=append)
+        self.threaded = threaded
+
+    def write(self, post):
+        self._buffer.append(format_post(post, self.threaded))
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+
+class SqliteWriter:
+    """
+    Write posts into a SQLite database with a posts table and a comments table
+    (joined on comments.post_id), ready for SQL queries or any SQLite tool. The
+    columns are the Parquet tables' (columnar.POST_COLUMNS and COMMENT_COLUMNS).
+
+    Every batch_size posts go in with a few executemany calls inside one
+    transaction, and on_flush is called once it is committed. A post written
+    again (append=True, e.g. an incremental run re-fetching a post with new
+    comments) replaces the earlier copy and its comments. Without append the
+    tables start empty.
+    """
+
+    def __init__(self, path, batch_size=20, on_flush=None, append=False):
+        self.path = path
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.count = 0
+        self._posts = []
+        self._comments = []
+        self._closed = False
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            if not append:
+                self._conn.execute("DROP TABLE IF EXISTS comments")
+                self._conn.execute("DROP TABLE IF EXISTS posts")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS posts (
+                    id TEXT PRIMARY KEY, title TEXT, author TEXT, score INTEGER, num_comments INTEGER,
+                    created_utc INTEGER, created_iso TEXT, selftext TEXT, url TEXT, comments_truncated INTEGER
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS comments (
+                    post_id TEXT, id TEXT, parent_id TEXT, body TEXT, author TEXT, score INTEGER,
+                    PRIMARY KEY (post_id, id)
+                ) WITHOUT ROWID
+            """)
+        self._insert_post = f"INSERT OR REPLACE INTO posts VALUES ({', '.join('?' * len(POST_COLUMNS))})"
+        self._insert_comment = f"INSERT OR REPLACE INTO comments VALUES ({', '.join('?' * len(COMMENT_COLUMNS))})"
+
+    def write(self, post):
+        row = [post.get(name) for name in POST_COLUMNS]
+        row[-1] = bool(row[-1])
+        self._posts.append(row)
+
+        post_id = post.get("id")
+        comments = post.get("comments") or ()
+        if isinstance(comments, CommentRecords):
+            # Straight from the columns; no per-comment dicts needed
+            self._comments.extend(zip([post_id] * len(comments), comments.id, comments.parent_id, comments.body,
+                                      comments.author, comments.score))
+        else:
+            self._comments.extend((post_id, *(comment.get(name) for name in COMMENT_COLUMNS[1:]))
+                                  for comment in comments)
+
+        self.count += 1
+        if len(self._posts) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._posts:
+            with self._conn:
+                # Comments a re-written post no longer has must not linger
+                self._conn.executemany("DELETE FROM comments WHERE post_id = ?", ((row[0],) for row in self._posts))
+                self._conn.executemany(self._insert_post, self._posts)
+                self._conn.executemany(self._insert_comment, self._comments)
+            self._posts = []
+            self._comments = []
+        if self.on_flush:
+            self.on_flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FanOutWriter:
+    """
+    Write each post to several sinks in one pass. Each sink keeps its own batching;
+    on_flush is only called when every sink has flushed everything written so far,
+    so a checkpoint never commits posts one of the outputs hasn't saved yet. With
+    sinks using the same batch_size that is once per batch; a Parquet sink only
+    flushes on close.
+    """
+
+    def __init__(self, writers, on_flush=None):
+        self.writers = list(writers)
+        self.on_flush = on_flush
+        self.count = 0
+        self._flushed = [0] * len(self.writers)
+        self._closed = False
+        for i, writer in enumerate(self.writers):
+            writer.on_flush = self._recorder(i, writer)
+
+    def _recorder(self, i, writer):
+        def record():
+            self._flushed[i] = writer.count
+        return record
+
+    def write(self, post):
+        self.count += 1
+        for writer in self.writers:
+            writer.write(post)
+        if self.on_flush and min(self._flushed) == self.count:
+            self.on_flush()
+
+    def flush(self):
+        for writer in self.writers:
+            writer.flush()
+        if self.on_flush and min(self._flushed) == self.count:
+            self.on_flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        errors = []
+        for writer in self.writers:
+            try:
+                writer.close()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+        if self.on_flush:
+            self.on_flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_writer(path, output_format="json", batch_size=20, on_flush=None, append=False, threaded=False):
+    if output_format == "store":
+        # path is "<store file>#<dataset>"; only new or changed posts and comments are stored
+        return StoreWriter.open(path, batch_size=batch_size, on_flush=on_flush, append=append)
+    if output_format == "parquet":
+        if append:
+            raise ValueError("Parquet datasets can't be appended to; write a new one per run")
+        # Parquet is written in large row groups; see columnar.ROW_GROUP_POSTS
+        return ParquetWriter(path, on_flush=on_flush)
+    if output_format == "sqlite":
+        return SqliteWriter(path, batch_size=batch_size, on_flush=on_flush, append=append)
+    if output_format == "text":
+        return CleanedTextWriter(path, batch_size=batch_size, on_flush=on_flush, append=append, threaded=threaded)
+    if output_format == "jsonl":
+        return JsonlWriter(path, batch_size=batch_size, on_flush=on_flush, append=append)
+    return JsonArrayWriter(path, batch_size=batch_size, on_flush=on_flush)
+
+
+def open_writers(outputs, batch_size=20, on_flush=None, append=False, threaded=False):
+    """
+    One writer for a list of (path, output_format): the sink itself for a single
+    output, otherwise a FanOutWriter over all of them
+    """
+    if len(outputs) == 1:
+        path, output_format = outputs[0]
+        return open_writer(path, output_format, batch_size=batch_size, on_flush=on_flush, append=append,
+                           threaded=threaded)
+    writers = []
+    try:
+        for path, output_format in outputs:
+            writers.append(open_writer(path, output_format, batch_size=batch_size, append=append, threaded=threaded))
+    except Exception:
+        for writer in writers:
+            writer.close()
+        raise
+    return FanOutWriter(writers, on_flush=on_flush)
+
+
+def store_writer(writer):
+    """
+    The scrape store sink among a writer's outputs, if there is one
+    """
+    for sink in getattr(writer, "writers", [writer]):
+        if isinstance(sink, StoreWriter):
+            return sink
+    return None
@@ -0,0 +1,9 @@
+"""
+Same as `reddit-scraper store`, for running from a checkout without installing.
+"""
+import sys
+
+from reddit_scraper.store import main
+
+if __name__ == "__main__":
+    main(sys.argv[1:], prog="scrape-store.py")
@@ -0,0 +1,9 @@
+"""
+Same as `reddit-scraper index`, for running from a checkout without installing.
+"""
+import sys
+
+from reddit_scraper.index import main
+
+if __name__ == "__main__":
+    main(sys.argv[1:], prog="search-index.py")
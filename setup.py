@@ -1,11 +1,34 @@
 #!/usr/bin/env python3
 """
 Setup script for Reddit Scraper & Data Cleaner
-This script helps users set up their environment and credentials.
+Run it with no arguments to set up your environment and credentials.
+
+It also installs the project (pip install .), which adds the reddit-scraper
+command with the scrape, clean, index and store subcommands.
 """
 
 import os
 import shutil
+import sys
+
+def setup_package():
+    from setuptools import setup
+
+    from reddit_scraper import __version__
+
+    setup(
+        name="reddit-scraper",
+        version=__version__,
+        description="Scrape subreddits and turn the posts and comments into clean text",
+        packages=["reddit_scraper"],
+        python_requires=">=3.9",
+        install_requires=["praw>=7.7.0", "prawcore>=2.4,<5", "requests", "tqdm>=4.65.0", "python-dotenv>=1.0.0"],
+        extras_require={
+            "parquet": ["pyarrow"],
+            "app": ["streamlit>=1.52.0"],
+        },
+        entry_points={"console_scripts": ["reddit-scraper = reddit_scraper.cli:main"]},
+    )
 
 def setup_environment():
     print("🚀 Setting up Reddit Scraper & Data Cleaner")
@@ -52,4 +75,8 @@ def setup_environment():
             print("Please manually edit the .env file with your preferred text editor.")
 
 if __name__ == "__main__":
-    setup_environment()
\ No newline at end of file
+    if len(sys.argv) > 1:
+        # pip and setuptools commands (egg_info, bdist_wheel, ...)
+        setup_package()
+    else:
+        setup_environment()
\ No newline at end of file